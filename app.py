@@ -1,7 +1,35 @@
-from flask import Flask, render_template, request, abort, jsonify, redirect, url_for
+from flask import Flask, render_template, request, abort, jsonify, redirect, url_for, Response, g, make_response
+from flask import before_render_template, has_request_context, template_rendered
 import mysql.connector
+import base64
+import csv
+import datetime
+import functools
+import hashlib
+import hmac
+import io
+import json
+import math
 import os
+import random
+import re
+import threading
+import time
 import urllib.parse
+from array import array
+from decimal import Decimal
+
+from cache import CatalogCache, RedisBackend, ResponseCache
+from catalog_stats import (
+    buckets_for_template, compute_stats, facet_buckets, histogram_select, stats_from_row,
+)
+from db import ConnectionPool, LazyConnection, ReplicaRouter
+from features import FeatureCache, cached_pis, clean_sequence, compute_pi_batch
+from metrics import Registry, TimedConnection, statement_name
+from recommendation import RuleEngine, load_rule_engine
+from slowlog import SlowQueryLog
+from snapshot import FTS_TABLE, SnapshotDatabase, fulltext_match_query
+from suggest import PrefixIndex
 
 app = Flask(__name__)
 
@@ -11,106 +39,497 @@ DB_USER = os.environ.get("DB_USER", "root")
 DB_PASSWORD = os.environ.get("DB_PASSWORD", "password")
 DB_NAME = os.environ.get("DB_NAME", "column_finder")
 
+# Read-Replicas fuer alle Abfragen der App, kommagetrennt "host[:port]";
+# leer = alles ueber DB_HOST. Der Primary dient dann nur noch als Fallback.
+DB_REPLICAS = [h.strip() for h in os.environ.get("DB_REPLICAS", "").split(",") if h.strip()]
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", "2"))
+# Wartezeit auf eine freie Replica-Verbindung, bevor das naechste Ziel dran ist
+DB_REPLICA_CHECKOUT_TIMEOUT = float(os.environ.get("DB_REPLICA_CHECKOUT_TIMEOUT", "0.05"))
 
-def get_db_connection():
+# Connection-Pool (warm gehaltene Verbindungen statt Handshake pro Request)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_POOL_MAX_OVERFLOW = int(os.environ.get("DB_POOL_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") not in ("0", "false", "no")
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+
+# Snapshot-Modus: alle Abfragen gehen an eine von import_data.py exportierte
+# SQLite-Datei statt an MySQL (leer = aus). Eine neu veroeffentlichte Datei wird
+# nach spaetestens SNAPSHOT_CHECK_INTERVAL Sekunden uebernommen.
+SNAPSHOT_PATH = os.environ.get("SNAPSHOT_PATH", "")
+SNAPSHOT_MMAP_SIZE = int(os.environ.get("SNAPSHOT_MMAP_SIZE", str(1 << 30)))
+SNAPSHOT_CHECK_INTERVAL = float(os.environ.get("SNAPSHOT_CHECK_INTERVAL", "2"))
+
+# Suchmodus fuer /proteins: "fulltext" (FULLTEXT-Index, nach Relevanz sortiert)
+# oder "like" (alter LIKE-Scan, z.B. falls der Index noch fehlt)
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "fulltext")
+SEARCH_LIMIT = 100
+# InnoDB indexiert standardmaessig erst Woerter ab 3 Zeichen (innodb_ft_min_token_size)
+FT_MIN_TOKEN_SIZE = int(os.environ.get("FT_MIN_TOKEN_SIZE", "3"))
+
+# Typeahead: wie oft (Sekunden) im Hintergrund auf eine neue Datenversion geprueft wird
+SUGGEST_REFRESH_INTERVAL = float(os.environ.get("SUGGEST_REFRESH_INTERVAL", "60"))
+SUGGEST_TOP_K = int(os.environ.get("SUGGEST_TOP_K", "10"))
+# Index schon beim Laden der App (im Hintergrund) aufbauen statt beim ersten Aufruf
+SUGGEST_PRELOAD = os.environ.get("SUGGEST_PRELOAD", "1") not in ("0", "false", "no")
+
+# Wie lange (Sekunden) die gemerkte Datenversion ohne Rueckfrage an MySQL gilt
+DATA_VERSION_CHECK_INTERVAL = float(os.environ.get("DATA_VERSION_CHECK_INTERVAL", "2"))
+
+# HTTP-Caching: Cache-Control fuer versionierte GET-Antworten; ETAG_SALT nach
+# Deployments mit geaenderten Templates aendern, damit alte ETags ungueltig werden
+HTTP_CACHE_CONTROL = os.environ.get("HTTP_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+ETAG_SALT = os.environ.get("ETAG_SALT", "")
+
+# LRU-Cache fuer Suchergebnisse und gerenderte Seiten (0 = aus); optional
+# zusaetzlich ein gemeinsames Redis-Backend (URL) fuer mehrere Worker
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "")
+RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+
+# Instrumentierung: Prometheus-Metriken unter /metrics und Server-Timing-Header
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") not in ("0", "false", "no")
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1") not in ("0", "false", "no")
+
+# Mitschnitt langsamer Abfragen (opt-in): Schwelle in Sekunden, leer = aus.
+# SLOW_QUERY_EXPLAIN: explain | analyze (fuehrt SELECTs erneut aus) | off
+SLOW_QUERY_THRESHOLD = os.environ.get("SLOW_QUERY_THRESHOLD", "")
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "explain")
+SLOW_QUERY_BUFFER = int(os.environ.get("SLOW_QUERY_BUFFER", "100"))
+
+# Betriebs-Endpunkte (/metrics, /api/pool, /api/cache, /debug/slow-queries)
+# zeigen Interna bis hin zu SQL-Parametern und sind daher standardmaessig aus.
+# Mit DEBUG_TOKEN muss zusaetzlich "Authorization: Bearer <token>" kommen.
+DEBUG_ENDPOINTS = os.environ.get("DEBUG_ENDPOINTS", "").lower() in ("1", "true", "yes")
+DEBUG_TOKEN = os.environ.get("DEBUG_TOKEN", "")
+
+
+def _open_db_connection(host=DB_HOST, port=3306):
     return mysql.connector.connect(
-        host=DB_HOST,
+        host=host,
+        port=port,
         user=DB_USER,
         password=DB_PASSWORD,
         database=DB_NAME,
         connection_timeout=5,
+        autocommit=True,
+        # Ungelesene Zeilen (z. B. abgebrochener Export) beim Schliessen des
+        # Cursors weglesen statt "Unread result found" zu werfen
+        consume_results=True,
+    )
+
+
+def _make_pool(host=DB_HOST, port=3306):
+    return ConnectionPool(
+        lambda: _open_db_connection(host, port),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_POOL_MAX_OVERFLOW,
+        recycle=DB_POOL_RECYCLE,
+        pre_ping=DB_POOL_PRE_PING,
+        timeout=DB_POOL_TIMEOUT,
     )
 
 
+def _replica_pool(endpoint):
+    host, _, port = endpoint.partition(":")
+    return endpoint, _make_pool(host, int(port or 3306))
+
+
+db_pool = _make_pool()
+db_router = ReplicaRouter(
+    db_pool,
+    [_replica_pool(endpoint) for endpoint in DB_REPLICAS],
+    max_lag=DB_REPLICA_MAX_LAG,
+    check_interval=DB_REPLICA_CHECK_INTERVAL,
+    replica_timeout=DB_REPLICA_CHECKOUT_TIMEOUT,
+) if DB_REPLICAS and not SNAPSHOT_PATH else None
+snapshot_db = SnapshotDatabase(
+    SNAPSHOT_PATH, mmap_size=SNAPSHOT_MMAP_SIZE, check_interval=SNAPSHOT_CHECK_INTERVAL,
+) if SNAPSHOT_PATH else None
+
+
+def get_db_connection():
+    """
+    Holt eine Verbindung aus dem Pool (bzw. vom Replica-Router oder aus dem
+    Snapshot); conn.close() gibt sie zurueck.
+    """
+    started = time.perf_counter()
+    if snapshot_db is not None:
+        conn = snapshot_db.connect()
+    elif db_router is not None:
+        conn = db_router.connect()
+    else:
+        conn = db_pool.connect()
+    if not METRICS_ENABLED and slow_query_log is None:
+        return conn
+    if METRICS_ENABLED:
+        elapsed = time.perf_counter() - started
+        DB_CONNECT_SECONDS.observe(elapsed)
+        if has_request_context():
+            _request_timing()["connect"] += elapsed
+    return TimedConnection(conn, record_statement)
+
+
+# ============================================
+# Instrumentierung (/metrics, Server-Timing)
+# ============================================
+
+metrics = Registry(prefix="column_finder_")
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds", "Request latency by route", ["route", "method", "status"],
+)
+DB_CONNECT_SECONDS = metrics.histogram(
+    "db_connect_duration_seconds", "Time to check out a database connection",
+)
+SQL_STATEMENT_SECONDS = metrics.histogram(
+    "sql_statement_duration_seconds", "SQL statement time (execute and fetch)", ["statement"],
+)
+SQL_STATEMENT_ROWS = metrics.counter(
+    "sql_statement_rows_total", "Rows returned or affected per SQL statement", ["statement"],
+)
+TEMPLATE_RENDER_SECONDS = metrics.histogram(
+    "template_render_duration_seconds", "Jinja render time by template", ["template"],
+)
+
+slow_query_log = SlowQueryLog(
+    threshold=float(SLOW_QUERY_THRESHOLD),
+    max_entries=SLOW_QUERY_BUFFER,
+    explain=SLOW_QUERY_EXPLAIN,
+    log=lambda message: app.logger.warning("%s", message),
+) if SLOW_QUERY_THRESHOLD else None
+
+
+def _request_timing():
+    timing = g.get("timing")
+    if timing is None:
+        timing = g.timing = {"connect": 0.0, "sql": 0.0, "queries": 0, "render": 0.0}
+    return timing
+
+
+def record_statement(conn, sql, params, seconds, rows):
+    """
+    Callback der TimedConnection: Metriken plus Summen fuer Server-Timing,
+    langsame Statements zusaetzlich in slow_query_log.
+    """
+    if slow_query_log is not None:
+        slow_query_log(conn, sql, params, seconds, rows)
+    if not METRICS_ENABLED:
+        return
+    name = statement_name(sql)
+    SQL_STATEMENT_SECONDS.observe(seconds, name)
+    SQL_STATEMENT_ROWS.inc(rows, name)
+    if has_request_context():
+        timing = _request_timing()
+        timing["sql"] += seconds
+        timing["queries"] += 1
+
+
+@before_render_template.connect_via(app)
+def _render_started(sender, template, context, **extra):
+    if METRICS_ENABLED:
+        g.setdefault("render_started", []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def _render_finished(sender, template, context, **extra):
+    stack = g.get("render_started")
+    if not stack:
+        return
+    elapsed = time.perf_counter() - stack.pop()
+    TEMPLATE_RENDER_SECONDS.observe(elapsed, template.name or "-")
+    _request_timing()["render"] += elapsed
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    started = g.get("request_started")
+    if started is None or not METRICS_ENABLED:
+        return response
+    total = time.perf_counter() - started
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    HTTP_REQUEST_SECONDS.observe(total, route, request.method, response.status_code)
+
+    if SERVER_TIMING:
+        timing = _request_timing()
+        response.headers["Server-Timing"] = ", ".join([
+            f"db-connect;dur={timing['connect'] * 1000:.2f}",
+            f'sql;dur={timing["sql"] * 1000:.2f};desc="{timing["queries"]} queries"',
+            f"render;dur={timing['render'] * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+    return response
+
+
 def cytiva_url(column_name: str) -> str:
     """Erzeugt einen Cytiva-Link fuer bekannte Saeulen; sonst generischer Suchlink."""
-    if not column_name:
-        return ""
-
-    mapping = {
-        "HiTrap Q HP (Anion exchange)":
-            "https://www.cytivalifesciences.com/en/de/products/items/hitrap-q-hp-anion-exchange-chromatography-column-p-00607",
-        "HiTrap SP HP (Cation exchange)":
-            "https://www.cytivalifesciences.com/en/de/products/items/hitrap-sp-hp-cation-exchange-chromatography-column-p-00794",
-        "HisTrap FF (IMAC, Ni-NTA)":
-            "https://www.cytivalifesciences.com/en/de/products/items/histrap-ff-p-00251",
-        "GSTrap 4B (Affinity)":
-            "https://www.cytivalifesciences.com/en/de/products/items/gstrap-4b-columns-p-00307",
-        "Strep-Tactin Sepharose (Affinity)":
-            "https://www.cytivalifesciences.com/en/de/products/items/strep-tactin-xt-4flow-p-08318",
-        "Superdex 75 Increase (SEC)":
-            "https://www.cytivalifesciences.com/en/de/products/items/superdex-75-increase-p-06188",
-        "Superdex 200 Increase (SEC)":
-            "https://www.cytivalifesciences.com/en/de/products/items/superdex-200-increase-small-scale-size-exclusion-chromatography-columns-p-06190",
-        "Superdex 75 Increase (SEC polishing)":
-            "https://www.cytivalifesciences.com/en/de/products/items/superdex-75-increase-p-06188",
-        "Superdex 200 Increase (SEC polishing)":
-            "https://www.cytivalifesciences.com/en/de/products/items/superdex-200-increase-small-scale-size-exclusion-chromatography-columns-p-06190",
-    }
+    return get_rule_engine().url_for(column_name)
 
-    if column_name in mapping:
-        return mapping[column_name]
 
-    from urllib.parse import quote_plus
-    return f"https://www.cytivalifesciences.com/en/de/search?q={quote_plus(column_name)}"
+def fetch_data_version(cur):
+    """Liest die vom Import hochgezaehlte Datenversion (0, falls noch keine existiert)."""
+    try:
+        cur.execute("SELECT version FROM catalog_version WHERE id = 1;")
+    except mysql.connector.Error:
+        return 0
+    row = cur.fetchone()
+    if not row:
+        return 0
+    return row["version"] if isinstance(row, dict) else row[0]
 
 
-@app.context_processor
-def inject_helpers():
-    # Stellt die Hilfsfunktion in Templates bereit
-    return {"cytiva_url": cytiva_url}
+# Katalogweite Werte (Bereiche, Statistik), gueltig bis zum naechsten Import
+catalog_cache = CatalogCache(fetch_data_version, check_interval=DATA_VERSION_CHECK_INTERVAL)
 
+# Suchergebnisse/Seiten; die Datenversion ist Teil jedes Schluessels
+response_cache = ResponseCache(
+    RESPONSE_CACHE_SIZE,
+    backend=RedisBackend(RESPONSE_CACHE_BACKEND, ttl=RESPONSE_CACHE_TTL) if RESPONSE_CACHE_BACKEND else None,
+)
 
-@app.route("/")
-def index():
-    protein_count = None
-    pi_buckets = {"lt6": 0, "btw6_8": 0, "gt8": 0}
-    mw_buckets = {"lt50": 0, "btw50_100": 0, "gt100": 0}
-    pi_total = 0
-    mw_total = 0
-    error_message = None
+# Zuletzt geladenes Regelwerk; bis zum ersten DB-Zugriff gelten die Standardregeln
+_rule_engine = RuleEngine.default()
+
+
+def get_rule_engine(conn=None):
+    """
+    Kompiliertes Empfehlungs-Regelwerk. Mit conn wird es (einmal pro Datenversion)
+    aus recommendation_rule/chromatography_column geladen.
+    """
+    global _rule_engine
+    if conn is not None:
+        _rule_engine = catalog_cache.get(conn, "rule_engine", load_rule_engine)
+    return _rule_engine
+
+
+# ============================================
+# HTTP-Caching (ETag / Last-Modified / 304)
+# ============================================
+
+def load_last_modified(conn):
+    """Zeitpunkt des letzten Imports (catalog_version.updated_at) als UTC-datetime."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT UNIX_TIMESTAMP(updated_at) FROM catalog_version WHERE id = 1;")
+        row = cur.fetchone()
+    except mysql.connector.Error:
+        return None
+    finally:
+        cur.close()
+    if not row or row[0] is None:
+        return None
+    return datetime.datetime.fromtimestamp(int(row[0]), tz=datetime.timezone.utc)
+
+
+def current_data_version():
+    """Datenversion aus catalog_cache; oeffnet nur bei Bedarf eine Verbindung."""
+    lazy = LazyConnection(get_db_connection)
+    try:
+        return catalog_cache.version(lazy)
+    finally:
+        lazy.close()
+
+
+def request_key():
+    """Pfad plus sortierte Query-Parameter als hashbarer Schluessel."""
+    return request.path, tuple(sorted(request.args.items(multi=True)))
+
+
+def make_etag(version):
+    """Starker ETag aus Datenversion, Pfad und allen Query-Parametern (inkl. tag)."""
+    path, args = request_key()
+    raw = json.dumps([ETAG_SALT, version, path, args], separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def versioned_response(view):
+    """
+    Conditional GET fuer Antworten, die sich nur mit der Datenversion aendern.
+    Die Version kommt aus catalog_cache; innerhalb von DATA_VERSION_CHECK_INTERVAL
+    wird dafuer keine Verbindung geoeffnet, eine 304-Antwort laeuft dann ganz
+    ohne Query. Views setzen g.no_http_cache, wenn die Antwort einen
+    (voruebergehenden) Fehler enthaelt und nicht gecacht werden darf.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        lazy = LazyConnection(get_db_connection)
+        try:
+            version = catalog_cache.version(lazy)
+            last_modified = catalog_cache.get(lazy, "last_modified", load_last_modified)
+        except mysql.connector.Error:
+            # DB nicht erreichbar: ohne Caching ausliefern, die View meldet den Fehler
+            return view(*args, **kwargs)
+        finally:
+            lazy.close()
+
+        etag = make_etag(version)
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            not_modified = bool(
+                last_modified and request.if_modified_since
+                and request.if_modified_since >= last_modified
+            )
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or g.get("no_http_cache"):
+                return response
+
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        response.headers["Cache-Control"] = HTTP_CACHE_CONTROL
+        return response
+
+    return wrapper
+
+
+# ============================================
+# Typeahead-Index
+# ============================================
+
+_suggest_lock = threading.Lock()
+# Serialisiert den Aufbau: gleichzeitige Anfragen warten auf einen Build, statt
+# selbst den ganzen Katalog zu laden (RLock, da get_suggest_index ihn schon haelt)
+_suggest_build_lock = threading.RLock()
+_suggest_state = {"index": None, "version": None, "checked_at": 0.0, "refreshing": False}
+
+
+def build_suggest_index():
+    """Laedt Namen/Gene/Accessions aus MySQL und baut den Praefixindex neu auf."""
+    with _suggest_build_lock:
+        conn = None
+        cur = None
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor(dictionary=True)
+            version = fetch_data_version(cur)
+            cur.execute("SELECT id, uniprot_id, name, gene_name FROM protein;")
+            index = PrefixIndex(cur.fetchall(), top_k=SUGGEST_TOP_K)
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
+        with _suggest_lock:
+            _suggest_state["index"] = index
+            _suggest_state["version"] = version
+            _suggest_state["checked_at"] = time.monotonic()
+        return index
+
+
+def _refresh_suggest_index():
+    """Hintergrund-Thread: baut nur neu auf, wenn sich die Datenversion geaendert hat."""
     conn = None
     cur = None
     try:
         conn = get_db_connection()
         cur = conn.cursor(dictionary=True)
+        version = fetch_data_version(cur)
+        cur.close()
+        cur = None
+        conn.close()
+        conn = None
+        if version != _suggest_state["version"]:
+            build_suggest_index()
+    except Exception as err:
+        app.logger.warning("Typeahead-Index konnte nicht aktualisiert werden: %s", err)
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+        with _suggest_lock:
+            _suggest_state["checked_at"] = time.monotonic()
+            _suggest_state["refreshing"] = False
+
+
+def get_suggest_index():
+    """
+    Liefert den aktuellen Index. Fehlt er noch (Start, Preload nicht fertig),
+    baut genau ein Aufruf synchron, gleichzeitige warten auf dessen Ergebnis;
+    danach wird die Datenversion im Hintergrund geprueft, Anfragen gehen nie an MySQL.
+    """
+    index = _suggest_state["index"]
+    if index is None:
+        with _suggest_build_lock:
+            index = _suggest_state["index"]
+            if index is None:
+                return build_suggest_index()
+
+    with _suggest_lock:
+        due = time.monotonic() - _suggest_state["checked_at"] > SUGGEST_REFRESH_INTERVAL
+        if due and not _suggest_state["refreshing"]:
+            _suggest_state["refreshing"] = True
+            threading.Thread(target=_refresh_suggest_index, daemon=True).start()
+    return index
 
-        cur.execute("SELECT COUNT(*) AS cnt FROM protein;")
-        protein_count = cur.fetchone()["cnt"]
 
+@app.context_processor
+def inject_helpers():
+    # Stellt die Hilfsfunktionen/Regeln in Templates bereit
+    engine = get_rule_engine()
+    return {"cytiva_url": cytiva_url, "tag_options": engine.tags, "rec_rules": engine.to_json()}
+
+
+def load_dashboard_stats(conn):
+    """
+    Liest den beim Import vorberechneten Statistik-Snapshot (eine Zeile).
+    Fehlt er (Import mit aelterer Version), wird einmal live gerechnet.
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
         cur.execute(
             """
-            SELECT
-              SUM(CASE WHEN pI IS NOT NULL AND pI < 6 THEN 1 ELSE 0 END) AS lt6,
-              SUM(CASE WHEN pI IS NOT NULL AND pI >= 6 AND pI <= 8 THEN 1 ELSE 0 END) AS btw6_8,
-              SUM(CASE WHEN pI IS NOT NULL AND pI > 8 THEN 1 ELSE 0 END) AS gt8
-            FROM protein;
+            SELECT version, protein_count, pi_edges, pi_counts, mw_edges, mw_counts
+            FROM catalog_stats
+            ORDER BY version DESC
+            LIMIT 1;
             """
         )
         row = cur.fetchone()
-        if row:
-            pi_buckets = {k: row.get(k) or 0 for k in ["lt6", "btw6_8", "gt8"]}
-            pi_total = sum(pi_buckets.values())
+    except mysql.connector.Error:
+        row = None
+    finally:
+        cur.close()
+    if row:
+        return stats_from_row(row)
 
-        cur.execute(
-            """
-            SELECT
-              SUM(CASE WHEN mw_kda IS NOT NULL AND mw_kda < 50 THEN 1 ELSE 0 END) AS lt50,
-              SUM(CASE WHEN mw_kda IS NOT NULL AND mw_kda >= 50 AND mw_kda <= 100 THEN 1 ELSE 0 END) AS btw50_100,
-              SUM(CASE WHEN mw_kda IS NOT NULL AND mw_kda > 100 THEN 1 ELSE 0 END) AS gt100
-            FROM protein;
-            """
-        )
-        row2 = cur.fetchone()
-        if row2:
-            mw_buckets = {k: row2.get(k) or 0 for k in ["lt50", "btw50_100", "gt100"]}
-            mw_total = sum(mw_buckets.values())
+    cur = conn.cursor()
+    try:
+        return compute_stats(cur)
+    finally:
+        cur.close()
+
+
+@app.route("/")
+@versioned_response
+def index():
+    protein_count = None
+    pi_buckets = []
+    mw_buckets = []
+    error_message = None
+    conn = None
+    try:
+        conn = get_db_connection()
+
+        stats = catalog_cache.get(conn, "dashboard_stats", load_dashboard_stats)
+        protein_count = stats["protein_count"]
+        pi_buckets = buckets_for_template(stats["pi_edges"], stats["pi_counts"])
+        mw_buckets = buckets_for_template(stats["mw_edges"], stats["mw_counts"])
 
     except Exception as err:
         error_message = f"DB-Fehler: {err}"
+        g.no_http_cache = True
     finally:
-        if cur:
-            cur.close()
         if conn:
             conn.close()
 
@@ -119,44 +538,310 @@ def index():
         protein_count=protein_count,
         pi_buckets=pi_buckets,
         mw_buckets=mw_buckets,
-        pi_total=pi_total,
-        mw_total=mw_total,
         error_message=error_message,
     )
 
 
-@app.route("/proteins", methods=["GET"])
-def results():
-    search_query = request.args.get("search", "").strip()
-    results = []
-    error_message = None
-    pi_global_min = None
-    pi_global_max = None
-    mw_global_min = None
-    mw_global_max = None
+def fulltext_boolean_query(search_query):
+    """
+    Baut aus der Nutzereingabe eine BOOLEAN-MODE-Suche (jedes Wort als Praefix,
+    alle Woerter muessen vorkommen). Gibt "" zurueck, wenn kein Wort lang genug ist.
+    """
+    words = [w for w in re.findall(r"\w+", search_query) if len(w) >= FT_MIN_TOKEN_SIZE]
+    return " ".join(f"+{w}*" for w in words)
 
-    conn = None
-    cur = None
+
+def fulltext_hits(ft_query, with_score=True):
+    """
+    Unterabfrage (SQL, Parameter) mit der id (und score, groesser = besser)
+    aller Volltext-Treffer: MATCH ... AGAINST in MySQL, FTS5 im Snapshot-Modus.
+    """
+    if snapshot_db is not None:
+        score = f", -bm25({FTS_TABLE}) AS score" if with_score else ""
+        return (
+            f"SELECT rowid AS id{score} FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+            (fulltext_match_query(re.findall(r"\w+", ft_query)),),
+        )
+    if with_score:
+        return (
+            "SELECT id, MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE) AS score\n"
+            "                    FROM protein\n"
+            "                    WHERE MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE)",
+            (ft_query, ft_query),
+        )
+    return (
+        "SELECT id FROM protein WHERE MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE)",
+        (ft_query,),
+    )
+
+
+class InvalidCursor(ValueError):
+    """Cursor konnte nicht dekodiert werden oder passt nicht zur Suche."""
+
+
+# Form des Cursor-Schluessels je Modus: Typ jedes Elements
+# name: (name_key, id); ft: (match_rank, relevance, id)
+CURSOR_KEY_TYPES = {
+    "name": (str, int),
+    "ft": (int, (int, float), int),
+}
+
+
+def encode_cursor(mode, key):
+    raw = json.dumps({"m": mode, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, mode):
+    if not cursor:
+        return None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Ungueltiger Cursor")
+    if not isinstance(data, dict) or data.get("m") != mode or not isinstance(data.get("k"), list):
+        raise InvalidCursor("Cursor gehoert zu einer anderen Suche")
+    key = data["k"]
+    types = CURSOR_KEY_TYPES[mode]
+    if len(key) != len(types) or any(
+        isinstance(value, bool) or not isinstance(value, kind)
+        or (isinstance(value, float) and not math.isfinite(value))
+        for value, kind in zip(key, types)
+    ):
+        raise InvalidCursor("Cursor hat ein ungueltiges Format")
+    return key
+
+
+class InvalidFilter(ValueError):
+    """Filterparameter (pI/MW-Grenzen, has_structure) ist ungueltig."""
+
+
+# Query-Parameter der Facettenfilter fuer /proteins und /api/proteins
+FILTER_RANGES = {"pi_min": "pI", "pi_max": "pI", "mw_min": "mw_kda", "mw_max": "mw_kda"}
+FACET_LIMIT = int(os.environ.get("FACET_LIMIT", "20"))
 
-        like = f"%{search_query}%" if search_query else "%"
+
+def parse_filters(args):
+    """
+    Liest pi_min/pi_max/mw_min/mw_max, organism, tag und has_structure aus den
+    Query-Parametern. Leere Parameter werden ignoriert.
+    """
+    filters = {}
+    for name in FILTER_RANGES:
+        raw = (args.get(name) or "").strip()
+        if raw:
+            try:
+                value = float(raw)
+            except ValueError:
+                raise InvalidFilter(f"'{name}' muss eine Zahl sein")
+            if not math.isfinite(value):
+                raise InvalidFilter(f"'{name}' muss eine endliche Zahl sein")
+            filters[name] = value
+    for name in ("organism", "tag"):
+        raw = (args.get(name) or "").strip()
+        if raw:
+            filters[name] = raw
+    raw = (args.get("has_structure") or "").strip().lower()
+    if raw:
+        if raw not in ("1", "true", "yes", "0", "false", "no"):
+            raise InvalidFilter("'has_structure' muss 1 oder 0 sein")
+        filters["has_structure"] = raw in ("1", "true", "yes")
+    return filters
+
+
+def filter_conditions(filters, alias=""):
+    """
+    WHERE-Bedingungen fuer die Filter, alle auf indizierten Spalten
+    (idx_protein_pi, idx_protein_mw, idx_protein_organism, idx_protein_tag,
+    idx_structure_protein). Gibt (conditions, params) zurueck.
+    """
+    prefix = f"{alias}." if alias else ""
+    conditions = []
+    params = []
+    for name, column in FILTER_RANGES.items():
+        if name in filters:
+            op = ">=" if name.endswith("_min") else "<="
+            conditions.append(f"{prefix}{column} {op} %s")
+            params.append(filters[name])
+    for name in ("organism", "tag"):
+        if name in filters:
+            conditions.append(f"{prefix}{name} = %s")
+            params.append(filters[name])
+    if "has_structure" in filters:
+        exists = f"EXISTS (SELECT 1 FROM structure s WHERE s.protein_id = {prefix}id)"
+        conditions.append(exists if filters["has_structure"] else f"NOT {exists}")
+    return conditions, params
+
+
+def search_proteins(cur, search_query, limit=SEARCH_LIMIT, cursor=None, filters=None):
+    """
+    Sucht Proteine fuer /proteins und /api/proteins mit Keyset-Pagination.
+    Exakte Accession- und Gen-Symbol-Treffer stehen vorne, danach wird nach
+    FULLTEXT-Relevanz sortiert; ohne Volltext nach (name_key, id).
+    filters (siehe parse_filters) schraenken die Treffer serverseitig ein.
+    Gibt (rows, next_cursor) zurueck; next_cursor ist None auf der letzten Seite.
+    """
+    ft_query = ""
+    if search_query and SEARCH_MODE == "fulltext":
+        ft_query = fulltext_boolean_query(search_query)
+    filter_where, filter_params = filter_conditions(filters or {}, "v")
+
+    if not ft_query:
+        # Sortierung ueber den Index idx_protein_name_key (name_key, id)
+        key = decode_cursor(cursor, "name")
+        where = list(filter_where)
+        params = list(filter_params)
+        if search_query:
+            like = f"%{search_query}%"
+            where.append("(name LIKE %s OR gene_name LIKE %s OR organism LIKE %s)")
+            params += [like, like, like]
+        if key:
+            where.append("name_key >= %s AND (name_key > %s OR id > %s)")
+            params += [key[0], key[0], key[1]]
         cur.execute(
-            """
+            f"""
             SELECT *
-            FROM protein_with_recommendation
-            WHERE name LIKE %s
-               OR gene_name LIKE %s
-               OR organism LIKE %s
-            ORDER BY name
-            LIMIT 100;
+            FROM protein_with_recommendation v
+            {"WHERE " + " AND ".join(where) if where else ""}
+            ORDER BY name_key, id
+            LIMIT %s;
+            """,
+            tuple(params) + (limit + 1,),
+        )
+        rows = cur.fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor("name", [rows[-1]["name_key"], rows[-1]["id"]])
+        return rows, next_cursor
+
+    # Volltext: Seek auf (match_rank ASC, relevance DESC, id ASC)
+    key = decode_cursor(cursor, "ft")
+    seek = ""
+    seek_params = ()
+    if key:
+        seek = """
+        WHERE r.match_rank > %s
+           OR (r.match_rank = %s AND (r.relevance < %s OR (r.relevance = %s AND r.id > %s)))
+        """
+        seek_params = (key[0], key[0], key[1], key[1], key[2])
+
+    hits_sql, hits_params = fulltext_hits(ft_query)
+    cur.execute(
+        f"""
+        SELECT r.*
+        FROM (
+            SELECT v.*,
+                   CASE
+                       WHEN v.uniprot_id = %s THEN 0
+                       WHEN SUBSTRING_INDEX(v.gene_name, ' ', 1) = %s THEN 1
+                       ELSE 2
+                   END AS match_rank,
+                   m.score AS relevance
+            FROM (
+                SELECT id, MAX(score) AS score
+                FROM (
+                    SELECT id, 0 AS score
+                    FROM protein
+                    WHERE uniprot_id = %s
+                    UNION ALL
+                    {hits_sql}
+                ) hits
+                GROUP BY id
+            ) m
+            JOIN protein_with_recommendation v ON v.id = m.id
+            {"WHERE " + " AND ".join(filter_where) if filter_where else ""}
+        ) r
+        {seek}
+        ORDER BY r.match_rank, r.relevance DESC, r.id
+        LIMIT %s;
+        """,
+        (search_query, search_query, search_query) + hits_params
+        + tuple(filter_params) + seek_params + (limit + 1,),
+    )
+    rows = cur.fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor("ft", [last["match_rank"], float(last["relevance"]), last["id"]])
+    return rows, next_cursor
+
+
+def facet_counts(cur, search_query, filters, pi_edges, mw_edges):
+    """
+    Facettenzaehlungen fuer die aktuelle Treffermenge (Suche + Filter):
+    pI- und MW-Bins, has_structure, haeufigste Organismen und Tags.
+    cur muss ein Tupel-Cursor sein.
+    """
+    join = ""
+    where, params = filter_conditions(filters, "p")
+    join_params = []
+    ft_query = fulltext_boolean_query(search_query) if search_query and SEARCH_MODE == "fulltext" else ""
+    if ft_query:
+        hits_sql, hits_params = fulltext_hits(ft_query, with_score=False)
+        join = f"""
+        JOIN (
+            SELECT id FROM protein WHERE uniprot_id = %s
+            UNION
+            {hits_sql}
+        ) m ON m.id = p.id
+        """
+        join_params = [search_query, *hits_params]
+    elif search_query:
+        like = f"%{search_query}%"
+        where = ["(p.name LIKE %s OR p.gene_name LIKE %s OR p.organism LIKE %s)"] + where
+        params = [like, like, like] + params
+    scope = f"FROM protein p {join} {'WHERE ' + ' AND '.join(where) if where else ''}"
+    scope_params = tuple(join_params + params)
+
+    pi_sql, pi_params = histogram_select("p.pI", pi_edges, "pi")
+    mw_sql, mw_params = histogram_select("p.mw_kda", mw_edges, "mw")
+    cur.execute(
+        f"""
+        SELECT COUNT(*),
+        SUM(EXISTS (SELECT 1 FROM structure s WHERE s.protein_id = p.id)),
+        {pi_sql},
+        {mw_sql}
+        {scope};
+        """,
+        tuple(pi_params + mw_params) + scope_params,
+    )
+    row = cur.fetchone()
+    total = int(row[0] or 0)
+    with_structure = int(row[1] or 0)
+    counts = [int(v or 0) for v in row[2:]]
+    n_pi = len(pi_edges) + 1
+
+    values = {}
+    for column in ("organism", "tag"):
+        cur.execute(
+            f"""
+            SELECT p.{column}, COUNT(*) AS n
+            {scope} {'AND' if where else 'WHERE'} p.{column} IS NOT NULL
+            GROUP BY p.{column}
+            ORDER BY n DESC, p.{column}
+            LIMIT %s;
             """,
-            (like, like, like),
+            scope_params + (FACET_LIMIT,),
         )
-        results = cur.fetchall()
+        values[column] = [{"value": v, "count": int(n)} for v, n in cur.fetchall()]
+
+    return {
+        "total": total,
+        "pi": facet_buckets(pi_edges, counts[:n_pi]),
+        "mw": facet_buckets(mw_edges, counts[n_pi:]),
+        "organism": values["organism"],
+        "tag": values["tag"],
+        "has_structure": {"true": with_structure, "false": total - with_structure},
+    }
+
 
-        # Global ranges for pI and MW to scale stats
+def load_global_ranges(conn):
+    """MIN/MAX von pI und MW ueber den ganzen Katalog."""
+    cur = conn.cursor(dictionary=True)
+    try:
         cur.execute(
             """
             SELECT
@@ -165,85 +850,350 @@ def results():
             FROM protein;
             """
         )
-        gr = cur.fetchone()
+        return cur.fetchone()
+    finally:
+        cur.close()
+
+
+def load_facets(conn, search_query, filters):
+    """Facetten mit denselben Bin-Grenzen wie die Startseiten-Statistik."""
+    stats = catalog_cache.get(conn, "dashboard_stats", load_dashboard_stats)
+    cur = conn.cursor()
+    try:
+        return facet_counts(cur, search_query, filters, stats["pi_edges"], stats["mw_edges"])
+    finally:
+        cur.close()
+
+
+def normalize_search(search_query):
+    """Mehrfache Leerzeichen zusammenfassen (Suche und Cache-Schluessel)."""
+    return " ".join((search_query or "").split())
+
+
+def load_search_page(search_query, filters, cursor=None, limit=SEARCH_LIMIT, with_facets=True):
+    """
+    DB-Teil von /proteins und /api/proteins: Trefferseite, Facetten (nur erste
+    Seite) und globale pI/MW-Bereiche.
+    """
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        get_rule_engine(conn)
+        cur = conn.cursor(dictionary=True)
+        rows, next_cursor = search_proteins(cur, search_query, limit=limit, cursor=cursor, filters=filters)
+        # Facetten nur fuer die erste Seite; Folgeseiten haben dieselbe Treffermenge
+        facets = load_facets(conn, search_query, filters) if with_facets and not cursor else None
+        ranges = catalog_cache.get(conn, "global_ranges", load_global_ranges)
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+    return {"rows": rows, "next_cursor": next_cursor, "facets": facets, "ranges": ranges}
+
+
+def cached_search_page(version, search_query, filters, cursor=None, limit=SEARCH_LIMIT, with_facets=True):
+    """
+    load_search_page ueber response_cache. Der Schluessel ist die normalisierte
+    Suche (Gross-/Kleinschreibung spielt fuer LIKE/FULLTEXT keine Rolle) plus
+    Filter, Cursor und Datenversion. Die Zeilen werden geteilt: nicht veraendern.
+    """
+    key = (
+        "search", version, search_query.casefold(), tuple(sorted(filters.items())),
+        cursor, limit, with_facets,
+    )
+    return response_cache.get_or_compute(
+        key, lambda: load_search_page(search_query, filters, cursor, limit, with_facets)
+    )
+
+
+@app.route("/proteins", methods=["GET"])
+@versioned_response
+def results():
+    search_query = normalize_search(request.args.get("search", ""))
+    cursor = request.args.get("cursor", "").strip() or None
+    results = []
+    next_cursor = None
+    facets = None
+    filters = {}
+    version = None
+    error_message = None
+    pi_global_min = None
+    pi_global_max = None
+    mw_global_min = None
+    mw_global_max = None
+
+    try:
+        filters = parse_filters(request.args)
+        version = current_data_version()
+        page = cached_search_page(version, search_query, filters, cursor=cursor)
+        results = page["rows"]
+        next_cursor = page["next_cursor"]
+        facets = page["facets"]
+
+        # Global ranges for pI and MW to scale stats (pro Datenversion gecacht)
+        gr = page["ranges"]
         if gr:
             pi_global_min = gr.get("pi_min")
             pi_global_max = gr.get("pi_max")
             mw_global_min = gr.get("mw_min")
             mw_global_max = gr.get("mw_max")
 
+    except (InvalidCursor, InvalidFilter) as err:
+        error_message = f"Fehler: {err}"
     except mysql.connector.Error as err:
         error_message = f"Datenbankfehler: {err}"
+        g.no_http_cache = True
     except Exception as err:
         error_message = f"Fehler: {err}"
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+        g.no_http_cache = True
 
-    return render_template(
-        "results.html",
-        results=results,
-        search_query=search_query,
-        error_message=error_message,
-        pi_global_min=pi_global_min,
-        pi_global_max=pi_global_max,
-        mw_global_min=mw_global_min,
-        mw_global_max=mw_global_max,
-    )
+    def render():
+        return render_template(
+            "results.html",
+            results=results,
+            search_query=search_query,
+            cursor=cursor,
+            next_cursor=next_cursor,
+            filters=filters,
+            facets=facets,
+            error_message=error_message,
+            pi_global_min=pi_global_min,
+            pi_global_max=pi_global_max,
+            mw_global_min=mw_global_min,
+            mw_global_max=mw_global_max,
+        )
+
+    # Fehlerseiten nicht cachen; sonst die fertige Seite je Datenversion und URL
+    if error_message:
+        return render()
+    return response_cache.get_or_compute(("page", version) + request_key(), render)
 
 
 def compute_recommendation_row(row, tag_choice=None):
     """Berechnet Empfehlung/Polishing samt URLs basierend auf Tag/pI/MW."""
-    pi = row.get("pI")
-    mw = row.get("mw_kda")
-
-    # Default aus DB
-    rec_text = row.get("recommended_column")
-    pol_text = row.get("polishing_column")
-
-    if tag_choice:
-        tag_choice = tag_choice.strip()
-
-    if tag_choice == "His":
-        rec_text = "HisTrap FF (IMAC, Ni-NTA)"
-    elif tag_choice == "GST":
-        rec_text = "GSTrap 4B (Affinity)"
-    elif tag_choice == "Strep":
-        rec_text = "Strep-Tactin Sepharose (Affinity)"
-    else:
-        # fallback Heuristik pI
-        if pi is not None:
-            try:
-                if float(pi) < 7:
-                    rec_text = "HiTrap Q HP (Anion exchange)"
-                elif float(pi) > 7:
-                    rec_text = "HiTrap SP HP (Cation exchange)"
-                else:
-                    rec_text = "Superdex 200 Increase (SEC)"
-            except Exception:
-                pass
-
-    # polishing Heuristik nach MW
-    if mw is not None:
+    engine = get_rule_engine()
+
+    def as_float(value):
         try:
-            if float(mw) <= 70:
-                pol_text = "Superdex 75 Increase (SEC polishing)"
-            else:
-                pol_text = "Superdex 200 Increase (SEC polishing)"
-        except Exception:
-            pass
+            return float(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    rec_text, pol_text = engine.recommend(
+        as_float(row.get("pI")),
+        as_float(row.get("mw_kda")),
+        (tag_choice or "").strip() or None,
+    )
 
     return {
         "recommended_column": rec_text,
-        "recommended_url": cytiva_url(rec_text) if rec_text else "",
+        "recommended_url": engine.url_for(rec_text),
         "polishing_column": pol_text,
-        "polishing_url": cytiva_url(pol_text) if pol_text else "",
+        "polishing_url": engine.url_for(pol_text),
     }
 
 
+RECOMMEND_MAX_ITEMS = int(os.environ.get("RECOMMEND_MAX_ITEMS", "10000"))
+
+
+def _invalid_item(it):
+    """
+    Fehlermeldung fuer ein Item mit unzulaessigen Typen (ganze Anfrage -> 400),
+    sonst None. Nicht lesbare Zahlen bleiben ein Fehler am einzelnen Item.
+    """
+    if not isinstance(it, dict):
+        return None
+    if it.get("id") is not None and (isinstance(it["id"], bool) or not isinstance(it["id"], int)):
+        return "'id' muss eine ganze Zahl sein"
+    if it.get("tag") is not None and not isinstance(it["tag"], str):
+        return "'tag' muss ein String sein"
+    for field in ("pI", "mw_kda"):
+        value = it.get(field)
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            return f"'{field}' muss eine Zahl sein"
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            continue
+        if not math.isfinite(number):
+            return f"'{field}' muss endlich sein"
+    return None
+
+
+def _fetch_in_chunks(cur, column, values, chunk=1000):
+    """Holt pI/MW/Tag fuer viele IDs bzw. Accessions mit wenigen IN-Abfragen."""
+    found = {}
+    values = list(values)
+    for start in range(0, len(values), chunk):
+        part = values[start:start + chunk]
+        cur.execute(
+            f"""
+            SELECT id, uniprot_id, pI, mw_kda, tag
+            FROM protein
+            WHERE {column} IN ({", ".join(["%s"] * len(part))});
+            """,
+            tuple(part),
+        )
+        for row in cur.fetchall():
+            found[row[column]] = row
+    return found
+
+
+@app.route("/api/recommendations", methods=["POST"])
+def api_recommendations():
+    """
+    Batch-Empfehlungen. Body: {"items": [...], "tag": optional}; jedes Item ist
+    {"id": ...}, {"uniprot_id": ...} oder {"pI": ..., "mw_kda": ..., "tag": ...}.
+    """
+    payload = request.get_json(silent=True)
+    if payload is None:
+        payload = {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Body muss ein JSON-Objekt sein"}), 400
+    items = payload.get("items")
+    if not isinstance(items, list):
+        return jsonify({"error": "'items' muss eine Liste sein"}), 400
+    if len(items) > RECOMMEND_MAX_ITEMS:
+        return jsonify({"error": f"Maximal {RECOMMEND_MAX_ITEMS} Items pro Aufruf"}), 400
+    if payload.get("tag") is not None and not isinstance(payload["tag"], str):
+        return jsonify({"error": "'tag' muss ein String sein"}), 400
+    for i, it in enumerate(items):
+        problem = _invalid_item(it)
+        if problem:
+            return jsonify({"error": f"items[{i}]: {problem}"}), 400
+    default_tag = (payload.get("tag") or "").strip() or None
+
+    ids = {it["id"] for it in items if isinstance(it, dict) and isinstance(it.get("id"), int)}
+    accessions = {it["uniprot_id"] for it in items
+                  if isinstance(it, dict) and isinstance(it.get("uniprot_id"), str) and it["uniprot_id"]}
+
+    by_id = {}
+    by_acc = {}
+    if ids or accessions:
+        conn = None
+        cur = None
+        try:
+            conn = get_db_connection()
+            get_rule_engine(conn)
+            cur = conn.cursor(dictionary=True)
+            if ids:
+                by_id = _fetch_in_chunks(cur, "id", ids)
+            if accessions:
+                by_acc = _fetch_in_chunks(cur, "uniprot_id", accessions)
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
+    out = []
+    pis, mws, tags = [], [], []
+    for it in items:
+        if not isinstance(it, dict):
+            it = {}
+        entry = {"id": it.get("id"), "uniprot_id": it.get("uniprot_id")}
+        row = None
+        if it.get("id") is not None:
+            row = by_id.get(it["id"]) if isinstance(it["id"], int) else None
+        elif it.get("uniprot_id"):
+            row = by_acc.get(it["uniprot_id"]) if isinstance(it["uniprot_id"], str) else None
+        if row is None and (it.get("id") is not None or it.get("uniprot_id")):
+            entry["error"] = "not found"
+        source = row if row is not None else it
+        try:
+            pi = float(source["pI"]) if source.get("pI") is not None else None
+            mw = float(source["mw_kda"]) if source.get("mw_kda") is not None else None
+        except (TypeError, ValueError):
+            pi = mw = None
+            entry["error"] = "invalid pI/mw_kda"
+        tag = (it.get("tag") or default_tag or (row or {}).get("tag") or "").strip() or None
+        if row is not None:
+            entry["id"] = row["id"]
+            entry["uniprot_id"] = row["uniprot_id"]
+        entry.update({"pI": pi, "mw_kda": mw, "tag": tag})
+        out.append(entry)
+        pis.append(pi)
+        mws.append(mw)
+        tags.append(tag)
+
+    if out:
+        engine = get_rule_engine()
+        rec_codes, pol_codes = engine.recommend_batch(pis, mws, tags)
+        labels = engine.labels + [None]
+        urls = [engine.url_for(label) for label in engine.labels] + [""]
+        for entry, rc, pc in zip(out, rec_codes.tolist(), pol_codes.tolist()):
+            if "error" in entry:
+                continue
+            entry["recommended_column"] = labels[rc]
+            entry["recommended_url"] = urls[rc]
+            entry["polishing_column"] = labels[pc]
+            entry["polishing_url"] = urls[pc]
+
+    return jsonify({"count": len(out), "items": out})
+
+
+# Persistenter Feature-Cache fuer /api/analyze (dieselbe Datei wie beim Import)
+FEATURE_CACHE_PATH = os.environ.get(
+    "FEATURE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache.sqlite")
+)
+FEATURE_CACHE_MAX_ENTRIES = int(os.environ.get("FEATURE_CACHE_MAX_ENTRIES", "1000000"))
+ANALYZE_MAX_SEQUENCES = int(os.environ.get("ANALYZE_MAX_SEQUENCES", "1000"))
+
+_feature_cache = None
+_feature_cache_lock = threading.Lock()
+
+
+def get_feature_cache():
+    """Oeffnet den Feature-Cache beim ersten Zugriff (None, wenn nicht verfuegbar)."""
+    global _feature_cache
+    if _feature_cache is None and FEATURE_CACHE_PATH:
+        with _feature_cache_lock:
+            if _feature_cache is None:
+                try:
+                    _feature_cache = FeatureCache(FEATURE_CACHE_PATH, max_entries=FEATURE_CACHE_MAX_ENTRIES)
+                except Exception as err:
+                    app.logger.warning("Feature-Cache nicht verfuegbar: %s", err)
+                    return None
+    return _feature_cache
+
+
+@app.route("/api/analyze", methods=["POST"])
+def api_analyze():
+    """
+    pI fuer beliebige Sequenzen. Body: {"sequences": ["MKV...", ...]} oder
+    {"sequence": "MKV..."}; bekannte Sequenzen kommen aus dem Feature-Cache.
+    """
+    payload = request.get_json(silent=True) or {}
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Body muss ein JSON-Objekt sein"}), 400
+    sequences = payload.get("sequences")
+    if sequences is None and "sequence" in payload:
+        sequences = [payload["sequence"]]
+    if not isinstance(sequences, list) or not all(isinstance(s, str) for s in sequences):
+        return jsonify({"error": "'sequences' muss eine Liste von Strings sein"}), 400
+    if len(sequences) > ANALYZE_MAX_SEQUENCES:
+        return jsonify({"error": f"Maximal {ANALYZE_MAX_SEQUENCES} Sequenzen pro Aufruf"}), 400
+
+    pis = cached_pis(sequences, get_feature_cache(), compute=compute_pi_batch)
+    engine = get_rule_engine()
+    items = []
+    for seq, pi in zip(sequences, pis):
+        rec, _ = engine.recommend(pi, None)
+        items.append({
+            "length": len(clean_sequence(seq)),
+            "pI": pi,
+            "recommended_column": rec,
+            "recommended_url": engine.url_for(rec),
+        })
+    return jsonify({"count": len(items), "items": items})
+
+
 @app.route("/proteins/<int:protein_id>")
+@versioned_response
 def protein_detail(protein_id):
     """Detailseite fuer ein einzelnes Protein mit Struktur (falls vorhanden)."""
     conn = None
@@ -254,6 +1204,7 @@ def protein_detail(protein_id):
 
     try:
         conn = get_db_connection()
+        get_rule_engine(conn)
         cur = conn.cursor(dictionary=True)
 
         cur.execute(
@@ -297,7 +1248,49 @@ def protein_detail(protein_id):
     )
 
 
+API_PAGE_MAX = 500
+
+
+@app.route("/api/proteins", methods=["GET"])
+@versioned_response
+def api_proteins():
+    """
+    JSON-Suche mit Cursor-Pagination (?search=&cursor=&limit=) und Filtern
+    (pi_min, pi_max, mw_min, mw_max, organism, tag, has_structure). Die erste
+    Seite enthaelt Facettenzaehlungen, ausser bei facets=0.
+    """
+    search_query = normalize_search(request.args.get("search", ""))
+    cursor = request.args.get("cursor", "").strip() or None
+    try:
+        limit = int(request.args.get("limit", SEARCH_LIMIT))
+    except ValueError:
+        limit = SEARCH_LIMIT
+    limit = max(1, min(limit, API_PAGE_MAX))
+    want_facets = not cursor and request.args.get("facets", "1") != "0"
+
+    try:
+        filters = parse_filters(request.args)
+        version = current_data_version()
+        page = cached_search_page(
+            version, search_query, filters, cursor=cursor, limit=limit, with_facets=want_facets,
+        )
+    except (InvalidCursor, InvalidFilter) as err:
+        return jsonify({"error": str(err)}), 400
+
+    # Zeilen aus dem Cache nicht veraendern, sondern kopieren
+    items = [dict(row, **compute_recommendation_row(row)) for row in page["rows"]]
+    return jsonify({
+        "search": search_query,
+        "filters": filters,
+        "limit": limit,
+        "items": items,
+        "next_cursor": page["next_cursor"],
+        "facets": page["facets"],
+    })
+
+
 @app.route("/api/proteins/<int:protein_id>")
+@versioned_response
 def api_protein(protein_id):
     """Einfache JSON-API fuer ein Protein."""
     conn = None
@@ -305,6 +1298,7 @@ def api_protein(protein_id):
     protein = None
     try:
         conn = get_db_connection()
+        get_rule_engine(conn)
         cur = conn.cursor(dictionary=True)
         cur.execute(
             """
@@ -337,33 +1331,264 @@ def api_protein(protein_id):
     return jsonify(protein)
 
 
+EXAMPLE_MAX_N = 20
+
+
+def load_protein_ids(conn):
+    """Alle Protein-IDs als kompaktes Array (einmal pro Datenversion, Index-Scan)."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT id FROM protein;")
+        return array("l", (row[0] for row in cur.fetchall()))
+    finally:
+        cur.close()
+
+
 @app.route("/api/example", methods=["GET"])
 def api_example():
-    """Gibt einen zufaelligen Protein-Namen (oder Gen/UniProt) zurueck."""
+    """
+    Gibt einen zufaelligen Protein-Namen (oder Gen/UniProt) zurueck.
+    Mit ?n= werden bis zu EXAMPLE_MAX_N verschiedene Beispiele geliefert.
+    """
+    try:
+        n = int(request.args.get("n", 1))
+    except ValueError:
+        n = 1
+    n = max(1, min(n, EXAMPLE_MAX_N))
+
     conn = None
     cur = None
-    choice = ""
+    labels = []
     try:
         conn = get_db_connection()
-        cur = conn.cursor(dictionary=True)
+        ids = catalog_cache.get(conn, "protein_ids", load_protein_ids)
+        if ids:
+            picked = random.sample(range(len(ids)), min(n, len(ids)))
+            chosen = [ids[i] for i in picked]
+            cur = conn.cursor(dictionary=True)
+            cur.execute(
+                f"""
+                SELECT id, COALESCE(name, gene_name, uniprot_id) AS label
+                FROM protein
+                WHERE id IN ({", ".join(["%s"] * len(chosen))});
+                """,
+                tuple(chosen),
+            )
+            by_id = {row["id"]: row["label"] for row in cur.fetchall()}
+            labels = [by_id[i] for i in chosen if by_id.get(i)]
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+    return jsonify({"search": labels[0] if labels else "", "examples": labels})
+
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+REC_FIELDS = ["recommended_column", "recommended_url", "polishing_column", "polishing_url"]
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def iter_export_rows(tag_choice=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Liest den ganzen Katalog ueber einen ungepufferten (serverseitigen) Cursor
+    in festen Batches. Liefert zuerst die Spaltennamen, danach Listen von Zeilen.
+    """
+    conn = get_db_connection()
+    cur = None
+    try:
+        get_rule_engine(conn)
+        cur = conn.cursor(dictionary=True, buffered=False)
         cur.execute(
             """
-            SELECT COALESCE(name, gene_name, uniprot_id) AS label
-            FROM protein
-            ORDER BY RAND()
-            LIMIT 1;
+            SELECT
+                p.*,
+                s.pdb_id,
+                s.title AS struct_title,
+                s.method,
+                s.resolution_angstrom,
+                s.image_url
+            FROM protein_with_recommendation p
+            LEFT JOIN structure s ON s.protein_id = p.id
+            ORDER BY p.id;
             """
         )
-        row = cur.fetchone()
-        if row and row.get("label"):
-            choice = row["label"]
+        columns = list(cur.column_names)
+        yield columns + [f for f in REC_FIELDS if f not in columns]
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                break
+            for row in batch:
+                row.update(compute_recommendation_row(row, tag_choice=tag_choice))
+            yield batch
     finally:
-        if cur:
-            cur.close()
-        if conn:
+        # Die Verbindung geht auch dann an den Pool zurueck, wenn close() des
+        # Cursors fehlschlaegt (Client hat den Download abgebrochen)
+        try:
+            if cur:
+                cur.close()
+        finally:
             conn.close()
 
-    return jsonify({"search": choice or ""})
+
+def _export_ndjson(rows_iter):
+    try:
+        next(rows_iter)
+        for batch in rows_iter:
+            yield "".join(json.dumps(row, default=_json_default) + "\n" for row in batch)
+    finally:
+        # Bei Verbindungsabbruch des Clients Cursor/Verbindung sofort freigeben
+        rows_iter.close()
+
+
+def _export_csv(rows_iter):
+    try:
+        header = next(rows_iter)
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=header, extrasaction="ignore")
+        writer.writeheader()
+        yield buf.getvalue()
+        for batch in rows_iter:
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(batch)
+            yield buf.getvalue()
+    finally:
+        rows_iter.close()
+
+
+@app.route("/api/export", methods=["GET"])
+def api_export():
+    """
+    Streamt den kompletten Katalog inkl. Empfehlungen und Struktur als NDJSON oder CSV
+    (?format=ndjson|csv, optional ?tag=). Der Speicherbedarf bleibt konstant.
+    """
+    fmt = request.args.get("format", "ndjson").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unbekanntes Format: {fmt}"}), 400
+    tag_choice = request.args.get("tag", "").strip()
+
+    rows_iter = iter_export_rows(tag_choice=tag_choice)
+    body = _export_ndjson(rows_iter) if fmt == "ndjson" else _export_csv(rows_iter)
+    return Response(
+        body,
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename=proteins.{fmt}"},
+    )
+
+
+@app.route("/api/suggest", methods=["GET"])
+def api_suggest():
+    """Top-k-Vervollstaendigungen fuer Namen, Gene und Accessions (ohne DB-Zugriff)."""
+    q = request.args.get("q", "")
+    try:
+        limit = int(request.args.get("limit", SUGGEST_TOP_K))
+    except ValueError:
+        limit = SUGGEST_TOP_K
+    limit = max(1, min(limit, SUGGEST_TOP_K))
+    try:
+        index = get_suggest_index()
+    except Exception:
+        return jsonify({"q": q, "suggestions": []}), 503
+    return jsonify({"q": q, "suggestions": index.suggest(q, limit=limit)})
+
+
+def debug_endpoint(view):
+    """
+    Zugangspruefung fuer Betriebs-Endpunkte: 404, solange DEBUG_ENDPOINTS aus
+    ist; ist DEBUG_TOKEN gesetzt, 403 ohne passenden Bearer-Token.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not DEBUG_ENDPOINTS:
+            abort(404)
+        if DEBUG_TOKEN:
+            sent = request.headers.get("Authorization", "").encode("utf-8")
+            if not hmac.compare_digest(sent, f"Bearer {DEBUG_TOKEN}".encode("utf-8")):
+                abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/api/cache", methods=["GET"])
+@debug_endpoint
+def api_cache():
+    """
+    Kennzahlen des Antwort-Caches (Treffer, Fehlschlaege, Verdraengungen).
+    Nur mit DEBUG_ENDPOINTS (und ggf. DEBUG_TOKEN).
+    """
+    return jsonify(response_cache.stats())
+
+
+@app.route("/metrics", methods=["GET"])
+@debug_endpoint
+def metrics_endpoint():
+    """
+    Alle Messwerte im Prometheus-Textformat (Statement-Namen, Pool-Zustand).
+    Nur mit METRICS_ENABLED und DEBUG_ENDPOINTS; Prometheus schickt den
+    DEBUG_TOKEN ueber authorization/bearer_token der Scrape-Konfiguration.
+    """
+    if not METRICS_ENABLED:
+        abort(404)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/debug/slow-queries", methods=["GET"])
+@debug_endpoint
+def debug_slow_queries():
+    """
+    Zuletzt mitgeschnittene langsame Abfragen (neueste zuerst) mit Parametern
+    und EXPLAIN-Plan. Nur vorhanden, wenn SLOW_QUERY_THRESHOLD gesetzt ist;
+    da die Parameter Nutzereingaben enthalten, zusaetzlich nur mit
+    DEBUG_ENDPOINTS (und ggf. DEBUG_TOKEN).
+    """
+    if slow_query_log is None:
+        abort(404)
+    return jsonify({**slow_query_log.stats(), "queries": slow_query_log.entries()})
+
+
+@app.route("/api/pool", methods=["GET"])
+@debug_endpoint
+def api_pool():
+    """
+    Kennzahlen des Connection-Pools (Wartezeiten, Auslastung) bzw. aller
+    Replicas oder des Snapshots. Nur mit DEBUG_ENDPOINTS (und ggf. DEBUG_TOKEN).
+    """
+    if snapshot_db is not None:
+        return jsonify(snapshot_db.stats())
+    if db_router is not None:
+        return jsonify(db_router.stats())
+    return jsonify(db_pool.stats())
+
+
+def preload_suggest_index():
+    """Baut den Typeahead-Index im Hintergrund auf (beim Laden der App)."""
+    def run():
+        try:
+            get_suggest_index()
+        except Exception as err:
+            app.logger.warning("Typeahead-Index beim Start nicht aufgebaut: %s", err)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+if SUGGEST_PRELOAD:
+    preload_suggest_index()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,507 @@
+"""
+Lasttest fuer die Flask-App mit synthetischem Katalog.
+
+Drei Teile:
+
+- generate: fuellt protein/structure (Schema aus init_db) mit N realistisch
+  verteilten Zeilen (Namen, Gen-Symbole, bimodaler pI, log-normale MW)
+- run:      spielt einen gewichteten Mix aus Routen mit mehreren Threads gegen
+  eine laufende App ab und misst Durchsatz sowie p50/p95/p99 je Route; IDs und
+  Suchbegriffe werden gleichverteilt aus der Katalog-Datenbank gezogen, der
+  Zustand des Antwort-Caches steht im Bericht
+- compare:  vergleicht ein Ergebnis mit einer gespeicherten Baseline und endet
+  mit Exit-Code 1, wenn eine Route langsamer geworden ist
+
+Beispiele:
+
+    python benchmark.py generate --rows 100000 --database column_finder_bench
+    DB_NAME=column_finder_bench python app.py
+    python benchmark.py run --url http://127.0.0.1:5000 --duration 60 --save baseline.json
+    python benchmark.py run --url http://127.0.0.1:5000 --duration 60 --compare baseline.json
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import import_data
+
+# ============================================
+# Synthetischer Katalog
+# ============================================
+
+BENCH_DB_NAME = "column_finder_bench"
+GENERATE_BATCH_SIZE = 5000
+TARGET_SAMPLE = 500         # so viele zufaellige Proteine als Ziele fuer detail/search
+STRUCTURE_FRACTION = 0.1    # Anteil Proteine mit PDB-Struktur
+TAG_FRACTION = 0.05         # Anteil Proteine mit Tag (His/GST/Strep)
+
+NAME_HEADS = [
+    "Serine/threonine-protein kinase", "Receptor tyrosine-protein kinase", "Zinc finger protein",
+    "E3 ubiquitin-protein ligase", "Solute carrier family", "Transmembrane protein",
+    "Coiled-coil domain-containing protein", "Olfactory receptor", "Cytochrome P450",
+    "Heat shock protein", "Histone deacetylase", "Protein phosphatase", "Kinesin-like protein",
+    "ATP-binding cassette sub-family", "Leucine-rich repeat-containing protein",
+    "Glutathione S-transferase", "Insulin-like growth factor-binding protein", "Collagen alpha-1",
+    "Voltage-dependent calcium channel subunit", "Ras-related protein",
+]
+NAME_ALTS = ["", "", "", " (EC 2.7.11.1)", " (Fragment)", " (Putative uncharacterized protein)"]
+GENE_PREFIXES = ["ZNF", "SLC", "TMEM", "CCDC", "OR", "CYP", "HSP", "HDAC", "PPP", "KIF",
+                 "ABC", "LRRC", "GST", "IGFBP", "COL", "CACN", "RAB", "MAPK", "EGFR", "TP"]
+ORGANISMS = [
+    ("Homo sapiens (Human)", 60),
+    ("Mus musculus (Mouse)", 15),
+    ("Rattus norvegicus (Rat)", 8),
+    ("Escherichia coli (strain K12)", 7),
+    ("Saccharomyces cerevisiae (strain ATCC 204508 / S288c) (Baker's yeast)", 5),
+    ("Arabidopsis thaliana (Mouse-ear cress)", 5),
+]
+TAGS = ["His", "GST", "Strep"]
+METHODS = [("X-RAY DIFFRACTION", 70), ("ELECTRON MICROSCOPY", 20), ("SOLUTION NMR", 10)]
+
+_ACC_RADIX = [
+    "ABCDEFGHIJKLMNRSTUVWXYZ", "0123456789", "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ", "0123456789",
+]
+_PDB_RADIX = ["123456789"] + ["0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"] * 3
+PDB_ID_CAPACITY = 9 * 36 ** 3
+
+
+def _mixed_radix(n, alphabets):
+    """Eindeutige Zeichenkette fuer n (ohne Kollisionen, deterministisch)."""
+    out = []
+    for alphabet in reversed(alphabets):
+        n, digit = divmod(n, len(alphabet))
+        out.append(alphabet[digit])
+    if n:
+        raise ValueError("Zahlenbereich fuer synthetische IDs erschoepft")
+    return "".join(reversed(out))
+
+
+def synthetic_accession(n):
+    """UniProt-artige Accession (6 Zeichen) fuer Zeile n."""
+    return _mixed_radix(n, _ACC_RADIX)
+
+
+def _weighted(rng, items):
+    return rng.choices([v for v, _ in items], weights=[w for _, w in items])[0]
+
+
+def synthetic_protein(rng, n):
+    """Eine Zeile in der Reihenfolge von import_data.PROTEIN_COLUMNS."""
+    # pI ist bimodal (saure und basische Proteine), MW log-normal um ~45 kDa
+    if rng.random() < 0.6:
+        pi = rng.gauss(5.6, 0.8)
+    else:
+        pi = rng.gauss(8.8, 1.0)
+    pi = round(min(max(pi, 4.05), 12.0), 2)
+    mw = round(min(max(rng.lognormvariate(3.8, 0.6), 2.0), 3800.0), 3)
+    length = max(int(mw * 1000 / 110), 10)
+
+    head = rng.choice(NAME_HEADS)
+    name = f"{head} {rng.randint(1, 400)}{rng.choice(NAME_ALTS)}"
+    prefix = rng.choice(GENE_PREFIXES)
+    genes = [f"{prefix}{rng.randint(1, 999)}"] + [
+        f"{rng.choice(GENE_PREFIXES)}{rng.randint(1, 999)}" for _ in range(rng.randint(0, 2))
+    ]
+    tag = rng.choice(TAGS) if rng.random() < TAG_FRACTION else None
+    checksum = hashlib.sha1(f"synthetic-{n}".encode("ascii")).hexdigest()
+
+    return (
+        synthetic_accession(n),
+        name,
+        " ".join(genes),
+        _weighted(rng, ORGANISMS),
+        length,
+        mw,
+        pi,
+        tag,
+        None,
+        1,
+        checksum,
+    )
+
+
+def synthetic_structure(rng, accession, k):
+    """Struktur-Tupel wie STRUCTURE_SEED (PDB-ID eindeutig ueber k)."""
+    method = _weighted(rng, METHODS)
+    reso = round(rng.uniform(1.0, 4.0), 2) if method != "SOLUTION NMR" else None
+    pdb_id = _mixed_radix(k, _PDB_RADIX)
+    return (accession, pdb_id, f"Synthetic structure {pdb_id}", method, reso, None)
+
+
+def generate(rows, database=BENCH_DB_NAME, seed=42, truncate=False,
+             structure_fraction=STRUCTURE_FRACTION, batch_size=GENERATE_BATCH_SIZE):
+    """
+    Legt die Benchmark-Datenbank ueber init_db()/Migrationen an und schreibt
+    rows synthetische Proteine plus Strukturen. Gleicher seed = gleiche Daten.
+    """
+    import_data.MYSQL_DB_NAME = database
+    import_data.ensure_database_exists()
+    conn = import_data.init_db()
+    import_data.insert_default_columns(conn)
+    import_data.insert_default_rules(conn)
+
+    cur = conn.cursor()
+    if truncate:
+        cur.execute("DELETE FROM structure;")
+        cur.execute("DELETE FROM protein;")
+        conn.commit()
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    structures = []
+    written = 0
+    for start in range(0, rows, batch_size):
+        batch = [synthetic_protein(rng, n) for n in range(start, min(start + batch_size, rows))]
+        import_data._upsert_protein_rows(cur, batch, 1000)
+        conn.commit()
+        for row in batch:
+            # 4-stellige PDB-IDs reichen fuer ~420k Strukturen
+            if rng.random() < structure_fraction and len(structures) < PDB_ID_CAPACITY:
+                structures.append(synthetic_structure(rng, row[0], len(structures)))
+        written += len(batch)
+        import_data._report_rate(written, started)
+    cur.close()
+    import_data._report_rate(written, started, final=True)
+
+    import_data.import_structure_mappings(conn, structures)
+    import_data.create_protein_view_with_recommendation(conn)
+    version = import_data.bump_data_version(conn)
+    import_data.refresh_catalog_stats(conn, version)
+    conn.close()
+    print(f"Benchmark-Datenbank '{database}': {written} Proteine, {len(structures)} Strukturen.")
+
+
+# ============================================
+# Lasttreiber
+# ============================================
+
+# Standard-Mix (Route -> Gewicht); ueber --mix ueberschreibbar
+DEFAULT_MIX = {
+    "index": 1,
+    "search": 4,
+    "detail": 3,
+    "api_detail": 3,
+    "example": 1,
+}
+
+
+def parse_mix(text):
+    """'search=4,detail=3' -> {"search": 4.0, "detail": 3.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unbekannte Route '{name}' (erlaubt: {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def load_targets(database=BENCH_DB_NAME, sample=TARGET_SAMPLE, seed=42, rounds=5):
+    """
+    Zieht IDs und Suchbegriffe gleichverteilt aus dem Katalog: zufaellige IDs
+    zwischen MIN(id) und MAX(id) (Luecken werden in weiteren Runden aufgefuellt),
+    Suchbegriffe aus genau diesen Zeilen. So verteilen sich Detail- und
+    Suchanfragen ueber den ganzen Katalog statt auf den Anfang der Namenssortierung.
+    """
+    import_data.MYSQL_DB_NAME = database
+    conn = import_data.get_mysql_connection(with_database=True)
+    cur = conn.cursor()
+    rng = random.Random(seed)
+    rows = {}
+    try:
+        cur.execute("SELECT MIN(id), MAX(id) FROM protein;")
+        lo, hi = cur.fetchone()
+        if lo is None:
+            raise RuntimeError("Der Katalog ist leer; erst 'generate' ausfuehren.")
+        for _ in range(rounds):
+            need = sample - len(rows)
+            if need <= 0:
+                break
+            candidates = sorted({rng.randint(lo, hi) for _ in range(need)} - set(rows))
+            if not candidates:
+                continue
+            cur.execute(
+                f"SELECT id, name, gene_name FROM protein "
+                f"WHERE id IN ({', '.join(['%s'] * len(candidates))});",
+                tuple(candidates),
+            )
+            for id_, name, gene_name in cur.fetchall():
+                rows[id_] = (name, gene_name)
+    finally:
+        cur.close()
+        conn.close()
+
+    ids = sorted(rows)
+    # Begriffe nicht deduplizieren: ihre Haeufigkeit folgt dann dem Katalog
+    terms = [(gene_name or "").split(" ")[0] for name, gene_name in (rows[i] for i in ids)]
+    terms += [(name or "").split(" ")[0] for name, gene_name in (rows[i] for i in ids)]
+    return ids, [t for t in terms if t]
+
+
+def response_cache_state(session, base_url):
+    """
+    Zustand des Antwort-Caches der App ueber /api/cache; None, wenn der
+    Endpunkt nicht erreichbar ist (App ohne DEBUG_ENDPOINTS). Ein DEBUG_TOKEN
+    aus der Umgebung wird mitgeschickt.
+    """
+    token = os.environ.get("DEBUG_TOKEN")
+    headers = {"Authorization": f"Bearer {token}"} if token else None
+    try:
+        resp = session.get(f"{base_url}/api/cache", headers=headers, timeout=10)
+    except requests.RequestException:
+        return None
+    if resp.status_code != 200:
+        return None
+    return resp.json()
+
+
+def _request_for(route, rng, base_url, ids, terms):
+    if route == "index":
+        return f"{base_url}/", None
+    if route == "search":
+        return f"{base_url}/proteins", {"search": rng.choice(terms)}
+    if route == "detail":
+        return f"{base_url}/proteins/{rng.choice(ids)}", None
+    if route == "api_detail":
+        return f"{base_url}/api/proteins/{rng.choice(ids)}", None
+    return f"{base_url}/api/example", {"n": 5}
+
+
+def percentile(sorted_values, p):
+    """Perzentil nach Nearest-Rank auf einer sortierten Liste."""
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+def run(base_url, mix=None, concurrency=8, duration=30.0, requests_total=None, seed=42, warmup=2.0,
+        database=BENCH_DB_NAME):
+    """
+    Fuehrt den Lasttest aus. Endet nach duration Sekunden bzw. nach
+    requests_total Anfragen. Gibt den Bericht als Dictionary zurueck.
+    """
+    mix = mix or DEFAULT_MIX
+    base_url = base_url.rstrip("/")
+    ids, terms = load_targets(database, seed=seed)
+    with requests.Session() as session:
+        cache_before = response_cache_state(session, base_url)
+
+    routes = list(mix)
+    weights = [mix[r] for r in routes]
+    samples = {r: [] for r in routes}
+    errors = {r: 0 for r in routes}
+    lock = threading.Lock()
+    counter = {"issued": 0}
+    # Mit fester Anzahl Anfragen gibt es kein Warm-up
+    started = time.perf_counter()
+    measure_from = started + warmup if requests_total is None else started
+    deadline = measure_from + duration
+
+    def take_ticket():
+        with lock:
+            if requests_total is not None and counter["issued"] >= requests_total:
+                return False
+            counter["issued"] += 1
+            return True
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        with requests.Session() as session:
+            while True:
+                now = time.perf_counter()
+                if requests_total is None and now >= deadline:
+                    return
+                route = rng.choices(routes, weights=weights)[0]
+                url, params = _request_for(route, rng, base_url, ids, terms)
+                in_warmup = requests_total is None and now < measure_from
+                if not in_warmup and not take_ticket():
+                    return
+                started = time.perf_counter()
+                try:
+                    ok = session.get(url, params=params, timeout=30).status_code < 400
+                except requests.RequestException:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                if in_warmup:
+                    continue
+                with lock:
+                    samples[route].append(elapsed)
+                    if not ok:
+                        errors[route] += 1
+
+    print(f"Lasttest: {base_url}, {concurrency} Threads, Mix {mix}")
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    wall = time.perf_counter() - measure_from
+    with requests.Session() as session:
+        cache_after = response_cache_state(session, base_url)
+
+    report = {
+        "meta": {
+            "url": base_url,
+            "concurrency": concurrency,
+            "duration": round(wall, 3),
+            "mix": mix,
+            "seed": seed,
+            "python": platform.python_version(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime()),
+            "targets": {"ids": len(ids), "terms": len(terms)},
+            "response_cache": _cache_meta(cache_before, cache_after),
+        },
+        "routes": {},
+    }
+    for route in routes:
+        values = sorted(samples[route])
+        report["routes"][route] = {
+            "requests": len(values),
+            "errors": errors[route],
+            "throughput": len(values) / wall if wall > 0 else 0.0,
+            "mean_ms": (sum(values) / len(values) * 1000) if values else None,
+            "p50_ms": _ms(percentile(values, 50)),
+            "p95_ms": _ms(percentile(values, 95)),
+            "p99_ms": _ms(percentile(values, 99)),
+        }
+    return report
+
+
+def _ms(seconds):
+    return None if seconds is None else seconds * 1000
+
+
+def _cache_meta(before, after):
+    """enabled = None heisst: unbekannt (/api/cache nicht erreichbar)."""
+    if before is None or after is None:
+        return {"enabled": None}
+    return {
+        "enabled": bool(after["max_entries"]) or after["backend"] is not None,
+        "backend": after["backend"],
+        "hits": after["hits"] + after["backend_hits"] - before["hits"] - before["backend_hits"],
+        "misses": after["misses"] - before["misses"],
+    }
+
+
+# ============================================
+# Bericht / Baseline
+# ============================================
+
+def print_report(report):
+    print(f"{'Route':<12} {'Req':>7} {'Err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for route, r in report["routes"].items():
+        def fmt(v):
+            return f"{v:8.1f}" if v is not None else f"{'-':>8}"
+        print(f"{route:<12} {r['requests']:>7} {r['errors']:>5} {r['throughput']:8.1f} "
+              f"{fmt(r['p50_ms'])} {fmt(r['p95_ms'])} {fmt(r['p99_ms'])}")
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Vergleicht report mit baseline. Eine Route gilt als Regression, wenn p95
+    oder p99 um mehr als tolerance steigt, der Durchsatz um mehr als tolerance
+    faellt oder neue Fehler auftreten. Gibt die Liste der Befunde zurueck.
+    """
+    findings = []
+    for route, base in baseline["routes"].items():
+        cur = report["routes"].get(route)
+        if cur is None or not base.get("requests"):
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if base.get(key) and cur.get(key) and cur[key] > base[key] * (1 + tolerance):
+                findings.append(f"{route}: {key} {base[key]:.1f} -> {cur[key]:.1f}")
+        if base.get("throughput") and cur["throughput"] < base["throughput"] * (1 - tolerance):
+            findings.append(f"{route}: throughput {base['throughput']:.1f} -> {cur['throughput']:.1f} req/s")
+        if cur["errors"] and not base.get("errors"):
+            findings.append(f"{route}: {cur['errors']} Fehler (Baseline: 0)")
+    return findings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="synthetischen Katalog erzeugen")
+    gen.add_argument("--rows", type=int, default=10_000)
+    gen.add_argument("--database", default=BENCH_DB_NAME)
+    gen.add_argument("--seed", type=int, default=42)
+    gen.add_argument("--structure-fraction", type=float, default=STRUCTURE_FRACTION)
+    gen.add_argument("--truncate", action="store_true", help="vorhandene Proteine/Strukturen vorher loeschen")
+
+    load = sub.add_parser("run", help="Lasttest gegen eine laufende App")
+    load.add_argument("--url", default="http://127.0.0.1:5000")
+    load.add_argument("--mix", default=None, help="z.B. search=4,detail=3,api_detail=3,index=1,example=1")
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--duration", type=float, default=30.0)
+    load.add_argument("--requests", type=int, default=None, help="feste Anzahl Anfragen statt Dauer")
+    load.add_argument("--warmup", type=float, default=2.0)
+    load.add_argument("--seed", type=int, default=42)
+    load.add_argument("--database", default=BENCH_DB_NAME,
+                      help="Katalog-Datenbank der App (fuer die Auswahl der IDs/Suchbegriffe)")
+    load.add_argument("--save", help="Bericht als JSON speichern (Baseline)")
+    load.add_argument("--compare", help="gegen diese Baseline pruefen")
+    load.add_argument("--tolerance", type=float, default=0.2)
+
+    cmp_ = sub.add_parser("compare", help="zwei gespeicherte Berichte vergleichen")
+    cmp_.add_argument("report")
+    cmp_.add_argument("baseline")
+    cmp_.add_argument("--tolerance", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        generate(args.rows, database=args.database, seed=args.seed, truncate=args.truncate,
+                 structure_fraction=args.structure_fraction)
+        return 0
+
+    if args.command == "run":
+        report = run(
+            args.url,
+            mix=parse_mix(args.mix) if args.mix else None,
+            concurrency=args.concurrency,
+            duration=args.duration,
+            requests_total=args.requests,
+            seed=args.seed,
+            warmup=args.warmup,
+            database=args.database,
+        )
+        print_report(report)
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            print(f"Bericht gespeichert: {args.save}")
+        if not args.compare:
+            return 0
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+    else:
+        with open(args.report, encoding="utf-8") as fh:
+            report = json.load(fh)
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+
+    cache_now = report.get("meta", {}).get("response_cache", {}).get("enabled")
+    cache_base = baseline.get("meta", {}).get("response_cache", {}).get("enabled")
+    if cache_now != cache_base:
+        print(f"Hinweis: Antwort-Cache im Bericht {cache_now}, in der Baseline {cache_base}; "
+              f"die Zahlen sind nur bedingt vergleichbar.")
+    findings = compare(report, baseline, tolerance=args.tolerance)
+    for line in findings:
+        print("REGRESSION", line)
+    if not findings:
+        print(f"Keine Regression gegenueber der Baseline (Toleranz {args.tolerance:.0%}).")
+    return 1 if findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+In-Process-Caches der Flask-App.
+
+CatalogCache haelt katalogweite Werte (pI/MW-Bereiche, Startseiten-Statistik, ...),
+die sich nur durch einen Lauf von import_data.py aendern. Alle Eintraege gehoeren
+zu einer Datenversion (Tabelle catalog_version); aendert sich die Version,
+wird der Cache komplett verworfen.
+
+ResponseCache ist ein begrenzter LRU-Cache fuer Suchergebnisse und gerenderte
+Seiten. Die Datenversion steckt im Schluessel, alte Eintraege fallen per LRU
+heraus. Gleichzeitige Fehlschlaege auf denselben Schluessel werden
+zusammengefasst (single flight): nur ein Thread rechnet, die anderen warten.
+Optional liegt dahinter ein gemeinsames Backend (z. B. Redis) fuer mehrere Prozesse.
+Dort liegen die Werte als JSON (dumps_value/loads_value), nicht als Pickle: wer
+in das Backend schreiben kann, kann so keinen Code in der App ausfuehren.
+"""
+import base64
+import datetime
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+
+class CatalogCache:
+    """
+    fetch_version  -- Funktion(cur) -> aktuelle Datenversion
+    check_interval -- Sekunden, in denen die gemerkte Version ohne Query gilt
+                      (0 = vor jedem Zugriff pruefen)
+    """
+
+    def __init__(self, fetch_version, check_interval=2.0):
+        self._fetch_version = fetch_version
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._values = {}
+
+    def version(self, conn):
+        """Aktuelle Datenversion; fragt die DB hoechstens alle check_interval Sekunden."""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return self._version
+
+        cur = conn.cursor()
+        try:
+            version = self._fetch_version(cur)
+        finally:
+            cur.close()
+
+        with self._lock:
+            if version != self._version:
+                self._values = {}
+                self._version = version
+            self._checked_at = now
+        return version
+
+    def get(self, conn, key, loader):
+        """Liefert den Wert zu key; loader(conn) wird nur bei neuer Datenversion aufgerufen."""
+        version = self.version(conn)
+        entry = self._values.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        value = loader(conn)
+        with self._lock:
+            if self._version == version:
+                self._values[key] = (version, value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._values = {}
+            self._version = None
+            self._checked_at = 0.0
+
+
+# Typ-Markierungen fuer Werte, die JSON nicht kennt (Zeilen aus MySQL, Schluessel)
+_TAGS = ("__tuple__", "__decimal__", "__datetime__", "__date__", "__bytes__", "__map__")
+
+
+def _encode(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value) and not (len(value) == 1 and next(iter(value)) in _TAGS):
+            return {k: _encode(v) for k, v in value.items()}
+        return {"__map__": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, datetime.datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"__date__": value.isoformat()}
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+    raise TypeError(f"Nicht serialisierbar fuer das Cache-Backend: {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) != 1:
+        return obj
+    tag, raw = next(iter(obj.items()))
+    if tag == "__tuple__":
+        return tuple(raw)
+    if tag == "__decimal__":
+        return Decimal(raw)
+    if tag == "__datetime__":
+        return datetime.datetime.fromisoformat(raw)
+    if tag == "__date__":
+        return datetime.date.fromisoformat(raw)
+    if tag == "__bytes__":
+        return base64.b64decode(raw)
+    if tag == "__map__":
+        return {k: v for k, v in raw}
+    return obj
+
+
+def dumps_value(value):
+    """Wert -> JSON-Bytes; Decimal, Datum, Tupel und Bytes bleiben erhalten."""
+    return json.dumps(_encode(value), separators=(",", ":")).encode("utf-8")
+
+
+def loads_value(raw):
+    return json.loads(raw, object_hook=_decode)
+
+
+class RedisBackend:
+    """
+    Gemeinsames Backend fuer ResponseCache ueber Redis (Paket redis, optional).
+    Werte sind Bytes (JSON aus dumps_value); ttl begrenzt die Lebensdauer, da
+    Redis nichts von der Datenversion weiss. Gelesen wird nur JSON, trotzdem
+    gehoert Redis in ein privates Netz: wer schreiben kann, bestimmt, was die
+    App ausliefert.
+    """
+
+    def __init__(self, url, ttl=3600, prefix="column_finder:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("Fuer RESPONSE_CACHE_BACKEND wird das Paket 'redis' benoetigt")
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self._client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self._client.set(self.prefix + key, value, ex=self.ttl)
+
+
+class _Flight:
+    """Laufende Berechnung eines Schluessels, auf die weitere Threads warten."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    max_entries -- Obergrenze der Eintraege im Prozess (0 = Cache aus)
+    backend     -- optionales gemeinsames Backend mit get(key)/set(key, bytes)
+    """
+
+    def __init__(self, max_entries=512, backend=None):
+        self.max_entries = max_entries
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.backend_hits = 0
+        self.backend_errors = 0
+
+    @staticmethod
+    def _backend_key(key):
+        return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+    def _backend_get(self, key):
+        try:
+            raw = self.backend.get(self._backend_key(key))
+            return None if raw is None else (loads_value(raw),)
+        except Exception:
+            with self._lock:
+                self.backend_errors += 1
+            return None
+
+    def _backend_set(self, key, value):
+        try:
+            self.backend.set(self._backend_key(key), dumps_value(value))
+        except Exception:
+            with self._lock:
+                self.backend_errors += 1
+
+    def get_or_compute(self, key, compute):
+        """
+        Liefert den Wert zu key; compute() laeuft nur bei einem Fehlschlag und
+        fuer gleichzeitige Anfragen nach demselben key nur einmal. Wirft compute
+        eine Exception, wird nichts gespeichert und alle Wartenden sehen sie.
+        """
+        if self.max_entries <= 0:
+            return compute()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            found = self._backend_get(key) if self.backend is not None else None
+            if found is not None:
+                value = found[0]
+                with self._lock:
+                    self.backend_hits += 1
+            else:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                if self.backend is not None:
+                    self._backend_set(key, value)
+            self._store(key, value)
+            flight.value = value
+            return value
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.backend_hits
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "backend": type(self.backend).__name__ if self.backend is not None else None,
+                "backend_hits": self.backend_hits,
+                "backend_errors": self.backend_errors,
+                "hit_ratio": (self.hits + self.backend_hits) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,103 @@
+"""
+Histogramme fuer die Startseite (pI, MW) mit konfigurierbaren Bin-Grenzen.
+
+Wird vom Import (Statistik-Snapshot in catalog_stats) und von der App
+(Anzeige, Fallback ohne Snapshot) gemeinsam benutzt.
+"""
+import json
+
+# Standard-Grenzen wie bisher: < 6 / 6-8 / > 8 und < 50 / 50-100 / > 100 kDa
+DEFAULT_PI_EDGES = [6.0, 8.0]
+DEFAULT_MW_EDGES = [50.0, 100.0]
+
+
+def _fmt(value):
+    return f"{value:g}"
+
+
+def bucket_labels(edges):
+    """Beschriftungen fuer die Bins [-inf, e0), [e0, e1), ..., [e_last, inf)."""
+    if not edges:
+        return ["all"]
+    labels = [f"< {_fmt(edges[0])}"]
+    for lo, hi in zip(edges, edges[1:]):
+        labels.append(f"{_fmt(lo)}–{_fmt(hi)}")
+    labels.append(f"≥ {_fmt(edges[-1])}")
+    return labels
+
+
+def histogram_select(column, edges, prefix):
+    """
+    SELECT-Fragment mit einer SUM(CASE ...) je Bin, Spalten heissen <prefix>0..n.
+    column muss ein fester Spaltenname sein; die Grenzen gehen als Parameter rein.
+    """
+    parts = []
+    params = []
+    bounds = [None] + list(edges) + [None]
+    for i, (lo, hi) in enumerate(zip(bounds, bounds[1:])):
+        cond = [f"{column} IS NOT NULL"]
+        if lo is not None:
+            cond.append(f"{column} >= %s")
+            params.append(lo)
+        if hi is not None:
+            cond.append(f"{column} < %s")
+            params.append(hi)
+        parts.append(f"SUM(CASE WHEN {' AND '.join(cond)} THEN 1 ELSE 0 END) AS {prefix}{i}")
+    return ",\n".join(parts), params
+
+
+def compute_stats(cur, pi_edges=None, mw_edges=None):
+    """
+    Zaehlt Proteine und beide Histogramme in einem einzigen Scan.
+    cur muss ein Tupel-Cursor (nicht dictionary) sein.
+    """
+    pi_edges = list(DEFAULT_PI_EDGES if pi_edges is None else pi_edges)
+    mw_edges = list(DEFAULT_MW_EDGES if mw_edges is None else mw_edges)
+    pi_sql, pi_params = histogram_select("pI", pi_edges, "pi")
+    mw_sql, mw_params = histogram_select("mw_kda", mw_edges, "mw")
+    cur.execute(
+        f"SELECT COUNT(*),\n{pi_sql},\n{mw_sql}\nFROM protein;",
+        tuple(pi_params + mw_params),
+    )
+    row = cur.fetchone()
+    n_pi = len(pi_edges) + 1
+    counts = [int(v or 0) for v in row[1:]]
+    return {
+        "protein_count": int(row[0] or 0),
+        "pi_edges": pi_edges,
+        "pi_counts": counts[:n_pi],
+        "mw_edges": mw_edges,
+        "mw_counts": counts[n_pi:],
+    }
+
+
+def stats_from_row(row):
+    """Wandelt eine catalog_stats-Zeile (dictionary) in das Format fuer index.html."""
+    pi_edges = json.loads(row["pi_edges"])
+    mw_edges = json.loads(row["mw_edges"])
+    return {
+        "version": row.get("version"),
+        "protein_count": row["protein_count"],
+        "pi_edges": pi_edges,
+        "pi_counts": json.loads(row["pi_counts"]),
+        "mw_edges": mw_edges,
+        "mw_counts": json.loads(row["mw_counts"]),
+    }
+
+
+def buckets_for_template(edges, counts):
+    """Liste von {label, count, percent} fuer die Balken auf der Startseite."""
+    total = sum(counts)
+    return [
+        {"label": label, "count": count, "percent": (count / total * 100) if total else 0}
+        for label, count in zip(bucket_labels(edges), counts)
+    ]
+
+
+def facet_buckets(edges, counts):
+    """Liste von {label, lo, hi, count} fuer Facetten (lo/hi None = offen)."""
+    bounds = [None] + list(edges) + [None]
+    return [
+        {"label": label, "lo": lo, "hi": hi, "count": count}
+        for label, lo, hi, count in zip(bucket_labels(edges), bounds, bounds[1:], counts)
+    ]
@@ -0,0 +1,447 @@
+"""
+Datenbank-Hilfen fuer die Flask-App: ein einfacher, thread-sicherer
+Connection-Pool vor mysql.connector und ein Router, der lesende Zugriffe
+auf Read-Replicas verteilt.
+"""
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+
+class PoolTimeout(mysql.connector.Error):
+    """Keine freie Verbindung innerhalb des Timeouts verfuegbar."""
+
+
+class PooledConnection:
+    """
+    Duenner Wrapper um eine MySQL-Verbindung. close() gibt die Verbindung
+    an den Pool zurueck, statt sie zu schliessen; alles andere wird an die
+    echte Verbindung durchgereicht.
+    """
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._returned = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._returned:
+            return
+        self._returned = True
+        self._pool._checkin(self._conn, self._created_at)
+
+
+class LazyConnection:
+    """
+    Oeffnet die Verbindung erst beim ersten cursor()-Aufruf. Fuer Pfade, die
+    meist ohne DB auskommen (z. B. 304-Antworten aus gemerkter Datenversion).
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self._conn = None
+
+    @property
+    def opened(self):
+        return self._conn is not None
+
+    def cursor(self, *args, **kwargs):
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn.cursor(*args, **kwargs)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class ConnectionPool:
+    """
+    Pool mit fester Grundgroesse plus Overflow.
+
+    pool_size      -- Anzahl Verbindungen, die warm gehalten werden
+    max_overflow   -- zusaetzliche Verbindungen bei Lastspitzen (werden danach geschlossen)
+    recycle        -- Sekunden, nach denen eine unbenutzte Verbindung ersetzt wird
+    pre_ping       -- Verbindung beim Auschecken per ping() pruefen
+    timeout        -- maximale Wartezeit beim Auschecken in Sekunden
+    """
+
+    def __init__(self, connect, pool_size=5, max_overflow=10, recycle=1800,
+                 pre_ping=True, timeout=10.0):
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._idle = deque()   # (conn, created_at, last_used)
+        self._cond = threading.Condition()
+        self._open = 0         # ausgecheckt + idle
+        self._in_use = 0
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+            "saturated": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "ping_failures": 0,
+            "overflow_checkouts": 0,
+            "peak_in_use": 0,
+        }
+
+    # ---- Auschecken / Zurueckgeben ----
+
+    def connect(self, timeout=None):
+        """Checkt eine Verbindung aus; timeout ueberschreibt self.timeout fuer diesen Aufruf."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.perf_counter()
+        waited = False
+        deadline = started + timeout
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    conn, created_at, last_used = self._idle.pop()
+                    break
+                if self._open < self.pool_size + self.max_overflow:
+                    self._open += 1
+                    conn, created_at, last_used = None, None, None
+                    break
+                if not waited:
+                    waited = True
+                    self._stats["saturated"] += 1
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(
+                        msg=f"Keine DB-Verbindung frei nach {timeout:.1f}s "
+                            f"(pool_size={self.pool_size}, max_overflow={self.max_overflow})"
+                    )
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            if self._in_use > self.pool_size:
+                self._stats["overflow_checkouts"] += 1
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], self._in_use)
+            waited_for = time.perf_counter() - started
+            if waited:
+                self._stats["waits"] += 1
+            self._stats["wait_seconds_total"] += waited_for
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited_for)
+
+        # Netzwerk-Arbeit ausserhalb des Locks
+        try:
+            if conn is not None:
+                conn, created_at = self._validate(conn, created_at, last_used)
+            if conn is None:
+                conn = self._connect()
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats["connections_created"] += 1
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, conn, created_at)
+
+    def _validate(self, conn, created_at, last_used):
+        """Gibt (conn, created_at) zurueck oder (None, None), wenn ersetzt werden muss."""
+        if self.recycle is not None and time.monotonic() - last_used > self.recycle:
+            self._discard(conn)
+            with self._cond:
+                self._stats["connections_recycled"] += 1
+            return None, None
+        if self.pre_ping:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                self._discard(conn)
+                with self._cond:
+                    self._stats["ping_failures"] += 1
+                return None, None
+        return conn, created_at
+
+    def _checkin(self, conn, created_at):
+        keep = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            keep = False
+
+        with self._cond:
+            self._in_use -= 1
+            if keep and len(self._idle) < self.pool_size:
+                self._idle.append((conn, created_at, time.monotonic()))
+                conn = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """Schliesst alle idle Verbindungen (z.B. nach einem Fork)."""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._open -= len(idle)
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    # ---- Kennzahlen ----
+
+    def stats(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                "pool_size": self.pool_size,
+                "max_overflow": self.max_overflow,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "open": self._open,
+                "saturation": self._in_use / float(self.pool_size + self.max_overflow or 1),
+            })
+        checkouts = data["checkouts"] or 1
+        data["wait_seconds_avg"] = data["wait_seconds_total"] / checkouts
+        return data
+
+
+class RoutedConnection:
+    """Verbindung von einem Replica/Primary; close() meldet sie beim Router ab."""
+
+    def __init__(self, backend, conn):
+        self._backend = backend
+        self._conn = conn
+        self._closed = False
+
+    @property
+    def backend_name(self):
+        return self._backend.name
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.close()
+        finally:
+            self._backend.release()
+
+
+class _Backend:
+    """Ein Ziel des Routers (Primary oder Replica) mit eigenem Pool."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = True
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self.outstanding = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self.outstanding += 1
+            self.requests += 1
+
+    def release(self):
+        with self._lock:
+            self.outstanding -= 1
+
+
+def replication_lag(cur):
+    """
+    Sekunden Rueckstand laut SHOW REPLICA STATUS (aeltere Server: SHOW SLAVE STATUS).
+    Gibt (ist_replica, lag) zurueck; lag None heisst: Replikation steht.
+    """
+    try:
+        cur.execute("SHOW REPLICA STATUS;")
+    except mysql.connector.Error:
+        cur.execute("SHOW SLAVE STATUS;")
+    row = cur.fetchone()
+    if not row:
+        return False, None
+    status = dict(zip([d[0] for d in cur.description], row))
+    lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return True, (None if lag is None else float(lag))
+
+
+class ReplicaRouter:
+    """
+    Verteilt lesende Verbindungen auf Replicas; der Primary bekommt nur noch
+    Anfragen, wenn kein Replica gesund ist.
+
+    primary        -- ConnectionPool des Primary
+    replicas       -- Liste (name, ConnectionPool)
+    max_lag        -- maximaler Replikationsrueckstand in Sekunden
+    check_interval -- Sekunden zwischen zwei Health-Checks (im Hintergrund)
+    replica_timeout -- Wartezeit beim Auschecken von einem Replica; ist dessen
+                      Pool voll, geht es sofort zum naechsten Replica bzw. zum
+                      Primary, nur dort wird die volle Pool-Wartezeit abgewartet
+
+    Auswahl: unter den gesunden Replicas das mit den wenigsten offenen
+    Verbindungen (least outstanding requests). Ein Server ohne Replikationsstatus
+    (z.B. eine zweite, separat befuellte Instanz) gilt als gesund ohne Lag.
+    """
+
+    def __init__(self, primary, replicas, max_lag=5.0, check_interval=2.0, replica_timeout=0.05):
+        self.primary = _Backend("primary", primary)
+        self.replicas = [_Backend(name, pool) for name, pool in replicas]
+        # Bis zum ersten Health-Check liest der Primary
+        for backend in self.replicas:
+            backend.healthy, backend.error = False, "noch nicht geprueft"
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.replica_timeout = replica_timeout
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._checking = False
+        self._stats = {"replica_checkouts": 0, "primary_fallbacks": 0, "replica_errors": 0,
+                       "replica_busy": 0}
+
+    # ---- Health-Checks ----
+
+    def check(self, backend):
+        """
+        Prueft ein Replica (Verbindung, Replikationsstatus, Lag). Ist nur der
+        Pool ausgelastet (PoolTimeout), bleibt der bisherige Zustand.
+        """
+        conn = None
+        cur = None
+        try:
+            try:
+                conn = backend.pool.connect(timeout=self.replica_timeout)
+            except PoolTimeout:
+                return backend.healthy
+            cur = conn.cursor()
+            is_replica, lag = replication_lag(cur)
+            if is_replica and lag is None:
+                healthy, error = False, "Replikation steht"
+            elif lag is not None and lag > self.max_lag:
+                healthy, error = False, f"Lag {lag:.0f}s > {self.max_lag:.0f}s"
+            else:
+                healthy, error = True, None
+        except Exception as err:
+            lag, healthy, error = None, False, str(err)
+        finally:
+            if cur is not None:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+            if conn is not None:
+                conn.close()
+        backend.healthy, backend.lag, backend.error = healthy, lag, error
+        backend.checked_at = time.time()
+        return healthy
+
+    def check_all(self):
+        try:
+            for backend in self.replicas:
+                self.check(backend)
+        finally:
+            with self._lock:
+                self._checked_at = time.monotonic()
+                self._checking = False
+
+    def _maybe_check(self):
+        with self._lock:
+            due = time.monotonic() - self._checked_at >= self.check_interval
+            if not due or self._checking:
+                return
+            self._checking = True
+        threading.Thread(target=self.check_all, daemon=True).start()
+
+    # ---- Routing ----
+
+    def connect(self):
+        self._maybe_check()
+        candidates = sorted(
+            (b for b in self.replicas if b.healthy),
+            key=lambda b: b.outstanding,
+        )
+        for backend in candidates:
+            backend.acquire()
+            try:
+                conn = backend.pool.connect(timeout=self.replica_timeout)
+            except PoolTimeout:
+                # Ausgelastet, aber gesund: naechstes Replica bzw. Primary
+                backend.release()
+                with self._lock:
+                    self._stats["replica_busy"] += 1
+                continue
+            except Exception as err:
+                backend.release()
+                backend.healthy, backend.error = False, str(err)
+                with self._lock:
+                    self._stats["replica_errors"] += 1
+                continue
+            with self._lock:
+                self._stats["replica_checkouts"] += 1
+            return RoutedConnection(backend, conn)
+
+        with self._lock:
+            self._stats["primary_fallbacks"] += 1
+        self.primary.acquire()
+        try:
+            conn = self.primary.pool.connect()
+        except Exception:
+            self.primary.release()
+            raise
+        return RoutedConnection(self.primary, conn)
+
+    def dispose(self):
+        for backend in [self.primary] + self.replicas:
+            backend.pool.dispose()
+
+    # ---- Kennzahlen ----
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+        data["max_lag"] = self.max_lag
+        data["backends"] = [
+            {
+                "name": b.name,
+                "healthy": b.healthy,
+                "lag": b.lag,
+                "error": b.error,
+                "checked_at": b.checked_at,
+                "outstanding": b.outstanding,
+                "requests": b.requests,
+                "pool": b.pool.stats(),
+            }
+            for b in [self.primary] + self.replicas
+        ]
+        return data
@@ -0,0 +1,317 @@
+"""
+Sequenz-Features fuer den Import (aktuell: theoretischer pI).
+
+- compute_pi_biopython: Referenz ueber Bio.SeqUtils.ProtParam (eine Sequenz)
+- compute_pi_batch:     NumPy-Loeser fuer viele Sequenzen auf einmal. Er arbeitet
+                        auf Aminosaeure-Zaehlvektoren und fuehrt dieselbe Bisektion
+                        wie Biopython (Bjellqvist-pK-Werte) fuer alle Sequenzen
+                        gleichzeitig aus.
+- compute_pis:          paralleler Stage mit Prozess-Pool und Chunking
+- sequence_checksum:    Inhalts-Hash einer Sequenz (Delta-Import, Cache-Schluessel)
+- FeatureCache:         persistenter, inhaltsadressierter Cache (SQLite, LRU)
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# pK-Werte wie in Bio.SeqUtils.IsoelectricPoint (Reihenfolge = Summationsreihenfolge)
+POSITIVE_PKS = [("Nterm", 7.5), ("K", 10.0), ("R", 12.0), ("H", 5.98)]
+NEGATIVE_PKS = [("Cterm", 3.55), ("D", 4.05), ("E", 4.45), ("C", 9.0), ("Y", 10.0)]
+PK_NTERMINAL = {"A": 7.59, "M": 7.0, "S": 6.93, "P": 8.36, "T": 6.82, "V": 7.44, "E": 7.7}
+PK_CTERMINAL = {"D": 4.55, "E": 4.75}
+
+PI_MIN, PI_MAX, PI_START, PI_TOL = 4.05, 12.0, 7.775, 0.0001
+MIN_SEQUENCE_LENGTH = 5
+
+# Unter so vielen Sequenzen kostet der Prozess-Pool (Pickling, IPC) mehr, als er
+# spart; kleinere Chunks als MIN_CHUNK_SIZE lohnen sich ebenfalls nicht
+MIN_POOL_SEQUENCES = 200
+MIN_CHUNK_SIZE = 50
+
+
+def clean_sequence(sequence):
+    if not sequence:
+        return ""
+    return sequence.replace(" ", "").replace("\n", "")
+
+
+def sequence_checksum(sequence):
+    """SHA-1 der bereinigten Sequenz (Grossbuchstaben) als Hex-String."""
+    return hashlib.sha1(clean_sequence(sequence).upper().encode("ascii", "replace")).hexdigest()
+
+
+def compute_pi_biopython(sequence):
+    """Referenzimplementierung (wie bisher compute_pi in import_data.py)."""
+    from Bio.SeqUtils.ProtParam import ProteinAnalysis
+
+    try:
+        seq = clean_sequence(sequence)
+        if len(seq) < MIN_SEQUENCE_LENGTH:
+            return None
+        return float(ProteinAnalysis(seq).isoelectric_point())
+    except Exception:
+        return None
+
+
+def _terminal_table(default, overrides):
+    table = np.full(256, default, dtype=float)
+    for aa, pk in overrides.items():
+        table[ord(aa)] = pk
+    return table
+
+
+_NTERM_TABLE = _terminal_table(POSITIVE_PKS[0][1], PK_NTERMINAL)
+_CTERM_TABLE = _terminal_table(NEGATIVE_PKS[0][1], PK_CTERMINAL)
+
+
+def count_matrix(sequences):
+    """
+    Zaehlt alle Bytes aller Sequenzen in einem Schritt: Ergebnis ist eine
+    (n, 256)-Matrix, Zeile i = Zaehlvektor der Sequenz i.
+    """
+    encoded = [s.encode("ascii", "replace") for s in sequences]
+    lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+    if not len(encoded) or not lengths.sum():
+        return np.zeros((len(encoded), 256), dtype=np.int64), lengths
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.int64)
+    row = np.repeat(np.arange(len(encoded), dtype=np.int64), lengths)
+    counts = np.bincount(row * 256 + data, minlength=len(encoded) * 256)
+    return counts.reshape(len(encoded), 256), lengths
+
+
+def compute_pi_batch(sequences):
+    """
+    pI fuer eine Liste von Sequenzen; Eintraege mit weniger als
+    MIN_SEQUENCE_LENGTH Resten ergeben None.
+    """
+    # Biopython (ProteinAnalysis) arbeitet auf der Sequenz in Grossbuchstaben
+    seqs = [clean_sequence(s).upper() for s in sequences]
+    n = len(seqs)
+    if not n:
+        return []
+    counts, lengths = count_matrix(seqs)
+    valid = lengths >= MIN_SEQUENCE_LENGTH
+
+    first = np.array([ord(s[0]) if s else 0 for s in seqs]) % 256
+    last = np.array([ord(s[-1]) if s else 0 for s in seqs]) % 256
+
+    pos = [(np.ones(n), _NTERM_TABLE[first])]
+    pos += [(counts[:, ord(aa)].astype(float), np.full(n, pk)) for aa, pk in POSITIVE_PKS[1:]]
+    neg = [(np.ones(n), _CTERM_TABLE[last])]
+    neg += [(counts[:, ord(aa)].astype(float), np.full(n, pk)) for aa, pk in NEGATIVE_PKS[1:]]
+
+    lo = np.full(n, PI_MIN)
+    hi = np.full(n, PI_MAX)
+    ph = np.full(n, PI_START)
+    # Alle Intervalle halbieren sich gleich schnell -> feste Anzahl Schritte
+    while hi[0] - lo[0] > PI_TOL:
+        positive = np.zeros(n)
+        for cnt, pk in pos:
+            positive += cnt * (1.0 / (10 ** (ph - pk) + 1.0))
+        negative = np.zeros(n)
+        for cnt, pk in neg:
+            negative += cnt * (1.0 / (10 ** (pk - ph) + 1.0))
+        up = (positive - negative) > 0.0
+        lo = np.where(up, ph, lo)
+        hi = np.where(up, hi, ph)
+        ph = (lo + hi) / 2
+
+    return [float(v) if ok else None for v, ok in zip(ph.tolist(), valid.tolist())]
+
+
+def _pi_chunk(args):
+    solver, chunk = args
+    if solver == "numpy":
+        return compute_pi_batch(chunk)
+    return [compute_pi_biopython(s) for s in chunk]
+
+
+def make_executor(workers=None):
+    """Prozess-Pool fuer compute_pis (None, wenn nur ein Worker gewuenscht ist)."""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def compute_pis(sequences, solver="numpy", workers=None, chunk_size=500, executor=None):
+    """
+    Berechnet pI fuer alle Sequenzen, verteilt in Chunks auf einen Prozess-Pool.
+    Ein vorhandener executor wird wiederverwendet (workers = dessen Groesse);
+    workers=1 rechnet im aktuellen Prozess. chunk_size ist eine Obergrenze: mit
+    Pool wird so geteilt, dass jeder Worker mindestens einen Chunk bekommt.
+    Kleine Mengen (< MIN_POOL_SEQUENCES) laufen ohne Pool.
+    """
+    sequences = list(sequences)
+    workers = workers or os.cpu_count() or 1
+    pooled = workers > 1 and len(sequences) >= MIN_POOL_SEQUENCES
+    if pooled:
+        per_worker = -(-len(sequences) // workers)
+        chunk_size = max(MIN_CHUNK_SIZE, min(chunk_size, per_worker))
+    chunks = [sequences[i:i + chunk_size] for i in range(0, len(sequences), chunk_size)]
+    if pooled and executor is not None and len(chunks) > 1:
+        results = list(executor.map(_pi_chunk, [(solver, c) for c in chunks]))
+    elif pooled and len(chunks) > 1:
+        with make_executor(min(workers, len(chunks))) as pool:
+            results = list(pool.map(_pi_chunk, [(solver, c) for c in chunks]))
+    else:
+        results = [_pi_chunk((solver, c)) for c in chunks]
+    return [pi for chunk in results for pi in chunk]
+
+
+def validate_pi_solver(sequences, tol=1e-3):
+    """
+    Vergleicht den NumPy-Loeser mit Biopython. Gibt (max. Abweichung,
+    Anzahl Abweichungen > tol) zurueck.
+    """
+    fast = compute_pi_batch(sequences)
+    max_diff = 0.0
+    mismatches = 0
+    for seq, a in zip(sequences, fast):
+        b = compute_pi_biopython(seq)
+        if a is None or b is None:
+            if a is not b:
+                mismatches += 1
+            continue
+        diff = abs(a - b)
+        max_diff = max(max_diff, diff)
+        if diff > tol:
+            mismatches += 1
+    return max_diff, mismatches
+
+
+# Spalten im Feature-Cache; bisher wird nur pI berechnet, die uebrigen sind fuer
+# weitere ProtParam-Werte vorgesehen und bleiben bis dahin NULL.
+FEATURE_FIELDS = ["pI", "mw_kda", "extinction_coefficient", "gravy", "instability_index"]
+
+
+class FeatureCache:
+    """
+    Auf der Platte liegender Cache fuer Sequenz-Features, Schluessel = sequence_checksum.
+    Haelt hoechstens max_entries Eintraege; verdraengt wird nach letzter Nutzung (LRU).
+    Thread-sicher innerhalb eines Prozesses. Ist die Datei gesperrt (mehrere
+    Prozesse, "database is locked"), wird der Cache fuer diesen Aufruf
+    uebersprungen: get_many meldet Fehlschlaege, put_many schreibt nichts.
+    """
+
+    def __init__(self, path, max_entries=1_000_000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS features (
+                checksum TEXT PRIMARY KEY,
+                {", ".join(f"{f} REAL" for f in FEATURE_FIELDS)},
+                last_used REAL NOT NULL
+            );
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_features_last_used ON features (last_used);")
+
+    def get_many(self, checksums):
+        """Liefert {checksum: {feld: wert}} fuer alle vorhandenen Eintraege."""
+        checksums = list(dict.fromkeys(checksums))
+        found = {}
+        now = time.time()
+        with self._lock:
+            try:
+                for start in range(0, len(checksums), 500):
+                    part = checksums[start:start + 500]
+                    marks = ", ".join(["?"] * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT checksum, {', '.join(FEATURE_FIELDS)} FROM features "
+                        f"WHERE checksum IN ({marks});",
+                        part,
+                    ).fetchall()
+                    for row in rows:
+                        found[row[0]] = dict(zip(FEATURE_FIELDS, row[1:]))
+                    if rows:
+                        self._conn.execute(
+                            f"UPDATE features SET last_used = ? WHERE checksum IN ({marks});",
+                            [now] + part,
+                        )
+            except sqlite3.OperationalError as err:
+                self.errors += 1
+                logging.getLogger(__name__).warning("Feature-Cache nicht lesbar: %s", err)
+            self.hits += len(found)
+            self.misses += len(checksums) - len(found)
+        return found
+
+    def put_many(self, items):
+        """items: {checksum: {feld: wert}}; verdraengt danach ggf. alte Eintraege."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (checksum,) + tuple(values.get(f) for f in FEATURE_FIELDS) + (now,)
+            for checksum, values in items.items()
+        ]
+        cols = ["checksum"] + FEATURE_FIELDS + ["last_used"]
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN;")
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO features ({', '.join(cols)}) "
+                    f"VALUES ({', '.join(['?'] * len(cols))});",
+                    rows,
+                )
+                self._evict()
+                self._conn.execute("COMMIT;")
+            except sqlite3.OperationalError as err:
+                self.errors += 1
+                logging.getLogger(__name__).warning("Feature-Cache nicht beschreibbar: %s", err)
+                if self._conn.in_transaction:
+                    self._conn.rollback()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM features;").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM features WHERE checksum IN "
+                "(SELECT checksum FROM features ORDER BY last_used LIMIT ?);",
+                (excess,),
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM features;").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cached_pis(sequences, cache, compute=compute_pi_batch):
+    """
+    pI fuer alle Sequenzen; zuerst im Cache nachsehen, nur Fehlende berechnen
+    (compute bekommt die Liste der fehlenden Sequenzen) und zurueckschreiben.
+    """
+    checksums = [sequence_checksum(s) for s in sequences]
+    found = cache.get_many(checksums) if cache is not None else {}
+
+    missing = {}
+    for checksum, seq in zip(checksums, sequences):
+        if checksum not in found and checksum not in missing:
+            missing[checksum] = seq
+    if missing:
+        computed = compute(list(missing.values()))
+        fresh = {c: {"pI": pi} for c, pi in zip(missing, computed)}
+        if cache is not None:
+            cache.put_many(fresh)
+        found.update(fresh)
+
+    return [found[c]["pI"] for c in checksums]
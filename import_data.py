@@ -1,7 +1,24 @@
-﻿import mysql.connector
+﻿import gzip
+import json
+import os
+import tempfile
+import time
+from itertools import islice
+
+import mysql.connector
 from mysql.connector import errorcode
 import requests
-from Bio.SeqUtils.ProtParam import ProteinAnalysis
+
+from catalog_stats import compute_stats
+from features import (
+    FeatureCache, cached_pis, compute_pi_biopython, compute_pis, make_executor,
+    sequence_checksum, validate_pi_solver,
+)
+from metrics import Registry, StageTimer, TimedConnection
+from migrations import QueryPlanError, check_query_plans, run_migrations
+from recommendation import DEFAULT_COLUMN_URLS, DEFAULT_RULES, RULE_FIELDS, load_rule_engine
+from slowlog import SlowQueryLog
+from snapshot import export_snapshot
 
 # ============================================
 # MySQL-Konfiguration
@@ -24,6 +41,50 @@ MAX_RESULTS = 450
 
 UNIPROT_BASE_URL = "https://rest.uniprot.org/uniprotkb/search"
 
+# Streaming-Import: Seiten ueber den Link-Header (rel="next") folgen, statt alles
+# in einer Antwort zu holen. MAX_RESULTS = None holt dann das komplette Ergebnis.
+STREAMING_INGEST = True
+UNIPROT_PAGE_SIZE = 500       # Obergrenze der UniProt-REST-API pro Seite
+INSERT_BATCH_SIZE = 1000      # Proteine pro Feature-/Insert-Batch
+
+# Schreibpfad: "single", "multirow" oder "load_data" (siehe insert_proteins)
+WRITE_MODE = "multirow"
+UPSERT_BATCH_SIZE = 500       # Zeilen pro mehrzeiligem INSERT
+COMMIT_INTERVAL = 5000        # Zeilen pro Transaktion
+
+# Delta-Import: nur neue/geaenderte Eintraege schreiben (Eintragsversion + Sequenz-Checksumme).
+# DELETE_MISSING entfernt Eintraege, die upstream verschwunden sind; das passiert nur,
+# wenn das komplette Ergebnis geholt wurde (MAX_RESULTS = None).
+INCREMENTAL_IMPORT = True
+DELETE_MISSING = False
+
+UNIPROT_FIELDS = [
+    "accession",
+    "version",
+    "protein_name",
+    "gene_names",
+    "organism_name",
+    "length",
+    "mass",
+    "sequence"
+]
+
+# pI-Berechnung: "numpy" (Batch-Loeser) oder "biopython" (ProtParam je Sequenz)
+PI_SOLVER = "numpy"
+PI_WORKERS = None         # None = Anzahl CPUs, 1 = ohne Prozess-Pool
+PI_CHUNK_SIZE = 500       # Obergrenze; compute_pis teilt einen Batch auf alle Worker auf
+PI_VALIDATE_SAMPLE = 50   # so viele Sequenzen vorab gegen Biopython pruefen
+
+# Persistenter Feature-Cache (SQLite, Schluessel = Sequenz-Hash); None schaltet ihn ab
+FEATURE_CACHE_PATH = os.environ.get(
+    "FEATURE_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache.sqlite")
+)
+FEATURE_CACHE_MAX_ENTRIES = 1_000_000
+
+# Bin-Grenzen fuer die Histogramme auf der Startseite (pI bzw. MW in kDa)
+PI_BIN_EDGES = [6.0, 8.0]
+MW_BIN_EDGES = [50.0, 100.0]
+
 # Beispiel-Strukturen (UniProt -> PDB). image_url kann auf /static/img/... zeigen.
 STRUCTURE_SEED = [
     ("P00533", "2GS6", "EGFR kinase domain", "X-RAY DIFFRACTION", 2.80, "/static/img/2gs6.png"),
@@ -31,6 +92,26 @@ STRUCTURE_SEED = [
     ("P04637", "6HAP", "TP53 core domain", "X-RAY DIFFRACTION", 1.70, "/static/img/6hap.png"),
 ]
 
+# UniProt -> PDB-Mapping als TSV (SIFTS, z. B. pdb_chain_uniprot.tsv[.gz]); None = nur STRUCTURE_SEED
+STRUCTURE_MAPPING_FILE = None
+STRUCTURE_BATCH_SIZE = 5000
+
+# Laufzeiten der Import-Phasen; optional als Prometheus-Textdatei (z. B. fuer den
+# Textfile-Collector des node_exporter), None = nur Konsolenausgabe
+IMPORT_METRICS_FILE = os.environ.get("IMPORT_METRICS_FILE")
+STAGES = StageTimer()
+
+# Langsame Statements mit Parametern und EXPLAIN-Plan melden (Sekunden, None = aus).
+# SLOW_QUERY_EXPLAIN: "explain", "analyze" (fuehrt SELECTs erneut aus) oder "off"
+SLOW_QUERY_THRESHOLD = None
+SLOW_QUERY_EXPLAIN = "explain"
+SLOW_QUERY_BUFFER = 100
+_slow_query_log = None
+
+# SQLite-Snapshot fuer den Snapshot-Modus der App (SNAPSHOT_PATH dort); None = kein Export.
+# Die Datei wird erst fertig geschrieben und dann atomar ersetzt (= veroeffentlicht).
+SNAPSHOT_EXPORT_PATH = os.environ.get("SNAPSHOT_EXPORT_PATH")
+
 
 # ============================================
 # UniProt-Funktionen
@@ -44,48 +125,156 @@ def fetch_uniprot_proteins(query, max_results=200):
     params = {
         "query": query,
         "format": "tsv",
-        "fields": ",".join([
-            "accession",
-            "protein_name",
-            "gene_names",
-            "organism_name",
-            "length",
-            "mass",
-            "sequence"
-        ]),
+        "fields": ",".join(UNIPROT_FIELDS),
         "size": max_results
     }
 
     print("Frage UniProt-API ab...")
-    resp = requests.get(UNIPROT_BASE_URL, params=params)
-    resp.raise_for_status()
+    with STAGES.stage("fetch"):
+        resp = requests.get(UNIPROT_BASE_URL, params=params)
+        resp.raise_for_status()
+        text = resp.text
 
-    lines = resp.text.strip().split("\n")
-    header = lines[0].split("\t")
-    data = []
+    with STAGES.stage("parse"):
+        lines = text.strip().split("\n")
+        header = lines[0].split("\t")
+        data = []
 
-    for line in lines[1:]:
-        cols = line.split("\t")
-        entry = dict(zip(header, cols))
-        data.append(entry)
+        for line in lines[1:]:
+            cols = line.split("\t")
+            entry = dict(zip(header, cols))
+            data.append(entry)
 
     print(f"{len(data)} Proteine von UniProt geholt.")
     return data
 
 
+def iter_uniprot_proteins(query, max_results=None, page_size=UNIPROT_PAGE_SIZE,
+                          base_url=UNIPROT_BASE_URL, session=None):
+    """
+    Generator ueber UniProt-Eintraege (Dictionaries wie fetch_uniprot_proteins).
+    Folgt der Cursor-Pagination der REST-API (Link: <...>; rel="next") und
+    parst jede Seite zeilenweise aus dem Response-Stream, sodass nie mehr als
+    eine Zeile im Speicher liegt.
+    """
+    params = {
+        "query": query,
+        "format": "tsv",
+        "fields": ",".join(UNIPROT_FIELDS),
+        "size": min(page_size, max_results) if max_results else page_size,
+    }
+    session = session or requests.Session()
+    url = base_url
+    fetched = 0
+    page = 0
+
+    print("Frage UniProt-API seitenweise ab...")
+    while url:
+        started = time.perf_counter()
+        with session.get(url, params=params, stream=True, timeout=60) as resp:
+            STAGES.add("fetch", time.perf_counter() - started)
+            resp.raise_for_status()
+            if resp.encoding is None:
+                resp.encoding = "utf-8"
+            page += 1
+            header = None
+            # Wartezeit auf den Stream zaehlt als fetch, Zerlegen der Zeilen als parse
+            parse_seconds = 0.0
+            try:
+                for line in STAGES.timed_iter("fetch", resp.iter_lines(decode_unicode=True)):
+                    if not line:
+                        continue
+                    started = time.perf_counter()
+                    if header is None:
+                        header = line.split("\t")
+                        parse_seconds += time.perf_counter() - started
+                        continue
+                    entry = dict(zip(header, line.split("\t")))
+                    parse_seconds += time.perf_counter() - started
+                    yield entry
+                    fetched += 1
+                    if max_results and fetched >= max_results:
+                        print(f"{fetched} Proteine von UniProt geholt ({page} Seiten).")
+                        return
+            finally:
+                STAGES.add("parse", parse_seconds)
+            url = resp.links.get("next", {}).get("url")
+        # Die next-URL enthaelt Query und Cursor bereits
+        params = None
+
+    print(f"{fetched} Proteine von UniProt geholt ({page} Seiten).")
+
+
+def iter_batches(iterable, size):
+    """Teilt einen (evtl. unendlichen) Iterator in Listen der Laenge size."""
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
 def compute_pi(sequence):
     """
     Berechnet den theoretischen isoelektrischen Punkt (pI)
     aus der Aminosaeuresequenz. Gibt None zurueck, wenn
     die Sequenz ungeeignet ist.
     """
+    return compute_pi_biopython(sequence)
+
+
+def choose_pi_solver(sequences, solver=PI_SOLVER):
+    """
+    Prueft den NumPy-Loeser an einer Stichprobe gegen Biopython und gibt den
+    zu benutzenden Loeser zurueck ("biopython" bei Abweichungen).
+    """
+    if solver == "numpy" and PI_VALIDATE_SAMPLE:
+        max_diff, mismatches = validate_pi_solver(list(sequences)[:PI_VALIDATE_SAMPLE])
+        if mismatches:
+            print(f"NumPy-pI weicht von Biopython ab (max. {max_diff:.4f}), nutze Biopython.")
+            return "biopython"
+    return solver
+
+
+def compute_features(proteins, solver=PI_SOLVER, workers=PI_WORKERS, chunk_size=PI_CHUNK_SIZE,
+                     executor=None, validate=True, cache=None):
+    """
+    Berechnet pI fuer alle Proteine vorab (parallel, in Chunks) und
+    gibt die Werte in derselben Reihenfolge zurueck. Mit cache werden bereits
+    bekannte Sequenzen nicht neu berechnet. Mit validate wird der Loeser vorher
+    per choose_pi_solver geprueft; wer in Batches rechnet, waehlt ihn einmal
+    selbst und uebergibt ihn mit validate=False.
+    """
+    sequences = [p.get("Sequence") or "" for p in proteins]
+
+    if validate:
+        solver = choose_pi_solver(sequences, solver)
+
+    def compute(missing):
+        return compute_pis(missing, solver=solver, workers=workers, chunk_size=chunk_size,
+                           executor=executor)
+
+    started = time.perf_counter()
+    hits_before = cache.hits if cache is not None else 0
+    pis = cached_pis(sequences, cache, compute=compute)
+    elapsed = time.perf_counter() - started
+    STAGES.add("compute_pi", elapsed)
+    from_cache = (cache.hits - hits_before) if cache is not None else 0
+    print(f"pI fuer {len(pis)} Sequenzen ermittelt ({solver}, {from_cache} aus Cache, {elapsed:.2f}s).")
+    return pis
+
+
+def open_feature_cache():
+    """
+    Oeffnet den Feature-Cache (oder None, wenn abgeschaltet/nicht verfuegbar).
+    """
+    if not FEATURE_CACHE_PATH:
+        return None
     try:
-        seq = sequence.replace(" ", "").replace("\n", "")
-        if len(seq) < 5:
-            return None
-        analysis = ProteinAnalysis(seq)
-        return float(analysis.isoelectric_point())
-    except Exception:
+        return FeatureCache(FEATURE_CACHE_PATH, max_entries=FEATURE_CACHE_MAX_ENTRIES)
+    except Exception as err:
+        print("Feature-Cache nicht verfuegbar:", err)
         return None
 
 
@@ -105,7 +294,28 @@ def get_mysql_connection(with_database=False):
     }
     if with_database:
         config["database"] = MYSQL_DB_NAME
-    return mysql.connector.connect(**config)
+    if WRITE_MODE == "load_data":
+        config["allow_local_infile"] = True
+    conn = mysql.connector.connect(**config)
+    slow_log = get_slow_query_log()
+    if slow_log is not None:
+        return TimedConnection(conn, slow_log)
+    return conn
+
+
+def get_slow_query_log():
+    """SlowQueryLog fuer alle Import-Verbindungen (None, wenn abgeschaltet)."""
+    global _slow_query_log
+    if SLOW_QUERY_THRESHOLD is None:
+        return None
+    if _slow_query_log is None:
+        _slow_query_log = SlowQueryLog(
+            threshold=SLOW_QUERY_THRESHOLD,
+            max_entries=SLOW_QUERY_BUFFER,
+            explain=SLOW_QUERY_EXPLAIN,
+            log=print,
+        )
+    return _slow_query_log
 
 
 def ensure_database_exists():
@@ -131,70 +341,68 @@ def ensure_database_exists():
 
 def init_db():
     """
-    Oeffnet eine Verbindung zur existierenden Datenbank und legt Tabellen an.
+    Oeffnet eine Verbindung zur existierenden Datenbank und bringt das Schema
+    per Migrationen (migrations.py) auf den aktuellen Stand.
     """
     conn = get_mysql_connection(with_database=True)
-    cur = conn.cursor()
+    run_migrations(conn)
+    return conn
 
-    # Protein-Tabelle
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS protein (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        uniprot_id VARCHAR(20),
-        name TEXT NOT NULL,
-        gene_name VARCHAR(255),
-        organism VARCHAR(255),
-        length INT,
-        mw_kda DOUBLE,
-        pI DOUBLE,
-        tag VARCHAR(50),
-        description TEXT
-        ) ENGINE=InnoDB;
 
-        """
-    )
-
-    # Struktur-Tabelle (optional fuer PDB/Model-Infos)
+def bump_data_version(conn):
+    """
+    Zaehlt die Datenversion hoch (eine Zeile mit id = 1).
+    """
+    cur = conn.cursor()
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS structure (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            protein_id INT NOT NULL,
-            pdb_id VARCHAR(10),
-            title VARCHAR(500),
-            method VARCHAR(100),
-            resolution_angstrom DECIMAL(4,2),
-            image_url VARCHAR(500),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE (pdb_id),
-            CONSTRAINT fk_structure_protein
-                FOREIGN KEY (protein_id)
-                REFERENCES protein(id)
-                ON UPDATE CASCADE
-                ON DELETE CASCADE
-        ) ENGINE=InnoDB;
+        INSERT INTO catalog_version (id, version) VALUES (1, 1)
+        ON DUPLICATE KEY UPDATE version = version + 1;
         """
     )
+    conn.commit()
+    cur.execute("SELECT version FROM catalog_version WHERE id = 1;")
+    version = cur.fetchone()[0]
+    cur.close()
+    print(f"Datenversion ist jetzt {version}.")
+    return version
+
 
-    # Chromatographie-Saeulen-Tabelle
+def refresh_catalog_stats(conn, version, pi_edges=PI_BIN_EDGES, mw_edges=MW_BIN_EDGES):
+    """
+    Berechnet Anzahl und pI/MW-Histogramme einmalig beim Import und
+    speichert sie als Snapshot zur angegebenen Datenversion.
+    """
+    cur = conn.cursor()
+    stats = compute_stats(cur, pi_edges, mw_edges)
     cur.execute(
         """
-        CREATE TABLE IF NOT EXISTS chromatography_column (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            name VARCHAR(150) NOT NULL,
-            type VARCHAR(50),
-            resin VARCHAR(100),
-            ph_min DOUBLE,
-            ph_max DOUBLE,
-            description TEXT
-        ) ENGINE=InnoDB;
-        """
+        INSERT INTO catalog_stats
+        (version, protein_count, pi_edges, pi_counts, mw_edges, mw_counts)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            protein_count = VALUES(protein_count),
+            pi_edges = VALUES(pi_edges),
+            pi_counts = VALUES(pi_counts),
+            mw_edges = VALUES(mw_edges),
+            mw_counts = VALUES(mw_counts),
+            computed_at = CURRENT_TIMESTAMP;
+        """,
+        (
+            version,
+            stats["protein_count"],
+            json.dumps(stats["pi_edges"]),
+            json.dumps(stats["pi_counts"]),
+            json.dumps(stats["mw_edges"]),
+            json.dumps(stats["mw_counts"]),
+        ),
     )
-
+    # Nur die letzten Snapshots aufheben
+    cur.execute("DELETE FROM catalog_stats WHERE version < %s;", (version - 10,))
     conn.commit()
     cur.close()
-    return conn
+    print(f"Statistik fuer Datenversion {version} gespeichert ({stats['protein_count']} Proteine).")
+    return stats
 
 
 # ============================================
@@ -211,6 +419,13 @@ def insert_default_columns(conn):
     count = cur.fetchone()[0]
     if count > 0:
         print("Chromatographie-Saeulen bereits vorhanden, ueberspringe Insert.")
+        # Produkt-Links fuer Bestandsdaten nachtragen
+        for name, url in DEFAULT_COLUMN_URLS.items():
+            cur.execute(
+                "UPDATE chromatography_column SET url = %s WHERE name = %s AND url IS NULL;",
+                (url, name),
+            )
+        conn.commit()
         cur.close()
         return
 
@@ -237,108 +452,530 @@ def insert_default_columns(conn):
     cur.executemany(
         """
         INSERT INTO chromatography_column
-        (name, type, resin, ph_min, ph_max, description)
-        VALUES (%s, %s, %s, %s, %s, %s);
+        (name, type, resin, ph_min, ph_max, description, url)
+        VALUES (%s, %s, %s, %s, %s, %s, %s);
         """,
-        columns
+        [c + (DEFAULT_COLUMN_URLS.get(c[0]),) for c in columns]
     )
     conn.commit()
     cur.close()
     print("Chromatographie-Saeulen eingefuegt.")
 
 
-def insert_proteins(conn, proteins):
+def insert_default_rules(conn):
+    """
+    Fuegt die Standardregeln fuer die Saeulenempfehlung ein,
+    falls die Tabelle noch leer ist.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM recommendation_rule;")
+    if cur.fetchone()[0] > 0:
+        print("Empfehlungsregeln bereits vorhanden, ueberspringe Insert.")
+        cur.close()
+        return
+
+    cur.executemany(
+        f"""
+        INSERT INTO recommendation_rule ({", ".join(RULE_FIELDS)})
+        VALUES ({", ".join(["%s"] * len(RULE_FIELDS))});
+        """,
+        DEFAULT_RULES
+    )
+    conn.commit()
+    cur.close()
+    print(f"{len(DEFAULT_RULES)} Empfehlungsregeln eingefuegt.")
+
+
+PROTEIN_COLUMNS = [
+    "uniprot_id", "name", "gene_name", "organism", "length", "mw_kda", "pI", "tag", "description",
+    "entry_version", "seq_checksum",
+]
+
+PROTEIN_UPSERT_UPDATE = """
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name),
+        gene_name = VALUES(gene_name),
+        organism = VALUES(organism),
+        length = VALUES(length),
+        mw_kda = VALUES(mw_kda),
+        pI = VALUES(pI),
+        tag = VALUES(tag),
+        description = VALUES(description),
+        entry_version = VALUES(entry_version),
+        seq_checksum = VALUES(seq_checksum)
+"""
+
+
+def protein_row(p, pI_val):
+    """
+    Wandelt einen UniProt-Eintrag in ein Tupel in der Reihenfolge von PROTEIN_COLUMNS.
+    """
+    length = p.get("Length")
+    mass = p.get("Mass")
+
+    try:
+        length_int = int(length) if length is not None else None
+    except ValueError:
+        length_int = None
+
+    try:
+        entry_version = int(p["Entry version"]) if p.get("Entry version") else None
+    except ValueError:
+        entry_version = None
+
+    try:
+        mw_kda = float(mass) / 1000.0 if mass is not None else None
+    except ValueError:
+        mw_kda = None
+
+    return (
+        p.get("Entry"),
+        p.get("Protein names"),
+        p.get("Gene Names"),
+        p.get("Organism"),
+        length_int,
+        mw_kda,
+        pI_val,
+        "none",   # Standard: kein Tag
+        None,     # description kannst du spaeter ergaenzen
+        entry_version,
+        p.get("_checksum") or sequence_checksum(p.get("Sequence")),
+    )
+
+
+# Platzhalter fuer "pI muss neu berechnet werden" (None ist ein gueltiger pI-Wert)
+MISSING = object()
+
+
+def load_protein_state(conn):
+    """
+    Bisheriger Stand je Accession: (entry_version, seq_checksum, pI).
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT uniprot_id, entry_version, seq_checksum, pI FROM protein;")
+    state = {row[0]: row[1:] for row in cur.fetchall()}
+    cur.close()
+    return state
+
+
+def plan_protein_batch(batch, existing, summary):
+    """
+    Delta-Abgleich eines Batches gegen den bisherigen Stand.
+    Gibt (zu schreibende Eintraege, bekannte pI-Werte) zurueck; ein bekannter
+    pI ist MISSING, wenn er neu berechnet werden muss.
+    """
+    todo = []
+    known = []
+    for p in batch:
+        checksum = sequence_checksum(p.get("Sequence"))
+        p["_checksum"] = checksum
+        try:
+            version = int(p["Entry version"]) if p.get("Entry version") else None
+        except ValueError:
+            version = None
+
+        old = existing.get(p.get("Entry"))
+        if old is None:
+            summary["new"] += 1
+            todo.append(p)
+            known.append(MISSING)
+        elif old[0] == version and old[1] == checksum and version is not None:
+            summary["unchanged"] += 1
+        else:
+            summary["updated"] += 1
+            todo.append(p)
+            known.append(old[2] if old[1] == checksum else MISSING)
+    return todo, known
+
+
+def delete_missing_proteins(conn, existing, seen, chunk=1000):
+    """
+    Loescht Proteine, die upstream nicht mehr vorkommen (Strukturen per FK-Cascade).
+    """
+    gone = [acc for acc in existing if acc not in seen]
+    cur = conn.cursor()
+    for start in range(0, len(gone), chunk):
+        part = gone[start:start + chunk]
+        cur.execute(
+            f"DELETE FROM protein WHERE uniprot_id IN ({', '.join(['%s'] * len(part))});",
+            tuple(part),
+        )
+    conn.commit()
+    cur.close()
+    return len(gone)
+
+
+def insert_proteins(conn, proteins, batch_size=INSERT_BATCH_SIZE, write_mode=WRITE_MODE,
+                    upsert_batch_size=UPSERT_BATCH_SIZE, commit_interval=COMMIT_INTERVAL,
+                    incremental=INCREMENTAL_IMPORT, delete_missing=False):
     """
     Schreibt UniProt-Proteine in die MySQL-Datenbank.
     Tag setzen wir vorerst auf 'none'.
+    proteins darf ein Generator sein (Streaming-Import); verarbeitet wird in
+    Batches, damit der Speicherbedarf unabhaengig von der Gesamtzahl bleibt.
+
+    write_mode:
+      "single"    -- ein INSERT ... ON DUPLICATE KEY UPDATE pro Protein
+      "multirow"  -- mehrzeilige Upserts mit upsert_batch_size Zeilen pro Statement
+      "load_data" -- LOAD DATA LOCAL INFILE in eine temporaere Tabelle, am Ende ein Merge
+    Committet wird alle commit_interval Zeilen.
+
+    Mit incremental=True werden nur neue und geaenderte Eintraege geschrieben und
+    pI nur fuer geaenderte Sequenzen neu berechnet. Gibt eine Zusammenfassung zurueck.
     """
+    summary = {"new": 0, "updated": 0, "unchanged": 0, "deleted": 0,
+               "pi_computed": 0, "pi_reused": 0}
+    existing = load_protein_state(conn) if incremental else None
+    seen = set()
+
     cur = conn.cursor()
 
-    print("Fuege Proteine in die Datenbank ein...")
+    print(f"Fuege Proteine in die Datenbank ein (Modus: {write_mode}"
+          f"{', inkrementell' if incremental else ''})...")
     inserted = 0
+    uncommitted = 0
+    solver = None  # wird beim ersten Batch mit neuen Sequenzen gewaehlt und beibehalten
+    started = time.perf_counter()
 
-    for p in proteins:
-        uniprot_id = p.get("Entry")
-        name = p.get("Protein names")
-        gene_name = p.get("Gene Names")
-        organism = p.get("Organism")
-        length = p.get("Length")
-        mass = p.get("Mass")
-        seq = p.get("Sequence")
+    if write_mode == "load_data":
+        _create_protein_stage(cur)
 
-        try:
-            length_int = int(length) if length is not None else None
-        except ValueError:
-            length_int = None
+    executor = make_executor(PI_WORKERS)
+    cache = open_feature_cache()
+    try:
+        for batch in iter_batches(proteins, batch_size):
+            if existing is not None:
+                seen.update(p.get("Entry") for p in batch)
+                batch, known = plan_protein_batch(batch, existing, summary)
+            else:
+                summary["new"] += len(batch)
+                known = [MISSING] * len(batch)
+            if not batch:
+                continue
+
+            # pI nur dort berechnen, wo sich die Sequenz geaendert hat
+            need = [p for p, k in zip(batch, known) if k is MISSING]
+            if need and solver is None:
+                solver = choose_pi_solver(p.get("Sequence") or "" for p in need)
+            computed = iter(compute_features(need, solver=solver, executor=executor,
+                                             validate=False, cache=cache)
+                            if need else [])
+            pis = [next(computed) if k is MISSING else k for k in known]
+            summary["pi_computed"] += len(need)
+            summary["pi_reused"] += len(batch) - len(need)
+
+            rows = [protein_row(p, pI_val) for p, pI_val in zip(batch, pis)]
+
+            with STAGES.stage("insert"):
+                if write_mode == "single":
+                    _upsert_protein_rows(cur, rows, 1)
+                elif write_mode == "multirow":
+                    _upsert_protein_rows(cur, rows, upsert_batch_size)
+                elif write_mode == "load_data":
+                    _load_protein_stage(cur, rows)
+                else:
+                    raise ValueError(f"Unbekannter Schreibmodus: {write_mode}")
+
+                inserted += len(rows)
+                uncommitted += len(rows)
+                if write_mode != "load_data" and uncommitted >= commit_interval:
+                    conn.commit()
+                    uncommitted = 0
+                    _report_rate(inserted, started)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if cache is not None:
+            cache.close()
+
+    with STAGES.stage("insert"):
+        if write_mode == "load_data":
+            _merge_protein_stage(cur)
+        conn.commit()
+    cur.close()
+    _report_rate(inserted, started, final=True)
 
-        try:
-            mw_kda = float(mass) / 1000.0 if mass is not None else None
-        except ValueError:
-            mw_kda = None
+    if delete_missing and existing is not None:
+        summary["deleted"] = delete_missing_proteins(conn, existing, seen)
+
+    print(
+        "Import-Zusammenfassung: "
+        f"{summary['new']} neu, {summary['updated']} geaendert, "
+        f"{summary['unchanged']} unveraendert, {summary['deleted']} geloescht; "
+        f"pI berechnet: {summary['pi_computed']}, uebernommen: {summary['pi_reused']}."
+    )
+    return summary
 
-        pI_val = compute_pi(seq) if seq else None
 
+def _report_rate(rows, started, final=False):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    if final:
+        print(f"{rows} Proteine eingefuegt ({elapsed:.1f}s, {rate:.0f} Zeilen/s).")
+    else:
+        print(f"  ... {rows} Proteine geschrieben ({rate:.0f} Zeilen/s)")
+
+
+def _upsert_protein_rows(cur, rows, rows_per_statement):
+    """
+    Mehrzeilige INSERT ... ON DUPLICATE KEY UPDATE, rows_per_statement Zeilen pro Roundtrip.
+    """
+    placeholders = "(" + ", ".join(["%s"] * len(PROTEIN_COLUMNS)) + ")"
+    for start in range(0, len(rows), rows_per_statement):
+        chunk = rows[start:start + rows_per_statement]
         cur.execute(
-            """
+            f"""
             INSERT INTO protein
-            (uniprot_id, name, gene_name, organism, length, mw_kda, pI, tag, description)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-                name = VALUES(name),
-                gene_name = VALUES(gene_name),
-                organism = VALUES(organism),
-                length = VALUES(length),
-                mw_kda = VALUES(mw_kda),
-                pI = VALUES(pI),
-                tag = VALUES(tag),
-                description = VALUES(description);
+            ({", ".join(PROTEIN_COLUMNS)})
+            VALUES {", ".join([placeholders] * len(chunk))}
+            {PROTEIN_UPSERT_UPDATE};
             """,
-            (
-                uniprot_id,
-                name,
-                gene_name,
-                organism,
-                length_int,
-                mw_kda,
-                pI_val,
-                "none",   # Standard: kein Tag
-                None      # description kannst du spaeter ergaenzen
-            )
+            tuple(v for row in chunk for v in row),
         )
-        inserted += 1
 
-    conn.commit()
-    cur.close()
-    print(f"{inserted} Proteine eingefuegt.")
 
+def _create_protein_stage(cur):
+    cur.execute("DROP TEMPORARY TABLE IF EXISTS protein_stage;")
+    cur.execute(
+        """
+        CREATE TEMPORARY TABLE protein_stage (
+            uniprot_id VARCHAR(20),
+            name TEXT,
+            gene_name VARCHAR(255),
+            organism VARCHAR(255),
+            length INT,
+            mw_kda DOUBLE,
+            pI DOUBLE,
+            tag VARCHAR(50),
+            description TEXT,
+            entry_version INT,
+            seq_checksum CHAR(40)
+        ) ENGINE=InnoDB;
+        """
+    )
+
+
+def _tsv_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, float):
+        return repr(value)
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
 
-def dedupe_proteins(conn):
+
+def _load_protein_stage(cur, rows):
     """
-    Entfernt doppelte Proteine basierend auf uniprot_id.
-    Behält den Datensatz mit der kleinsten id.
+    Schreibt einen Batch als TSV-Datei und laedt ihn per LOAD DATA LOCAL INFILE.
     """
-    cur = conn.cursor()
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".tsv", delete=False) as fh:
+        for row in rows:
+            fh.write("\t".join(_tsv_value(v) for v in row) + "\n")
+        path = fh.name
+    try:
+        cur.execute(
+            f"""
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE protein_stage
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+            ({", ".join(PROTEIN_COLUMNS)});
+            """,
+            (path,),
+        )
+    finally:
+        os.remove(path)
+
+
+def _merge_protein_stage(cur):
+    """
+    Uebernimmt alle gestagten Zeilen mit einem einzigen INSERT ... SELECT.
+    """
+    print("Merge protein_stage -> protein...")
     cur.execute(
+        f"""
+        INSERT INTO protein ({", ".join(PROTEIN_COLUMNS)})
+        SELECT {", ".join(PROTEIN_COLUMNS)} FROM protein_stage
+        {PROTEIN_UPSERT_UPDATE};
         """
-        DELETE p1 FROM protein p1
-        JOIN protein p2
-          ON p1.uniprot_id = p2.uniprot_id
-         AND p1.id > p2.id;
+    )
+    cur.execute("DROP TEMPORARY TABLE IF EXISTS protein_stage;")
+
+
+STRUCTURE_COLUMNS = ["uniprot_id", "pdb_id", "title", "method", "resolution_angstrom", "image_url"]
+
+# Spaltennamen im SIFTS-TSV (Grossschreibung) -> Spalte in structure_stage
+SIFTS_HEADER = {
+    "SP_PRIMARY": "uniprot_id",
+    "PDB": "pdb_id",
+    "TITLE": "title",
+    "METHOD": "method",
+    "EXPERIMENTAL_METHOD": "method",
+    "RESOLUTION": "resolution_angstrom",
+    "IMAGE_URL": "image_url",
+}
+
+
+def iter_structure_mappings(path):
+    """
+    Liest ein UniProt->PDB-Mapping im SIFTS-Format (Tab-getrennt, Kommentarzeilen
+    mit '#', danach Kopfzeile) zeilenweise und liefert Tupel wie STRUCTURE_SEED.
+    Pflichtspalten sind SP_PRIMARY und PDB; Titel, Methode, Aufloesung und
+    Bild-URL werden uebernommen, falls vorhanden. .gz-Dateien werden direkt gelesen.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as fh:
+        positions = None
+        for line in fh:
+            if not line.strip() or line.startswith("#"):
+                continue
+            cols = line.rstrip("\r\n").split("\t")
+            if positions is None:
+                header = [c.strip().upper() for c in cols]
+                positions = {}
+                for i, name in enumerate(header):
+                    field = SIFTS_HEADER.get(name)
+                    if field and field not in positions:
+                        positions[field] = i
+                if "uniprot_id" not in positions or "pdb_id" not in positions:
+                    raise ValueError(f"{path}: Spalten SP_PRIMARY und PDB erwartet, gefunden: {header}")
+                continue
+
+            values = {f: (cols[i].strip() if i < len(cols) else "") or None for f, i in positions.items()}
+            if not values["uniprot_id"] or not values["pdb_id"]:
+                continue
+            try:
+                reso = float(values.get("resolution_angstrom")) if values.get("resolution_angstrom") else None
+            except ValueError:
+                reso = None
+            yield (
+                values["uniprot_id"],
+                values["pdb_id"].upper(),
+                values.get("title"),
+                values.get("method"),
+                reso,
+                values.get("image_url"),
+            )
+
+
+def _create_structure_stage(cur):
+    cur.execute("DROP TEMPORARY TABLE IF EXISTS structure_stage;")
+    cur.execute("DROP TEMPORARY TABLE IF EXISTS structure_pick;")
+    # Alle Mapping-Zeilen (eine je Kette), protein_id wird per JOIN aufgeloest
+    cur.execute(
+        """
+        CREATE TEMPORARY TABLE structure_stage (
+            seq INT AUTO_INCREMENT PRIMARY KEY,
+            uniprot_id VARCHAR(20) NOT NULL,
+            pdb_id VARCHAR(10) NOT NULL,
+            title VARCHAR(500),
+            method VARCHAR(100),
+            resolution_angstrom DECIMAL(4,2),
+            image_url VARCHAR(500),
+            protein_id INT NULL,
+            KEY idx_stage_uniprot (uniprot_id),
+            KEY idx_stage_pdb (pdb_id, seq)
+        ) ENGINE=InnoDB;
         """
     )
-    deleted = cur.rowcount
-    conn.commit()
+    # Eine Zeile je PDB-Eintrag: die erste Kette, die auf ein bekanntes Protein zeigt
+    cur.execute(
+        """
+        CREATE TEMPORARY TABLE structure_pick (
+            seq INT AUTO_INCREMENT PRIMARY KEY,
+            protein_id INT NOT NULL,
+            pdb_id VARCHAR(10) NOT NULL,
+            title VARCHAR(500),
+            method VARCHAR(100),
+            resolution_angstrom DECIMAL(4,2),
+            image_url VARCHAR(500),
+            UNIQUE KEY uq_pick_pdb (pdb_id)
+        ) ENGINE=InnoDB;
+        """
+    )
+
 
+def import_structure_mappings(conn, mappings, batch_size=STRUCTURE_BATCH_SIZE):
+    """
+    Mengenbasierter Struktur-Import fuer grosse Mappings:
+
+    1. Mapping batchweise in eine temporaere Tabelle schreiben (alle Ketten).
+    2. Accessions per JOIN auf protein.uniprot_id (Unique-Index) aufloesen.
+    3. Je PDB-Eintrag die erste Kette mit bekanntem Protein waehlen (INSERT IGNORE
+       in eine zweite Tabelle mit Unique-Key auf pdb_id). Erst filtern, dann
+       deduplizieren: ein Eintrag, dessen erste Kette auf ein fremdes Protein
+       zeigt, geht so nicht verloren.
+    4. In Bereichen von batch_size Zeilen upserten (je Bereich ein Commit).
+
+    Gezaehlt wird mit COUNT(*), da INSERT IGNORE Luecken in AUTO_INCREMENT hinterlaesst.
+    """
+    cur = conn.cursor()
+    staged = 0
     try:
-        cur.execute("ALTER TABLE protein ADD UNIQUE KEY uq_protein_uniprot (uniprot_id);")
+        _create_structure_stage(cur)
+        insert_sql = f"""
+            INSERT INTO structure_stage ({", ".join(STRUCTURE_COLUMNS)})
+            VALUES ({", ".join(["%s"] * len(STRUCTURE_COLUMNS))});
+        """
+        for batch in iter_batches(mappings, batch_size):
+            cur.executemany(insert_sql, batch)
+            staged += len(batch)
+
+        cur.execute(
+            """
+            UPDATE structure_stage s
+            JOIN protein p ON p.uniprot_id = s.uniprot_id
+            SET s.protein_id = p.id;
+            """
+        )
+        cur.execute(
+            """
+            INSERT IGNORE INTO structure_pick
+                (protein_id, pdb_id, title, method, resolution_angstrom, image_url)
+            SELECT protein_id, pdb_id, title, method, resolution_angstrom, image_url
+            FROM structure_stage
+            WHERE protein_id IS NOT NULL
+            ORDER BY seq;
+            """
+        )
         conn.commit()
-    except mysql.connector.Error:
-        # Index existiert bereits oder konnte nicht gesetzt werden
-        pass
 
-    cur.close()
-    if deleted:
-        print(f"{deleted} doppelte Proteine entfernt.")
+        cur.execute("SELECT COUNT(DISTINCT pdb_id) FROM structure_stage;")
+        entries = cur.fetchone()[0]
+        cur.execute("SELECT COUNT(*), COALESCE(MAX(seq), 0) FROM structure_pick;")
+        picked, max_seq = cur.fetchone()
+
+        upserted = 0
+        for lo in range(0, max_seq, batch_size):
+            cur.execute(
+                """
+                INSERT INTO structure (protein_id, pdb_id, title, method, resolution_angstrom, image_url)
+                SELECT s.protein_id, s.pdb_id, s.title, s.method, s.resolution_angstrom, s.image_url
+                FROM structure_pick s
+                WHERE s.seq > %s AND s.seq <= %s
+                ON DUPLICATE KEY UPDATE
+                  protein_id = VALUES(protein_id),
+                  title = COALESCE(VALUES(title), title),
+                  method = COALESCE(VALUES(method), method),
+                  resolution_angstrom = COALESCE(VALUES(resolution_angstrom), resolution_angstrom),
+                  image_url = COALESCE(VALUES(image_url), image_url);
+                """,
+                (lo, lo + batch_size),
+            )
+            upserted += cur.rowcount
+            conn.commit()
+
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS structure_stage;")
+        cur.execute("DROP TEMPORARY TABLE IF EXISTS structure_pick;")
+    finally:
+        cur.close()
+
+    skipped = entries - picked
+    print(f"{staged} Mapping-Zeilen gelesen, {entries} PDB-Eintraege, "
+          f"{picked} Strukturen gespeichert ({upserted} Zeilen betroffen), "
+          f"{skipped} uebersprungen (Protein nicht gefunden).")
+    return {"rows": staged, "structures": picked, "skipped": skipped}
 
 
 def insert_structures(conn, seeds=STRUCTURE_SEED):
@@ -347,36 +984,7 @@ def insert_structures(conn, seeds=STRUCTURE_SEED):
     """
     if not seeds:
         return
-
-    cur = conn.cursor()
-    inserted = 0
-    skipped = 0
-
-    for uni, pdb_id, title, method, reso, img in seeds:
-        cur.execute("SELECT id FROM protein WHERE UPPER(uniprot_id) = UPPER(%s) LIMIT 1;", (uni,))
-        row = cur.fetchone()
-        if not row:
-            skipped += 1
-            continue
-        protein_id = row[0]
-        cur.execute(
-            """
-            INSERT INTO structure (protein_id, pdb_id, title, method, resolution_angstrom, image_url)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-              protein_id = VALUES(protein_id),
-              title = VALUES(title),
-              method = VALUES(method),
-              resolution_angstrom = VALUES(resolution_angstrom),
-              image_url = VALUES(image_url);
-            """,
-            (protein_id, pdb_id, title, method, reso, img),
-        )
-        inserted += 1
-
-    conn.commit()
-    cur.close()
-    print(f"{inserted} Strukturen gespeichert, {skipped} uebersprungen (Protein nicht gefunden).")
+    return import_structure_mappings(conn, seeds)
 
 
 # ============================================
@@ -386,34 +994,16 @@ def insert_structures(conn, seeds=STRUCTURE_SEED):
 def create_protein_view_with_recommendation(conn):
     """
     Legt eine VIEW an, die für jedes Protein eine empfohlene Säule
-    nach der Heuristik berechnet.
+    nach den Regeln aus recommendation_rule berechnet.
     """
     cur = conn.cursor()
 
     # Falls es die View schon gibt, erst löschen
     cur.execute("DROP VIEW IF EXISTS protein_with_recommendation;")
 
-    cur.execute(
-        """
-        CREATE VIEW protein_with_recommendation AS
-        SELECT
-            p.*,
-            CASE
-                WHEN p.tag LIKE '%His%' THEN 'HisTrap FF (IMAC, Ni-NTA)'
-                WHEN p.tag LIKE '%GST%' THEN 'GSTrap 4B (Affinity)'
-                WHEN p.tag LIKE '%Strep%' THEN 'Strep-Tactin Sepharose (Affinity)'
-                WHEN p.pI IS NOT NULL AND p.pI < 7.0 THEN 'HiTrap Q HP (Anion exchange)'
-                WHEN p.pI IS NOT NULL AND p.pI > 7.0 THEN 'HiTrap SP HP (Cation exchange)'
-                ELSE 'Superdex 200 Increase (SEC)'
-            END AS recommended_column,
-            CASE
-                WHEN p.mw_kda IS NOT NULL AND p.mw_kda <= 70 THEN 'Superdex 75 Increase (SEC polishing)'
-                WHEN p.mw_kda IS NOT NULL AND p.mw_kda > 70 THEN 'Superdex 200 Increase (SEC polishing)'
-                ELSE NULL
-            END AS polishing_column
-        FROM protein p;
-        """
-    )
+    # CASE-Ausdruecke kommen aus den kompilierten Regeln (recommendation_rule)
+    engine = load_rule_engine(conn)
+    cur.execute(engine.view_sql())
 
     conn.commit()
     cur.close()
@@ -424,32 +1014,101 @@ def create_protein_view_with_recommendation(conn):
 # Main
 # ============================================
 
+def write_stage_metrics(path, stages=STAGES, finished_at=None, ok=True):
+    """
+    Schreibt die Phasen-Laufzeiten im Prometheus-Textformat nach path
+    (atomar ueber eine temporaere Datei, damit nie eine halbe Datei gelesen wird).
+    Bei ok=False (abgebrochener Import) fehlt der Erfolgs-Zeitstempel.
+    """
+    registry = stages.to_registry(Registry(prefix="column_finder_"))
+    registry.gauge("import_last_run_ok", "1 if the last import finished, 0 if it aborted").set(int(ok))
+    if ok:
+        registry.gauge(
+            "import_last_success_timestamp_seconds", "Unix time of the last finished import",
+        ).set(finished_at or time.time())
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".prom.tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
 def main():
+    STAGES.reset()
+
     # 0) DB anlegen (falls nicht vorhanden)
     ensure_database_exists()
 
-    # 1) Verbindung zur DB + Tabellen anlegen
-    conn = init_db()
+    # 1) Verbindung zur DB + Schema-Migrationen (inkl. Dublettenbereinigung)
+    with STAGES.stage("migrations"):
+        conn = init_db()
 
-    # 2) Säulen einfügen (falls leer)
-    insert_default_columns(conn)
+    # 1b) Abfrageplaene der App pruefen; die Indizes kommen aus den Migrationen.
+    # Das geschieht vor dem ersten Schreibzugriff: bei einem Full Table Scan
+    # bricht der Import ab, bevor Proteine, Strukturen oder die View geschrieben
+    # werden; Datenversion und Caches der App passen dann weiter zu den Tabellen.
+    try:
+        with STAGES.stage("query_plans"):
+            check_query_plans(conn)
+    except QueryPlanError:
+        conn.close()
+        if IMPORT_METRICS_FILE:
+            write_stage_metrics(IMPORT_METRICS_FILE, ok=False)
+        raise
 
-    # 3) UniProt-Daten holen
-    proteins = fetch_uniprot_proteins(UNIPROT_QUERY, MAX_RESULTS)
+    # 2) Säulen und Empfehlungsregeln einfügen (falls leer)
+    insert_default_columns(conn)
+    insert_default_rules(conn)
 
-    # 4) Proteine einfügen
-    insert_proteins(conn, proteins)
+    # 3) UniProt-Daten holen (Streaming: Generator, wird direkt in 4) verbraucht)
+    if STREAMING_INGEST:
+        proteins = iter_uniprot_proteins(UNIPROT_QUERY, MAX_RESULTS)
+    else:
+        proteins = fetch_uniprot_proteins(UNIPROT_QUERY, MAX_RESULTS)
 
-    # 4b) Duplikate bereinigen
-    dedupe_proteins(conn)
+    # 4) Proteine einfügen (Delta gegen den bisherigen Stand)
+    insert_proteins(conn, proteins, delete_missing=DELETE_MISSING and MAX_RESULTS is None)
 
-    # 4c) Beispiel-Strukturen einfuegen
-    insert_structures(conn)
+    # 4c) Beispiel-Strukturen einfuegen, danach ggf. das volle PDB-Mapping
+    with STAGES.stage("structures"):
+        insert_structures(conn)
+        if STRUCTURE_MAPPING_FILE:
+            import_structure_mappings(conn, iter_structure_mappings(STRUCTURE_MAPPING_FILE))
 
     # 5) View mit Heuristik
-    create_protein_view_with_recommendation(conn)
+    with STAGES.stage("view"):
+        create_protein_view_with_recommendation(conn)
+
+    # 6) Datenversion hochzaehlen (App baut Caches/Indizes neu auf)
+    version = bump_data_version(conn)
+
+    # 7) Statistik-Snapshot fuer die Startseite
+    with STAGES.stage("catalog_stats"):
+        refresh_catalog_stats(conn, version)
+
+    # 8) Read-only-Snapshot (SQLite) fuer Instanzen ohne MySQL
+    if SNAPSHOT_EXPORT_PATH:
+        with STAGES.stage("snapshot"):
+            counts = export_snapshot(conn, SNAPSHOT_EXPORT_PATH)
+        print(f"Snapshot '{SNAPSHOT_EXPORT_PATH}' veroeffentlicht "
+              f"({counts.get('protein', 0)} Proteine, {counts.get('structure', 0)} Strukturen).")
 
     conn.close()
+
+    print("Laufzeit je Phase:")
+    for line in STAGES.report():
+        print(line)
+    slow_log = get_slow_query_log()
+    if slow_log is not None and slow_log.recorded:
+        print(f"{slow_log.recorded} langsame Abfragen (> {SLOW_QUERY_THRESHOLD}s), langsamste:")
+        for entry in sorted(slow_log.entries(), key=lambda e: e["seconds"], reverse=True)[:5]:
+            print(f"  {entry['seconds']:9.3f}s  {entry['statement']}")
+    if IMPORT_METRICS_FILE:
+        write_stage_metrics(IMPORT_METRICS_FILE)
     print("Fertig. MySQL-Datenbank ist bereit.")
 
 
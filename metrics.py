@@ -0,0 +1,350 @@
+"""
+Messwerte fuer App und Import im Prometheus-Textformat (ohne prometheus_client).
+
+- Counter, Gauge, Histogram: einfache, thread-sichere Metriken mit Labels
+- Registry:                  sammelt Metriken und rendert sie fuer /metrics
+- TimedConnection:           Verbindungs-Wrapper, der jedes SQL-Statement samt
+                             Dauer (execute + fetch) und Zeilenzahl meldet
+- StageTimer:                summiert Laufzeiten benannter Import-Phasen
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+
+# Sekunden; deckt schnelle Index-Lookups bis langsame Scans ab
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} erwartet Labels {self.labelnames}")
+        return tuple(str(v) for v in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_value(self, key, value):
+        counts, total, count = value
+        lines = [
+            f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _fmt(float(b)))])} {c}"
+            for b, c in zip(self.buckets, counts)
+        ]
+        lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {count}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Sammlung von Metriken; render() liefert das Prometheus-Textformat."""
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self._metrics = OrderedDict()
+
+    def _add(self, cls, name, *args, **kwargs):
+        name = self.prefix + name
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_PLACEHOLDER_LIST = re.compile(r"%s(\s*,\s*%s)+")
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE|VIEW|JOIN)\s+`?(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_name(sql):
+    """
+    Kurzer, stabiler Name eines Statements fuer Metrik-Labels:
+    Verb, erste Tabelle und ein Hash des normalisierten Texts, z. B.
+    "select:protein_with_recommendation:3f2a9c". Variable IN-Listen
+    (%s, %s, ...) zaehlen als ein Statement.
+    """
+    text = " ".join(sql.split())
+    text = _PLACEHOLDER_LIST.sub("%s...", text)
+    verb = text.split(" ", 1)[0].lower() if text else "?"
+    table = _TABLE.search(text)
+    digest = format(_hash_text(text), "06x")
+    return f"{verb}:{table.group(1) if table else '-'}:{digest}"
+
+
+def _hash_text(text):
+    """Von PYTHONHASHSEED unabhaengiger 24-Bit-Hash (stabil ueber Prozesse)."""
+    h = 0x811C9DC5
+    for byte in text.encode("utf-8"):
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    return (h ^ (h >> 24)) & 0xFFFFFF
+
+
+class TimedCursor:
+    """
+    Cursor-Wrapper: misst je Statement die Zeit in execute() und in allen
+    fetch-Aufrufen und zaehlt die Zeilen (gelesene Zeilen bei SELECT,
+    rowcount sonst). Gemeldet wird, sobald das Ergebnis vollstaendig gelesen,
+    das naechste Statement ausgefuehrt oder der Cursor geschlossen wird.
+    """
+
+    def __init__(self, cursor, on_statement, conn=None):
+        self._cursor = cursor
+        self._on_statement = on_statement
+        self._conn = conn
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    def _finish(self):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            self._on_statement(self._conn, *pending)
+
+    def _run(self, method, sql, params):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return method(sql)
+            return method(sql, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            if getattr(self._cursor, "description", None) is None:
+                rows = max(getattr(self._cursor, "rowcount", 0) or 0, 0)
+                self._on_statement(self._conn, sql, params, elapsed, rows)
+            else:
+                self._pending = [sql, params, elapsed, 0]
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        if args or kwargs:
+            self._finish()
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        return self._run(self._cursor.execute, sql, params)
+
+    def executemany(self, sql, seq_params):
+        return self._run(self._cursor.executemany, sql, seq_params)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        if self._pending is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._pending[3] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._fetch(self._cursor.fetchmany, *([] if size is None else [size]))
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        if self._pending is not None:
+            self._pending[3] += len(rows)
+            self._finish()
+        return rows
+
+    def close(self):
+        # Erst schliessen, dann melden: der Callback darf die Verbindung danach
+        # wieder benutzen (z. B. fuer EXPLAIN). Ungelesene Zeilen liest close()
+        # nur mit consume_results=True weg, sonst wirft es; gemeldet wird trotzdem
+        try:
+            return self._cursor.close()
+        finally:
+            self._finish()
+
+
+class TimedConnection:
+    """
+    Verbindungs-Wrapper, dessen Cursor jedes Statement an
+    on_statement(conn, sql, params, seconds, rows) melden; conn ist die
+    ungewrappte Verbindung.
+    """
+
+    def __init__(self, conn, on_statement):
+        self._conn = conn
+        self._on_statement = on_statement
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return TimedCursor(self._conn.cursor(*args, **kwargs), self._on_statement, self._conn)
+
+    def close(self):
+        return self._conn.close()
+
+
+class StageTimer:
+    """
+    Summiert Laufzeiten benannter Phasen. Phasen duerfen mehrfach und
+    verschachtelt vorkommen (z. B. pro Batch); gezaehlt wird jeweils die
+    Wandzeit innerhalb von stage().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = OrderedDict()
+        self.calls = OrderedDict()
+
+    def add(self, name, seconds, calls=1):
+        with self._lock:
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.calls[name] = self.calls.get(name, 0) + calls
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def timed_iter(self, name, iterable):
+        """Reicht iterable durch und rechnet die Zeit in next() der Phase name zu."""
+        it = iter(iterable)
+        total = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    total += time.perf_counter() - started
+                    return
+                total += time.perf_counter() - started
+                yield item
+        finally:
+            self.add(name, total)
+
+    def reset(self):
+        with self._lock:
+            self.seconds.clear()
+            self.calls.clear()
+
+    def report(self):
+        """Zeilen fuer die Konsolenausgabe, groesste Phase zuerst."""
+        with self._lock:
+            items = sorted(self.seconds.items(), key=lambda kv: kv[1], reverse=True)
+            calls = dict(self.calls)
+        return [f"  {name:<16} {seconds:9.3f}s  ({calls[name]}x)" for name, seconds in items]
+
+    def to_registry(self, registry):
+        """Traegt die Summen als Gauges in registry ein (z. B. fuer den Textfile-Collector)."""
+        seconds = registry.gauge("import_stage_seconds", "Wall time per import stage in seconds",
+                                 ["stage"])
+        calls = registry.gauge("import_stage_calls", "Number of runs per import stage",
+                               ["stage"])
+        with self._lock:
+            for name, value in self.seconds.items():
+                seconds.set(value, name)
+                calls.set(self.calls[name], name)
+        return registry
@@ -0,0 +1,507 @@
+"""
+Versionierte Schema-Migrationen fuer die MySQL-Datenbank.
+
+Jede Migration ist eine Funktion(cur) mit fester Nummer in MIGRATIONS. Die
+angewendeten Nummern stehen in schema_migrations; run_migrations() fuehrt nur
+neue aus. DDL committet in MySQL implizit, daher ist jede Migration so
+geschrieben, dass sie nach einem Abbruch gefahrlos erneut laufen kann
+(IF NOT EXISTS bzw. Pruefung ueber information_schema).
+
+check_query_plans() prueft per EXPLAIN, dass die haeufigen Abfragen aus app.py
+einen Index benutzen und nicht auf einen Full Table Scan zurueckfallen. Geprueft
+werden Detailseite, Lookups, Keyset-Seite (mit und ohne Filter),
+Volltext-Suchseite und Facetten einer Suche. Bewusst nicht geprueft:
+
+- Facetten und Histogramme ohne Suche/Filter: zaehlen den ganzen Katalog, ein
+  Scan ist dort der richtige Plan (die Startseite liest catalog_stats).
+- LIKE-Suche (SEARCH_MODE=like): '%...%' kann keinen Index benutzen.
+- has_structure=0 (NOT EXISTS): laeuft ueber alle Proteine, die keine
+  Struktur haben, also ebenfalls als Scan.
+
+Scans auf abgeleiteten Tabellen (<derivedN>, <unionN>) sind erlaubt; das sind
+die bereits gefilterten Zwischenergebnisse der Unterabfragen.
+"""
+import re
+
+import mysql.connector
+from mysql.connector import errorcode
+
+# Unter so vielen Proteinen ist ein Full Scan fuer den Optimizer legitim billiger;
+# die EXPLAIN-Pruefung wird dann uebersprungen.
+EXPLAIN_MIN_ROWS = 1000
+
+
+class QueryPlanError(Exception):
+    """Eine Abfrage aus app.py laeuft ohne Index (EXPLAIN type = ALL)."""
+
+
+def index_exists(cur, table, index_name):
+    """
+    Prueft ueber information_schema, ob ein Index auf der Tabelle existiert.
+    """
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+          AND table_name = %s
+          AND index_name = %s;
+        """,
+        (table, index_name),
+    )
+    return cur.fetchone()[0] > 0
+
+
+def column_exists(cur, table, column_name):
+    """
+    Prueft ueber information_schema, ob die Spalte in der Tabelle existiert.
+    """
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+          AND table_name = %s
+          AND column_name = %s;
+        """,
+        (table, column_name),
+    )
+    return cur.fetchone()[0] > 0
+
+
+def add_index(cur, table, index_name, definition):
+    """Legt einen Index an, falls er noch nicht existiert."""
+    if not index_exists(cur, table, index_name):
+        print(f"Lege Index {table}.{index_name} an...")
+        cur.execute(f"ALTER TABLE {table} ADD {definition};")
+
+
+# ============================================
+# Migrationen
+# ============================================
+
+def _m001_baseline(cur):
+    """
+    Basisschema (Stand vor den Migrationen). Alte Datenbanken bekommen fehlende
+    Spalten und Indizes nachgezogen.
+    """
+    # Protein-Tabelle
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS protein (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        uniprot_id VARCHAR(20),
+        name TEXT NOT NULL,
+        gene_name VARCHAR(255),
+        organism VARCHAR(255),
+        length INT,
+        mw_kda DOUBLE,
+        pI DOUBLE,
+        tag VARCHAR(50),
+        description TEXT,
+        entry_version INT,
+        seq_checksum CHAR(40),
+        name_key VARCHAR(191) AS (LEFT(name, 191)) STORED,
+        KEY idx_protein_name_key (name_key, id),
+        FULLTEXT KEY ft_protein_search (name, gene_name, organism)
+        ) ENGINE=InnoDB;
+        """
+    )
+
+    # Sortierschluessel fuer Keyset-Pagination (name ist TEXT und nicht indexierbar)
+    if not column_exists(cur, "protein", "name_key"):
+        print("Lege Sortierspalte name_key an...")
+        cur.execute(
+            "ALTER TABLE protein "
+            "ADD COLUMN name_key VARCHAR(191) AS (LEFT(name, 191)) STORED;"
+        )
+    # Delta-Import: UniProt-Eintragsversion und Sequenz-Checksumme
+    if not column_exists(cur, "protein", "entry_version"):
+        cur.execute("ALTER TABLE protein ADD COLUMN entry_version INT;")
+    if not column_exists(cur, "protein", "seq_checksum"):
+        cur.execute("ALTER TABLE protein ADD COLUMN seq_checksum CHAR(40);")
+    if not index_exists(cur, "protein", "idx_protein_name_key"):
+        cur.execute("ALTER TABLE protein ADD KEY idx_protein_name_key (name_key, id);")
+
+    # Volltext-Index auch fuer bereits bestehende Tabellen nachziehen
+    if not index_exists(cur, "protein", "ft_protein_search"):
+        print("Lege FULLTEXT-Index ft_protein_search an...")
+        cur.execute(
+            "ALTER TABLE protein "
+            "ADD FULLTEXT KEY ft_protein_search (name, gene_name, organism);"
+        )
+
+    # Struktur-Tabelle (optional fuer PDB/Model-Infos)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS structure (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            protein_id INT NOT NULL,
+            pdb_id VARCHAR(10),
+            title VARCHAR(500),
+            method VARCHAR(100),
+            resolution_angstrom DECIMAL(4,2),
+            image_url VARCHAR(500),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (pdb_id),
+            INDEX idx_structure_protein (protein_id),
+            CONSTRAINT fk_structure_protein
+                FOREIGN KEY (protein_id)
+                REFERENCES protein(id)
+                ON UPDATE CASCADE
+                ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """
+    )
+
+    # Chromatographie-Saeulen-Tabelle
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS chromatography_column (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(150) NOT NULL,
+            type VARCHAR(50),
+            resin VARCHAR(100),
+            ph_min DOUBLE,
+            ph_max DOUBLE,
+            description TEXT,
+            url VARCHAR(500)
+        ) ENGINE=InnoDB;
+        """
+    )
+    if not column_exists(cur, "chromatography_column", "url"):
+        cur.execute("ALTER TABLE chromatography_column ADD COLUMN url VARCHAR(500);")
+
+    # Regeln fuer die Saeulenempfehlung (siehe recommendation.py)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_rule (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            kind VARCHAR(10) NOT NULL,
+            priority INT NOT NULL,
+            tag VARCHAR(50),
+            lo DOUBLE,
+            hi DOUBLE,
+            lo_inclusive TINYINT NOT NULL DEFAULT 0,
+            hi_inclusive TINYINT NOT NULL DEFAULT 0,
+            label VARCHAR(150) NOT NULL,
+            column_name VARCHAR(150) NOT NULL
+        ) ENGINE=InnoDB;
+        """
+    )
+
+    # Datenversion: wird nach jedem Import hochgezaehlt, damit die App
+    # ihre In-Memory-Indizes/Caches neu aufbauen kann
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id TINYINT PRIMARY KEY,
+            version INT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """
+    )
+
+    # Vorberechnete Statistik fuer die Startseite (eine Zeile je Datenversion)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_stats (
+            version INT PRIMARY KEY,
+            protein_count INT NOT NULL,
+            pi_edges TEXT NOT NULL,
+            pi_counts TEXT NOT NULL,
+            mw_edges TEXT NOT NULL,
+            mw_counts TEXT NOT NULL,
+            computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """
+    )
+
+
+def _m002_unique_uniprot(cur):
+    """
+    Eindeutiger Schluessel auf protein.uniprot_id, damit ON DUPLICATE KEY UPDATE
+    im Import greift. Vorhandene Duplikate werden vorher entfernt (kleinste id
+    bleibt), per Gruppierung statt quadratischem Self-Join.
+    """
+    if index_exists(cur, "protein", "uq_protein_uniprot"):
+        return
+    cur.execute(
+        """
+        DELETE p FROM protein p
+        JOIN (
+            SELECT uniprot_id, MIN(id) AS keep_id
+            FROM protein
+            WHERE uniprot_id IS NOT NULL
+            GROUP BY uniprot_id
+            HAVING COUNT(*) > 1
+        ) d ON d.uniprot_id = p.uniprot_id AND p.id > d.keep_id;
+        """
+    )
+    if cur.rowcount:
+        print(f"{cur.rowcount} doppelte Proteine entfernt.")
+    add_index(cur, "protein", "uq_protein_uniprot", "UNIQUE KEY uq_protein_uniprot (uniprot_id)")
+
+
+def _m003_query_indexes(cur):
+    """
+    Indizes fuer die Abfragen der App: pI/MW (Bereiche, MIN/MAX), Gen-Symbol
+    und der Join structure.protein_id = protein.id.
+    """
+    add_index(cur, "protein", "idx_protein_pi", "KEY idx_protein_pi (pI)")
+    add_index(cur, "protein", "idx_protein_mw", "KEY idx_protein_mw (mw_kda)")
+    add_index(cur, "protein", "idx_protein_gene", "KEY idx_protein_gene (gene_name)")
+    add_index(cur, "structure", "idx_structure_protein", "KEY idx_structure_protein (protein_id)")
+
+
+def _m004_facet_indexes(cur):
+    """Indizes fuer die Facettenfilter nach Organismus und Tag (/proteins)."""
+    add_index(cur, "protein", "idx_protein_organism", "KEY idx_protein_organism (organism)")
+    add_index(cur, "protein", "idx_protein_tag", "KEY idx_protein_tag (tag)")
+
+
+# (Nummer, Beschreibung, Funktion) -- nur anhaengen, nie umnummerieren
+MIGRATIONS = [
+    (1, "Basisschema", _m001_baseline),
+    (2, "Unique Key protein.uniprot_id", _m002_unique_uniprot),
+    (3, "Indizes pI, mw_kda, gene_name, structure.protein_id", _m003_query_indexes),
+    (4, "Indizes organism, tag", _m004_facet_indexes),
+]
+
+
+def schema_version(cur):
+    """Hoechste angewendete Migration (0 bei neuer Datenbank)."""
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """
+    )
+    cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations;")
+    return cur.fetchone()[0]
+
+
+def run_migrations(conn, migrations=MIGRATIONS):
+    """
+    Wendet alle noch nicht eingetragenen Migrationen in Reihenfolge an und
+    gibt die neue Schema-Version zurueck.
+    """
+    cur = conn.cursor()
+    try:
+        current = schema_version(cur)
+        for version, description, migrate in migrations:
+            if version <= current:
+                continue
+            print(f"Migration {version}: {description}...")
+            migrate(cur)
+            cur.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s);",
+                (version, description),
+            )
+            conn.commit()
+            current = version
+    finally:
+        cur.close()
+    print(f"Schema-Version {current}.")
+    return current
+
+
+# ============================================
+# EXPLAIN-Pruefungen
+# ============================================
+
+# (Name, SQL, Parameter aus der Beispielzeile). Die Abfragen entsprechen den
+# haeufigen Pfaden in app.py (Detailseite, Keyset-Seiten, Volltext, Facetten,
+# Batch-API, Bereiche). ft_query ist der Volltext-Ausdruck zum Gen-Symbol.
+EXPLAIN_CHECKS = [
+    (
+        "protein_detail",
+        """
+        SELECT p.*, s.pdb_id
+        FROM protein_with_recommendation p
+        LEFT JOIN structure s ON s.protein_id = p.id
+        WHERE p.id = %s
+        """,
+        ("id",),
+    ),
+    (
+        "accession_lookup",
+        "SELECT id FROM protein WHERE uniprot_id = %s",
+        ("uniprot_id",),
+    ),
+    (
+        "gene_lookup",
+        "SELECT id FROM protein WHERE gene_name = %s",
+        ("gene_name",),
+    ),
+    (
+        "keyset_page",
+        """
+        SELECT * FROM protein_with_recommendation
+        WHERE name_key >= %s AND (name_key > %s OR id > %s)
+        ORDER BY name_key, id
+        LIMIT 101
+        """,
+        ("name_key", "name_key", "id"),
+    ),
+    (
+        "keyset_page_filtered",
+        """
+        SELECT * FROM protein_with_recommendation v
+        WHERE v.pI >= %s AND v.pI <= %s AND v.organism = %s
+          AND name_key >= %s AND (name_key > %s OR id > %s)
+        ORDER BY name_key, id
+        LIMIT 101
+        """,
+        ("pI", "pI", "organism", "name_key", "name_key", "id"),
+    ),
+    (
+        "fulltext_page",
+        """
+        SELECT r.*
+        FROM (
+            SELECT v.*,
+                   CASE
+                       WHEN v.uniprot_id = %s THEN 0
+                       WHEN SUBSTRING_INDEX(v.gene_name, ' ', 1) = %s THEN 1
+                       ELSE 2
+                   END AS match_rank,
+                   m.score AS relevance
+            FROM (
+                SELECT id, MAX(score) AS score
+                FROM (
+                    SELECT id, 0 AS score
+                    FROM protein
+                    WHERE uniprot_id = %s
+                    UNION ALL
+                    SELECT id, MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM protein
+                    WHERE MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE)
+                ) hits
+                GROUP BY id
+            ) m
+            JOIN protein_with_recommendation v ON v.id = m.id
+        ) r
+        ORDER BY r.match_rank, r.relevance DESC, r.id
+        LIMIT 101
+        """,
+        ("uniprot_id", "gene_name", "uniprot_id", "ft_query", "ft_query"),
+    ),
+    (
+        "search_facets",
+        """
+        SELECT COUNT(*),
+        SUM(EXISTS (SELECT 1 FROM structure s WHERE s.protein_id = p.id)),
+        SUM(p.pI < %s), SUM(p.mw_kda < %s)
+        FROM protein p
+        JOIN (
+            SELECT id FROM protein WHERE uniprot_id = %s
+            UNION
+            SELECT id FROM protein WHERE MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE)
+        ) m ON m.id = p.id
+        WHERE p.organism = %s
+        """,
+        ("pI", "mw_kda", "uniprot_id", "ft_query", "organism"),
+    ),
+    (
+        "search_facet_values",
+        """
+        SELECT p.tag, COUNT(*) AS n
+        FROM protein p
+        JOIN (
+            SELECT id FROM protein WHERE uniprot_id = %s
+            UNION
+            SELECT id FROM protein WHERE MATCH(name, gene_name, organism) AGAINST (%s IN BOOLEAN MODE)
+        ) m ON m.id = p.id
+        WHERE p.tag IS NOT NULL
+        GROUP BY p.tag
+        ORDER BY n DESC, p.tag
+        LIMIT 20
+        """,
+        ("uniprot_id", "ft_query"),
+    ),
+    (
+        "batch_by_id",
+        "SELECT id, uniprot_id, pI, mw_kda, tag FROM protein WHERE id IN (%s, %s)",
+        ("id", "id"),
+    ),
+    (
+        "pi_range",
+        "SELECT id FROM protein WHERE pI BETWEEN %s AND %s",
+        ("pI", "pI"),
+    ),
+    (
+        "mw_range",
+        "SELECT id FROM protein WHERE mw_kda BETWEEN %s AND %s",
+        ("mw_kda", "mw_kda"),
+    ),
+    (
+        "organism_filter",
+        "SELECT id FROM protein WHERE organism = %s",
+        ("organism",),
+    ),
+    (
+        "global_ranges",
+        "SELECT MIN(pI), MAX(pI), MIN(mw_kda), MAX(mw_kda) FROM protein",
+        (),
+    ),
+]
+
+
+def check_query_plans(conn, checks=EXPLAIN_CHECKS, min_rows=EXPLAIN_MIN_ROWS):
+    """
+    Fuehrt EXPLAIN fuer alle checks aus und wirft QueryPlanError, wenn eine
+    Abfrage eine Tabelle komplett scannt (type = ALL). Bei weniger als
+    min_rows Proteinen wird nur gemeldet, nicht geprueft. Laeuft vor dem
+    Import der Daten; gibt es die View noch nicht (erster Import), werden
+    die Abfragen darauf uebersprungen.
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
+        cur.execute("SELECT COUNT(*) AS n FROM protein;")
+        total = cur.fetchone()["n"]
+        if total < min_rows:
+            print(f"EXPLAIN-Pruefung uebersprungen ({total} < {min_rows} Proteine).")
+            return []
+
+        cur.execute(
+            """
+            SELECT id, uniprot_id, gene_name, organism, name_key, pI, mw_kda
+            FROM protein
+            WHERE uniprot_id IS NOT NULL AND gene_name IS NOT NULL AND organism IS NOT NULL
+              AND pI IS NOT NULL AND mw_kda IS NOT NULL
+            ORDER BY id
+            LIMIT 1;
+            """
+        )
+        sample = cur.fetchone()
+        if sample is None:
+            print("EXPLAIN-Pruefung uebersprungen (keine vollstaendige Beispielzeile).")
+            return []
+        words = re.findall(r"\w+", sample["gene_name"])
+        sample["ft_query"] = f"+{words[0]}*" if words else sample["uniprot_id"]
+
+        failures = []
+        for name, sql, fields in checks:
+            try:
+                cur.execute("EXPLAIN " + sql, tuple(sample[f] for f in fields))
+                plan = cur.fetchall()
+            except mysql.connector.Error as err:
+                if err.errno == errorcode.ER_NO_SUCH_TABLE:
+                    print(f"EXPLAIN-Pruefung {name} uebersprungen: {err.msg}")
+                    continue
+                failures.append(f"{name}: {err}")
+                continue
+            for row in plan:
+                if (row.get("table") or "").startswith("<"):
+                    continue
+                if (row.get("type") or "").upper() == "ALL":
+                    failures.append(f"{name}: Full Table Scan auf {row.get('table')}")
+    finally:
+        cur.close()
+
+    if failures:
+        raise QueryPlanError("; ".join(failures))
+    print(f"EXPLAIN-Pruefung ok ({len(checks)} Abfragen).")
+    return failures
@@ -0,0 +1,272 @@
+"""
+Regelwerk fuer die Saeulenempfehlung (eine Quelle fuer View, App, Batch-API und JS).
+
+Die Regeln stehen in der Tabelle recommendation_rule und verweisen auf
+chromatography_column. Beim Laden werden sie einmal kompiliert:
+
+- Tag-Regeln          -> Liste (tag, Ergebnis) in Prioritaetsreihenfolge
+- pI- und MW-Regeln   -> Intervall-Lookup ueber sortierte Grenzwerte
+
+Der Intervall-Lookup zerlegt die Zahlengerade an allen Grenzwerten b0 < b1 < ...
+in "Atome" (-inf, b0), [b0], (b0, b1), [b1], ..., (bn, inf). Fuer jedes Atom
+steht das Ergebnis vorab fest; eine Auswertung ist damit eine Binaersuche
+(bzw. np.searchsorted fuer ganze Arrays).
+"""
+from bisect import bisect_left
+from collections import namedtuple
+from urllib.parse import quote_plus
+
+import numpy as np
+
+CYTIVA_SEARCH_URL = "https://www.cytivalifesciences.com/en/de/search?q={}"
+
+# Produktseiten je Eintrag in chromatography_column (Fallback, falls die Spalte url leer ist)
+DEFAULT_COLUMN_URLS = {
+    "HisTrap FF":
+        "https://www.cytivalifesciences.com/en/de/products/items/histrap-ff-p-00251",
+    "GSTrap 4B":
+        "https://www.cytivalifesciences.com/en/de/products/items/gstrap-4b-columns-p-00307",
+    "Strep-Tactin Sepharose":
+        "https://www.cytivalifesciences.com/en/de/products/items/strep-tactin-xt-4flow-p-08318",
+    "HiTrap Q HP":
+        "https://www.cytivalifesciences.com/en/de/products/items/hitrap-q-hp-anion-exchange-chromatography-column-p-00607",
+    "HiTrap SP HP":
+        "https://www.cytivalifesciences.com/en/de/products/items/hitrap-sp-hp-cation-exchange-chromatography-column-p-00794",
+    "Superdex 75 Increase 10/300 GL":
+        "https://www.cytivalifesciences.com/en/de/products/items/superdex-75-increase-p-06188",
+    "Superdex 200 Increase 10/300 GL":
+        "https://www.cytivalifesciences.com/en/de/products/items/superdex-200-increase-small-scale-size-exclusion-chromatography-columns-p-06190",
+}
+
+RULE_FIELDS = [
+    "kind", "priority", "tag", "lo", "hi", "lo_inclusive", "hi_inclusive",
+    "label", "column_name",
+]
+
+# kind: "tag" (Tag enthaelt tag), "pi" bzw. "mw" (Intervall [lo, hi], None = offen).
+# Eine pi/mw-Regel ohne lo und hi ist der Default (auch fuer fehlende Werte).
+DEFAULT_RULES = [
+    ("tag", 10, "His", None, None, 0, 0, "HisTrap FF (IMAC, Ni-NTA)", "HisTrap FF"),
+    ("tag", 20, "GST", None, None, 0, 0, "GSTrap 4B (Affinity)", "GSTrap 4B"),
+    ("tag", 30, "Strep", None, None, 0, 0, "Strep-Tactin Sepharose (Affinity)", "Strep-Tactin Sepharose"),
+    ("pi", 10, None, None, 7.0, 0, 0, "HiTrap Q HP (Anion exchange)", "HiTrap Q HP"),
+    ("pi", 20, None, 7.0, None, 0, 0, "HiTrap SP HP (Cation exchange)", "HiTrap SP HP"),
+    ("pi", 90, None, None, None, 0, 0, "Superdex 200 Increase (SEC)", "Superdex 200 Increase 10/300 GL"),
+    ("mw", 10, None, None, 70.0, 0, 1, "Superdex 75 Increase (SEC polishing)", "Superdex 75 Increase 10/300 GL"),
+    ("mw", 20, None, 70.0, None, 0, 0, "Superdex 200 Increase (SEC polishing)", "Superdex 200 Increase 10/300 GL"),
+]
+
+Column = namedtuple("Column", ["label", "url", "name", "type", "ph_min", "ph_max"])
+
+
+def _sql_str(value):
+    return "'" + str(value).replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+class IntervalLookup:
+    """Kompilierter Intervall-Lookup: Wert -> Index in labels (oder -1)."""
+
+    def __init__(self, rules):
+        ranged = [r for r in rules if r["lo"] is not None or r["hi"] is not None]
+        defaults = [r for r in rules if r["lo"] is None and r["hi"] is None]
+        self.default = defaults[0]["label"] if defaults else None
+
+        bounds = sorted({b for r in ranged for b in (r["lo"], r["hi"]) if b is not None})
+        self.bounds = bounds
+
+        # Repraesentant je Atom: Mitte offener Intervalle, Grenzwert selbst
+        probes = []
+        for i, b in enumerate(bounds):
+            lo = bounds[i - 1] if i else b - 1.0
+            probes.append((lo + b) / 2.0)
+            probes.append(b)
+        probes.append(bounds[-1] + 1.0 if bounds else 0.0)
+
+        self.atoms = [self._evaluate(ranged, x) for x in probes]
+
+    def _evaluate(self, ranged, x):
+        for r in ranged:
+            lo, hi = r["lo"], r["hi"]
+            if lo is not None and (x < lo or (x == lo and not r["lo_inclusive"])):
+                continue
+            if hi is not None and (x > hi or (x == hi and not r["hi_inclusive"])):
+                continue
+            return r["label"]
+        return self.default
+
+    def lookup(self, x):
+        if x is None:
+            return self.default
+        i = bisect_left(self.bounds, x)
+        exact = i < len(self.bounds) and self.bounds[i] == x
+        return self.atoms[2 * i + (1 if exact else 0)]
+
+    def lookup_array(self, values):
+        """Atom-Index je Wert; NaN ergibt -1 (Default)."""
+        values = np.asarray(values, dtype=float)
+        bounds = np.asarray(self.bounds, dtype=float)
+        idx = np.searchsorted(bounds, values, side="left")
+        if len(bounds):
+            exact = (idx < len(bounds)) & (bounds[np.minimum(idx, len(bounds) - 1)] == values)
+        else:
+            exact = np.zeros(values.shape, dtype=bool)
+        atom = 2 * idx + exact
+        return np.where(np.isnan(values), -1, atom)
+
+    def sql_case(self, column):
+        """CASE-Ausdruck mit identischer Logik fuer die MySQL-View."""
+        parts = [f"WHEN {column} IS NULL THEN {self._sql_label(self.default)}"]
+        for i, b in enumerate(self.bounds):
+            parts.append(f"WHEN {column} < {b!r} THEN {self._sql_label(self.atoms[2 * i])}")
+            parts.append(f"WHEN {column} = {b!r} THEN {self._sql_label(self.atoms[2 * i + 1])}")
+        parts.append(f"ELSE {self._sql_label(self.atoms[-1])}")
+        return parts
+
+    @staticmethod
+    def _sql_label(label):
+        return "NULL" if label is None else _sql_str(label)
+
+    def to_json(self):
+        return {"bounds": self.bounds, "atoms": self.atoms, "default": self.default}
+
+
+class RuleEngine:
+    """Kompilierte Regeln plus aufgeloeste Saeulen-URLs."""
+
+    def __init__(self, rules, columns=()):
+        rules = [dict(zip(RULE_FIELDS, r)) if not isinstance(r, dict) else dict(r) for r in rules]
+        for r in rules:
+            for key in ("lo", "hi"):
+                if r.get(key) is not None:
+                    r[key] = float(r[key])
+        rules.sort(key=lambda r: (r["kind"], r["priority"]))
+        self.rules = rules
+
+        cols = {c["name"]: c for c in columns}
+        self.columns = {}
+        for r in rules:
+            c = cols.get(r["column_name"], {})
+            url = c.get("url") or DEFAULT_COLUMN_URLS.get(r["column_name"]) or \
+                CYTIVA_SEARCH_URL.format(quote_plus(r["label"]))
+            self.columns[r["label"]] = Column(
+                r["label"], url, r["column_name"], c.get("type"), c.get("ph_min"), c.get("ph_max"),
+            )
+
+        self.tag_rules = [(r["tag"], r["label"]) for r in rules if r["kind"] == "tag"]
+        self.pi = IntervalLookup([r for r in rules if r["kind"] == "pi"])
+        self.mw = IntervalLookup([r for r in rules if r["kind"] == "mw"])
+
+        # Feste Nummerierung aller Ergebnis-Labels fuer die vektorisierte Auswertung
+        self.labels = list(self.columns)
+        self._code = {label: i for i, label in enumerate(self.labels)}
+        self._urls = {label: col.url for label, col in self.columns.items()}
+
+    @classmethod
+    def default(cls):
+        return cls(DEFAULT_RULES)
+
+    @property
+    def tags(self):
+        return [tag for tag, _ in self.tag_rules]
+
+    # ---- Einzelauswertung ----
+
+    def match_tag(self, tag):
+        if tag:
+            for needle, label in self.tag_rules:
+                if needle in tag:
+                    return label
+        return None
+
+    def recommend(self, pi, mw, tag=None):
+        """Gibt (primaere Saeule, Polishing-Saeule) als Labels zurueck."""
+        return self.match_tag(tag) or self.pi.lookup(pi), self.mw.lookup(mw)
+
+    def url_for(self, label):
+        if not label:
+            return ""
+        url = self._urls.get(label)
+        if url is None:
+            url = CYTIVA_SEARCH_URL.format(quote_plus(label))
+            self._urls[label] = url
+        return url
+
+    # ---- Vektorisierte Auswertung ----
+
+    def _atom_codes(self, lookup):
+        default = self._code.get(lookup.default, -1)
+        codes = [self._code.get(a, -1) if a is not None else -1 for a in lookup.atoms]
+        # Letzter Eintrag fuer Index -1 (fehlender Wert)
+        return np.array(codes + [default], dtype=np.int16)
+
+    def recommend_batch(self, pi, mw, tags):
+        """
+        Wie recommend(), aber fuer ganze Arrays. Gibt zwei Code-Arrays zurueck
+        (Index in self.labels, -1 = keine Empfehlung).
+        """
+        pi = np.array([np.nan if v is None else v for v in pi], dtype=float)
+        mw = np.array([np.nan if v is None else v for v in mw], dtype=float)
+
+        rec = self._atom_codes(self.pi)[self.pi.lookup_array(pi)]
+        pol = self._atom_codes(self.mw)[self.mw.lookup_array(mw)]
+
+        tag_labels = {}
+        tag_codes = np.array(
+            [tag_labels.setdefault(t, self._code.get(self.match_tag(t), -1)) for t in tags],
+            dtype=np.int16,
+        )
+        rec = np.where(tag_codes >= 0, tag_codes, rec)
+        return rec, pol
+
+    # ---- Export fuer andere Konsumenten ----
+
+    def view_sql(self):
+        """CREATE VIEW protein_with_recommendation aus den kompilierten Regeln."""
+        rec_case = [f"WHEN p.tag LIKE {_sql_str('%' + tag + '%')} THEN {_sql_str(label)}"
+                    for tag, label in self.tag_rules]
+        rec_case += self.pi.sql_case("p.pI")
+        pol_case = self.mw.sql_case("p.mw_kda")
+        indent = "\n                "
+        return f"""
+        CREATE VIEW protein_with_recommendation AS
+        SELECT
+            p.*,
+            CASE{indent}{indent.join(rec_case)}
+            END AS recommended_column,
+            CASE{indent}{indent.join(pol_case)}
+            END AS polishing_column
+        FROM protein p;
+        """
+
+    def to_json(self):
+        """Regeln fuer das JavaScript in results.html."""
+        return {
+            "tags": [{"tag": tag, "label": label} for tag, label in self.tag_rules],
+            "pi": self.pi.to_json(),
+            "mw": self.mw.to_json(),
+            "urls": {label: col.url for label, col in self.columns.items()},
+        }
+
+
+def load_rule_engine(conn):
+    """
+    Laedt recommendation_rule und chromatography_column und kompiliert sie.
+    Ohne Regeltabelle (alte Datenbank) werden die Standardregeln benutzt.
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
+        try:
+            cur.execute(
+                f"SELECT {', '.join(RULE_FIELDS)} FROM recommendation_rule ORDER BY kind, priority;"
+            )
+            rules = cur.fetchall()
+        except Exception:
+            rules = []
+        try:
+            cur.execute("SELECT name, type, ph_min, ph_max, url FROM chromatography_column;")
+            columns = cur.fetchall()
+        except Exception:
+            columns = []
+    finally:
+        cur.close()
+    return RuleEngine(rules or DEFAULT_RULES, columns)
@@ -0,0 +1,163 @@
+"""
+Mitschnitt langsamer SQL-Statements (opt-in) fuer App und Import.
+
+SlowQueryLog wird als on_statement-Callback einer metrics.TimedConnection
+benutzt. Jedes Statement ueber threshold Sekunden wird mit Parametern
+geloggt und in einem begrenzten Ringpuffer abgelegt; dazu wird auf derselben
+Verbindung der Ausfuehrungsplan geholt:
+
+- explain="explain"  -- EXPLAIN (Tabellenform, fuer SELECT/INSERT/UPDATE/DELETE/REPLACE)
+- explain="analyze"  -- EXPLAIN ANALYZE fuer SELECT (fuehrt die Abfrage erneut aus!),
+                        sonst wie "explain"
+- explain="off"      -- kein Plan
+
+Damit eine Serie gleicher langsamer Abfragen nicht ebenso viele EXPLAINs
+ausloest, wird je Statement hoechstens alle explain_interval Sekunden ein
+neuer Plan geholt; dazwischen wird der letzte wiederverwendet.
+"""
+import datetime
+import logging
+import threading
+import time
+from collections import deque
+
+from metrics import statement_name
+
+EXPLAIN_MODES = ("off", "explain", "analyze")
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+MAX_PARAM_LENGTH = 200
+MAX_PARAMS = 50
+
+
+def _short(value):
+    text = repr(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + "..."
+
+
+def format_params(params):
+    """Parameter als kurze repr-Strings (fuer Log und JSON); executemany: erster Satz."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: _short(v) for k, v in list(params.items())[:MAX_PARAMS]}
+    params = list(params)
+    if params and isinstance(params[0], (list, tuple)):
+        return [_short(v) for v in list(params[0])[:MAX_PARAMS]] + [f"... {len(params)} Saetze"]
+    return [_short(v) for v in params[:MAX_PARAMS]]
+
+
+def _first_param_set(params):
+    if params is None or isinstance(params, dict):
+        return params
+    params = list(params)
+    if params and isinstance(params[0], (list, tuple)):
+        return tuple(params[0])
+    return tuple(params)
+
+
+class SlowQueryLog:
+    """
+    threshold        -- Sekunden, ab denen ein Statement als langsam gilt
+    max_entries      -- Groesse des Ringpuffers
+    explain          -- "explain", "analyze" oder "off" (s. o.)
+    explain_interval -- Sekunden, in denen ein Plan je Statement wiederverwendet wird
+    log              -- Funktion(text) fuer die Meldung (Default: logging.warning)
+    """
+
+    def __init__(self, threshold=0.5, max_entries=100, explain="explain",
+                 explain_interval=60.0, log=None):
+        if explain not in EXPLAIN_MODES:
+            raise ValueError(f"Unbekannter EXPLAIN-Modus: {explain}")
+        self.threshold = threshold
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self._log = log or logging.getLogger(__name__).warning
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=max_entries)
+        self._plans = {}
+        self.recorded = 0
+
+    def __call__(self, conn, sql, params, seconds, rows):
+        if seconds >= self.threshold:
+            self.record(conn, sql, params, seconds, rows)
+
+    def record(self, conn, sql, params, seconds, rows):
+        name = statement_name(sql)
+        plan, plan_error = self._plan(conn, name, sql, params)
+        entry = {
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "statement": name,
+            "seconds": round(seconds, 6),
+            "rows": rows,
+            "sql": " ".join(sql.split()),
+            "params": format_params(params),
+            "explain": plan,
+            "explain_error": plan_error,
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        self._log(
+            f"Langsame Abfrage ({seconds * 1000:.1f} ms, {rows} Zeilen) {name}: "
+            f"{entry['sql'][:500]} -- Parameter: {entry['params']}"
+        )
+        return entry
+
+    def _plan(self, conn, name, sql, params):
+        """(Plan, Fehler) fuer sql; Plan ist eine Liste von Zeilen bzw. Textzeilen."""
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if self.explain == "off" or conn is None or verb not in EXPLAINABLE:
+            return None, None
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(name)
+        if cached is not None and now - cached[0] < self.explain_interval:
+            return cached[1], cached[2]
+
+        analyze = self.explain == "analyze" and verb in ("SELECT", "WITH")
+        plan, error = None, None
+        cur = None
+        try:
+            cur = conn.cursor(dictionary=True)
+            cur.execute(("EXPLAIN ANALYZE " if analyze else "EXPLAIN ") + sql,
+                        _first_param_set(params))
+            rows = cur.fetchall()
+            if analyze:
+                # EXPLAIN ANALYZE liefert eine Spalte mit dem Plan als Baum-Text
+                plan = [line for row in rows for value in row.values()
+                        for line in str(value).splitlines()]
+            else:
+                plan = [dict(row) for row in rows]
+        except Exception as err:
+            error = str(err)
+        finally:
+            if cur is not None:
+                try:
+                    cur.close()
+                except Exception:
+                    pass
+
+        with self._lock:
+            self._plans[name] = (now, plan, error)
+        return plan, error
+
+    def entries(self):
+        """Neueste zuerst."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threshold_seconds": self.threshold,
+                "explain": self.explain,
+                "max_entries": self._entries.maxlen,
+                "entries": len(self._entries),
+                "recorded": self.recorded,
+            }
@@ -0,0 +1,342 @@
+"""
+Read-only-Snapshot des Katalogs als SQLite-Datei: Export beim Import,
+Auslieferung durch die App ganz ohne MySQL (z. B. auf Edge-Instanzen).
+
+export_snapshot() kopiert protein, structure, chromatography_column, die Regel-,
+Versions- und Statistiktabellen sowie die View protein_with_recommendation
+(als Tabelle materialisiert) in eine neue SQLite-Datei. Dazu kommen die Indizes
+der App-Abfragen und eine FTS5-Tabelle protein_fts ueber name/gene_name/organism.
+Fertig geschrieben wird die Zieldatei per os.replace ersetzt; das ist zugleich
+die Veroeffentlichung (auf Edge-Instanzen ebenso: Datei neben das Ziel kopieren,
+dann umbenennen).
+
+SnapshotDatabase oeffnet die Datei read-only und memory-mapped. Verbindungen und
+Cursor verhalten sich wie die von mysql.connector (%s-Platzhalter,
+dictionary=True, column_names, Fehler als mysql.connector.Error), damit die
+Abfragen der App unveraendert laufen; nur der Volltext braucht eine eigene
+Variante (FTS5 statt MATCH ... AGAINST). Wird eine neue Datei veroeffentlicht,
+bekommen neue Anfragen Verbindungen auf die neue Datei, laufende lesen die alte
+(noch offene) Datei zu Ende.
+"""
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from decimal import Decimal
+from functools import lru_cache
+
+import mysql.connector
+
+# (Tabelle im Snapshot, Quelle in MySQL)
+SNAPSHOT_TABLES = [
+    ("protein", "protein"),
+    ("structure", "structure"),
+    ("chromatography_column", "chromatography_column"),
+    ("recommendation_rule", "recommendation_rule"),
+    ("catalog_version", "catalog_version"),
+    ("catalog_stats", "catalog_stats"),
+    ("protein_with_recommendation", "protein_with_recommendation"),
+]
+
+# Indizes fuer die Abfragen aus app.py (Suche, Filter, Facetten, Detailseite)
+_PROTEIN_INDEXES = [
+    ("uniprot", "uniprot_id"),
+    ("name_key", "name_key, id"),
+    ("gene", "gene_name"),
+    ("pi", "pI"),
+    ("mw", "mw_kda"),
+    ("organism", "organism"),
+    ("tag", "tag"),
+]
+SNAPSHOT_INDEXES = {
+    "protein": _PROTEIN_INDEXES,
+    "protein_with_recommendation": _PROTEIN_INDEXES,
+    "structure": [("protein", "protein_id")],
+    "catalog_stats": [("version", "version")],
+}
+
+FTS_TABLE = "protein_fts"
+FTS_COLUMNS = ["name", "gene_name", "organism"]
+
+
+class SnapshotError(mysql.connector.DatabaseError):
+    """Snapshot fehlt, ist beschaedigt oder eine Abfrage darauf schlug fehl."""
+
+
+# ============================================
+# Export (import_data.py)
+# ============================================
+
+def _snapshot_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    if isinstance(value, (bytearray, memoryview)):
+        return bytes(value)
+    return value
+
+
+def _copy_table(conn, lite, name, source, batch_size):
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT * FROM {source};")
+        columns = list(cur.column_names)
+        quoted = [f'"{c}"' for c in columns]
+        # id als INTEGER PRIMARY KEY = rowid (schneller Lookup, content_rowid fuer FTS5)
+        defs = [f"{q} INTEGER PRIMARY KEY" if c == "id" else q for c, q in zip(columns, quoted)]
+        lite.execute(f'CREATE TABLE "{name}" ({", ".join(defs)});')
+        insert = (f'INSERT INTO "{name}" ({", ".join(quoted)}) '
+                  f'VALUES ({", ".join(["?"] * len(columns))});')
+        copied = 0
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            lite.executemany(insert, [tuple(_snapshot_value(v) for v in row) for row in rows])
+            copied += len(rows)
+    finally:
+        cur.close()
+    return copied
+
+
+def export_snapshot(conn, path, tables=SNAPSHOT_TABLES, batch_size=5000):
+    """
+    Schreibt den Snapshot nach path (atomar ersetzt). conn ist eine
+    MySQL-Verbindung auf die Katalog-Datenbank. Gibt {tabelle: zeilen} zurueck.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".sqlite.tmp")
+    os.close(fd)
+    counts = {}
+    lite = None
+    try:
+        lite = sqlite3.connect(tmp, isolation_level=None)
+        lite.execute("PRAGMA journal_mode=OFF;")
+        lite.execute("PRAGMA synchronous=OFF;")
+        lite.execute("BEGIN;")
+        for name, source in tables:
+            counts[name] = _copy_table(conn, lite, name, source, batch_size)
+        for table, indexes in SNAPSHOT_INDEXES.items():
+            if table not in counts:
+                continue
+            for suffix, columns in indexes:
+                lite.execute(f'CREATE INDEX "idx_{table}_{suffix}" ON "{table}" ({columns});')
+        if "protein" in counts:
+            lite.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"{', '.join(FTS_COLUMNS)}, content='protein', content_rowid='id', prefix='2 3');"
+            )
+            lite.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild');")
+            lite.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize');")
+        lite.execute("COMMIT;")
+        lite.execute("ANALYZE;")
+        lite.execute("VACUUM;")
+        lite.close()
+        lite = None
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        if lite is not None:
+            lite.close()
+        os.unlink(tmp)
+        raise
+    return counts
+
+
+# ============================================
+# Auslieferung (app.py)
+# ============================================
+
+@lru_cache(maxsize=512)
+def translate_sql(sql):
+    """MySQL-Schreibweise der App-Abfragen -> SQLite (Platzhalter, EXPLAIN)."""
+    sql = sql.replace("%s", "?")
+    stripped = sql.lstrip()
+    for prefix in ("EXPLAIN ANALYZE ", "EXPLAIN "):
+        if stripped.upper().startswith(prefix):
+            return "EXPLAIN QUERY PLAN " + stripped[len(prefix):]
+    return sql
+
+
+def _substring_index(value, delim, count):
+    """MySQL SUBSTRING_INDEX (wird u. a. fuer den Gen-Symbol-Rang gebraucht)."""
+    if value is None or delim is None or count is None:
+        return None
+    parts = str(value).split(delim)
+    if count >= 0:
+        return delim.join(parts[:count])
+    return delim.join(parts[count:])
+
+
+def _unix_timestamp(value):
+    if value is None:
+        return None
+    try:
+        return int(datetime.datetime.fromisoformat(str(value)).timestamp())
+    except ValueError:
+        return None
+
+
+def fulltext_match_query(words):
+    """FTS5-Abfrage: jedes Wort als Praefix, alle muessen vorkommen."""
+    return " ".join(f'"{w}"*' for w in words)
+
+
+class SnapshotCursor:
+    """Cursor mit der Oberflaeche von mysql.connector (Tupel oder dictionary)."""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+        self.column_names = ()
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, sql, params=None):
+        try:
+            self._cursor.execute(translate_sql(sql), tuple(params) if params else ())
+        except sqlite3.Error as err:
+            raise SnapshotError(msg=str(err)) from err
+        description = self._cursor.description
+        self.column_names = tuple(d[0] for d in description) if description else ()
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip(self.column_names, row))
+
+    def _fetch(self, method, *args):
+        # SQLite liest Zeilen erst beim Abholen, Fehler koennen also auch hier kommen
+        try:
+            return method(*args)
+        except sqlite3.Error as err:
+            raise SnapshotError(msg=str(err)) from err
+
+    def fetchone(self):
+        return self._row(self._fetch(self._cursor.fetchone))
+
+    def fetchmany(self, size=1):
+        return [self._row(r) for r in self._fetch(self._cursor.fetchmany, size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self._fetch(self._cursor.fetchall)]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SnapshotConnection:
+    """
+    Verbindung auf eine Snapshot-Generation. close() ist ein No-op: die
+    Verbindung gehoert dem Thread und wird von SnapshotDatabase wiederverwendet;
+    geschlossen wird sie erst, wenn sie nach einem Wechsel nicht mehr referenziert ist.
+    """
+
+    def __init__(self, conn, generation):
+        self._conn = conn
+        self.generation = generation
+
+    def cursor(self, dictionary=False, **kwargs):
+        return SnapshotCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SnapshotDatabase:
+    """
+    path           -- Snapshot-Datei (wird bei Veroeffentlichung per rename ersetzt)
+    mmap_size      -- Bytes, die SQLite per mmap statt read() liest
+    check_interval -- Sekunden zwischen zwei Pruefungen auf eine neue Datei
+    """
+
+    def __init__(self, path, mmap_size=1 << 30, check_interval=2.0):
+        self.path = path
+        self.mmap_size = mmap_size
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._signature = None
+        self._checked_at = 0.0
+        self.generation = 0
+        self.swaps = 0
+        self.opened = 0
+        self.published_at = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError as err:
+            raise SnapshotError(msg=f"Snapshot nicht verfuegbar: {err}")
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _current_generation(self):
+        now = time.monotonic()
+        if self._signature is not None and now - self._checked_at < self.check_interval:
+            return self.generation
+        signature = self._stat()
+        with self._lock:
+            if signature != self._signature:
+                if self._signature is not None:
+                    self.swaps += 1
+                self._signature = signature
+                self.generation += 1
+                self.published_at = signature[1] / 1e9
+            self._checked_at = now
+            return self.generation
+
+    def _open(self, generation):
+        uri = "file:" + os.path.abspath(self.path) + "?mode=ro&immutable=1"
+        try:
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)};")
+            conn.execute("PRAGMA query_only=1;")
+        except sqlite3.Error as err:
+            raise SnapshotError(msg=f"Snapshot nicht lesbar: {err}") from err
+        conn.create_function("SUBSTRING_INDEX", 3, _substring_index, deterministic=True)
+        conn.create_function("UNIX_TIMESTAMP", 1, _unix_timestamp, deterministic=True)
+        with self._lock:
+            self.opened += 1
+        return SnapshotConnection(conn, generation)
+
+    def connect(self):
+        """Verbindung des aktuellen Threads auf die neueste Snapshot-Datei."""
+        generation = self._current_generation()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and conn.generation == generation:
+            return conn
+        # Die alte Verbindung nicht schliessen: ein noch offener Cursor dieses
+        # Threads (z. B. ein laufender Export) liest die alte Datei zu Ende
+        self._local.conn = conn = self._open(generation)
+        return conn
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mode": "snapshot",
+                "path": self.path,
+                "generation": self.generation,
+                "swaps": self.swaps,
+                "connections_opened": self.opened,
+                "published_at": self.published_at,
+                "mmap_size": self.mmap_size,
+            }
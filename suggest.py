@@ -0,0 +1,107 @@
+"""
+In-Process-Praefixindex fuer die Suche-waehrend-der-Eingabe (/api/suggest).
+
+Der Index haelt alle Schluessel (Accession, Gen-Symbole inkl. Synonyme,
+Proteinnamen) kleingeschrieben in einem sortierten Array. Fuer kurze Praefixe
+(bis HEAD_DEPTH Zeichen), deren Trefferbereich sehr gross sein kann, sind die
+Top-k-Ergebnisse beim Aufbau vorberechnet; laengere Praefixe werden per
+Binaersuche auf einen kleinen Bereich eingegrenzt.
+"""
+import heapq
+import re
+from bisect import bisect_left
+
+# Rangfolge der Treffer-Arten (kleiner = weiter vorne)
+KIND_RANK = {"accession": 0, "gene": 1, "synonym": 2, "name": 3}
+
+HEAD_DEPTH = 3
+MAX_SCAN = 5000
+MAX_KEY_LEN = 64
+
+
+def _name_variants(name):
+    """Empfohlener Name plus Alternativnamen aus den UniProt-Klammern."""
+    if not name:
+        return []
+    variants = []
+    main = name.split(" (", 1)[0].strip()
+    if main:
+        variants.append(main)
+    for alt in re.findall(r"\(([^()]+)\)", name):
+        alt = alt.strip()
+        # EC-Nummern sind keine sinnvollen Vorschlaege
+        if alt and not alt.startswith("EC "):
+            variants.append(alt)
+    return variants
+
+
+class PrefixIndex:
+    """Unveraenderlicher Praefixindex; wird bei neuer Datenversion komplett ersetzt."""
+
+    def __init__(self, rows, top_k=10):
+        self.top_k = top_k
+        # entries[i] = (score, label, kind, protein_id, uniprot_id)
+        entries = []
+        for row in rows:
+            pid = row.get("id")
+            acc = row.get("uniprot_id")
+            if acc:
+                entries.append(((KIND_RANK["accession"], len(acc)), acc, "accession", pid, acc))
+            genes = (row.get("gene_name") or "").split()
+            for i, gene in enumerate(genes):
+                kind = "gene" if i == 0 else "synonym"
+                entries.append(((KIND_RANK[kind], len(gene)), gene, kind, pid, acc))
+            for label in _name_variants(row.get("name")):
+                entries.append(((KIND_RANK["name"], len(label)), label, "name", pid, acc))
+
+        entries.sort(key=lambda e: (e[0], e[1].lower()))
+        self._entries = entries
+
+        keyed = sorted(
+            (e[1].lower()[:MAX_KEY_LEN], idx) for idx, e in enumerate(entries)
+        )
+        self._keys = [k for k, _ in keyed]
+        self._ids = [idx for _, idx in keyed]
+
+        # Vorberechnete Top-k fuer kurze Praefixe; entries ist bereits nach
+        # Score sortiert, die ersten k je Praefix sind also die besten.
+        head = {}
+        for idx, e in enumerate(entries):
+            key = e[1].lower()
+            for depth in range(1, min(HEAD_DEPTH, len(key)) + 1):
+                bucket = head.setdefault(key[:depth], [])
+                if len(bucket) < top_k * 2:
+                    bucket.append(idx)
+        self._head = head
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _format(self, indices, limit):
+        out = []
+        seen = set()
+        for idx in indices:
+            _, label, kind, pid, acc = self._entries[idx]
+            dedupe = label.lower()
+            if dedupe in seen:
+                continue
+            seen.add(dedupe)
+            out.append({"label": label, "kind": kind, "id": pid, "uniprot_id": acc})
+            if len(out) >= limit:
+                break
+        return out
+
+    def suggest(self, prefix, limit=None):
+        limit = min(limit or self.top_k, self.top_k)
+        prefix = (prefix or "").strip().lower()[:MAX_KEY_LEN]
+        if not prefix:
+            return []
+
+        if len(prefix) <= HEAD_DEPTH:
+            return self._format(self._head.get(prefix, ()), limit)
+
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + "￿", lo)
+        candidates = self._ids[lo:min(hi, lo + MAX_SCAN)]
+        # Indizes in entries entsprechen der Score-Reihenfolge
+        return self._format(heapq.nsmallest(limit * 2, candidates), limit)
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Kein Hintergrund-Aufbau des Typeahead-Index gegen eine echte Datenbank
+os.environ.setdefault("SUGGEST_PRELOAD", "0")
+
+import app as app_module  # noqa: E402
+
+
+PROTEIN_ROW = {
+    "id": 1, "uniprot_id": "P00533", "name": "Epidermal growth factor receptor",
+    "gene_name": "EGFR", "organism": "Homo sapiens", "tag": None, "pI": 6.26,
+    "mw_kda": 134.2, "name_key": "Epidermal growth factor receptor",
+    "recommended_column": None, "polishing_column": None,
+}
+
+
+class FakeCursor:
+    """Minimaler Cursor: beantwortet die Abfragen der App mit festen Zeilen."""
+
+    def __init__(self, db, dictionary):
+        self.db = db
+        self.dictionary = dictionary
+        self.sql = ""
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+        self.db.queries.append((sql, params))
+
+    def fetchone(self):
+        if "catalog_version" in self.sql and "UNIX_TIMESTAMP" not in self.sql:
+            return {"version": 1} if self.dictionary else (1,)
+        if "UNIX_TIMESTAMP" in self.sql:
+            return (1700000000,)
+        if "MIN(pI)" in self.sql:
+            return {"pi_min": 4.0, "pi_max": 11.0, "mw_min": 5.0, "mw_max": 300.0}
+        return None
+
+    def fetchall(self):
+        if "FROM protein" in self.sql and "IN (" in self.sql:
+            return [dict(r) for r in self.db.proteins]
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self.db, dictionary)
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = []
+        self.proteins = [dict(PROTEIN_ROW)]
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr(app_module, "get_db_connection", db.connect)
+    app_module.catalog_cache.invalidate()
+    app_module.response_cache.clear()
+    return db
+
+
+@pytest.fixture
+def client(fake_db):
+    return app_module.app.test_client()
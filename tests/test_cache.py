@@ -0,0 +1,68 @@
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from cache import ResponseCache, dumps_value, loads_value
+
+PAGE = {
+    "rows": [{
+        "id": 1, "uniprot_id": "P00533", "pI": Decimal("6.26"), "mw_kda": 134.2, "tag": None,
+        "updated_at": datetime.datetime(2024, 5, 1, 12, 30, 5), "released": datetime.date(2020, 1, 2),
+        "raw": b"\x00\xff",
+    }],
+    "next_cursor": None,
+    "facets": {"pi": [{"from": None, "to": 5.0, "count": 3}], "has_structure": {"true": 1, "false": 2}},
+    "ranges": {"pi_min": Decimal("4.05"), "pi_max": Decimal("12.00")},
+}
+
+
+@pytest.mark.parametrize("value", [
+    PAGE,
+    "<html>gerenderte Seite</html>",
+    ("search", 3, "egfr", (("pi_min", 5.0),), None, 50, True),
+    {("page", 1): [1, (2, 3)], "x": 1},
+    {"__tuple__": "kein Marker"},
+    [],
+])
+def test_json_roundtrip_keeps_types(value):
+    assert loads_value(dumps_value(value)) == value
+    restored = loads_value(dumps_value(value))
+    if isinstance(value, dict) and "rows" in value:
+        row = restored["rows"][0]
+        assert isinstance(row["pI"], Decimal)
+        assert isinstance(row["updated_at"], datetime.datetime)
+        assert isinstance(row["raw"], bytes)
+
+
+def test_pickle_payload_is_not_executed():
+    import pickle
+
+    class Backend(dict):
+        def get(self, key):
+            return pickle.dumps(object())
+
+        def set(self, key, value):
+            pass
+
+    cache = ResponseCache(4, backend=Backend())
+    assert cache.get_or_compute("k", lambda: "frisch") == "frisch"
+    assert cache.backend_errors == 1
+
+
+def test_backend_receives_json():
+    class Backend(dict):
+        def get(self, key):
+            return dict.get(self, key)
+
+        def set(self, key, value):
+            self[key] = value
+
+    backend = Backend()
+    first = ResponseCache(4, backend=backend)
+    first.get_or_compute(("search", 1), lambda: PAGE)
+    (stored,) = backend.values()
+    assert stored.startswith(b"{")
+    second = ResponseCache(4, backend=backend)
+    assert second.get_or_compute(("search", 1), lambda: pytest.fail("nicht neu rechnen")) == PAGE
+    assert second.backend_hits == 1
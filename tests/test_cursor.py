@@ -0,0 +1,52 @@
+import base64
+import json
+
+import pytest
+
+import app as app_module
+
+
+def raw_cursor(data):
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def test_roundtrip():
+    cursor = app_module.encode_cursor("name", ["Kinase", 42])
+    assert app_module.decode_cursor(cursor, "name") == ["Kinase", 42]
+    cursor = app_module.encode_cursor("ft", [2, 1.5, 7])
+    assert app_module.decode_cursor(cursor, "ft") == [2, 1.5, 7]
+
+
+@pytest.mark.parametrize("mode, key", [
+    ("name", ["a"]),                # zu kurz
+    ("name", []),                   # leer
+    ("name", ["a", 1, 2]),          # zu lang
+    ("name", [1, "a"]),             # falsche Typen
+    ("name", ["a", True]),          # bool ist keine id
+    ("ft", []),
+    ("ft", [2, 1.5]),
+    ("ft", ["2", 1.5, 7]),
+    ("ft", [2, "x", 7]),
+])
+def test_wrong_key_shape_is_rejected(mode, key):
+    with pytest.raises(app_module.InvalidCursor):
+        app_module.decode_cursor(raw_cursor({"m": mode, "k": key}), mode)
+
+
+def test_non_finite_relevance_is_rejected():
+    cursor = base64.urlsafe_b64encode(b'{"m":"ft","k":[2,NaN,7]}').decode("ascii")
+    with pytest.raises(app_module.InvalidCursor):
+        app_module.decode_cursor(cursor, "ft")
+
+
+@pytest.mark.parametrize("key", [["a"], []])
+def test_api_returns_400_for_bad_cursor(client, key):
+    resp = client.get("/api/proteins", query_string={"cursor": raw_cursor({"m": "name", "k": key})})
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+def test_api_returns_400_for_short_key_from_review(client):
+    resp = client.get("/api/proteins?cursor=eyJtIjoibmFtZSIsImsiOlsiYSJdfQ")
+    assert resp.status_code == 400
@@ -0,0 +1,32 @@
+import pytest
+
+import app as app_module
+
+ENDPOINTS = ["/api/cache", "/api/pool", "/metrics", "/debug/slow-queries"]
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    monkeypatch.setattr(app_module, "slow_query_log", app_module.SlowQueryLog(threshold=0.0))
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_off_by_default(client, slow_log, path):
+    assert app_module.DEBUG_ENDPOINTS is False
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_enabled_without_token(client, slow_log, monkeypatch, path):
+    monkeypatch.setattr(app_module, "DEBUG_ENDPOINTS", True)
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", "")
+    assert client.get(path).status_code == 200
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_token_required(client, slow_log, monkeypatch, path):
+    monkeypatch.setattr(app_module, "DEBUG_ENDPOINTS", True)
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", "s3cret")
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer s3cret"}).status_code == 200
@@ -0,0 +1,54 @@
+import mysql.connector
+import pytest
+
+import app as app_module
+from db import ConnectionPool
+
+ROW = {"id": 1, "uniprot_id": "P00533", "pI": 6.26, "mw_kda": 134.2, "tag": None}
+
+
+class UnreadCursor:
+    """Ungepufferter Cursor, dessen close() bei ungelesenen Zeilen wirft."""
+
+    column_names = tuple(ROW)
+
+    def __init__(self):
+        self.read = 0
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchmany(self, size=1):
+        self.read += size
+        return [dict(ROW) for _ in range(size)]
+
+    def close(self):
+        raise mysql.connector.errors.InternalError(msg="Unread result found")
+
+
+class UnreadConnection:
+    in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return UnreadCursor()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ConnectionPool(UnreadConnection, pool_size=1, max_overflow=0, pre_ping=False, timeout=0.1)
+    monkeypatch.setattr(app_module, "get_db_connection", pool.connect)
+    monkeypatch.setattr(app_module, "get_rule_engine", lambda conn=None: None)
+    monkeypatch.setattr(app_module, "compute_recommendation_row", lambda row, tag_choice=None: {})
+    return pool
+
+
+def test_aborted_export_returns_connection_to_pool(pool):
+    for _ in range(3):
+        body = app_module._export_ndjson(app_module.iter_export_rows(batch_size=2))
+        assert next(body).startswith("{")
+        with pytest.raises(mysql.connector.errors.InternalError):
+            body.close()
+        assert pool.stats()["in_use"] == 0
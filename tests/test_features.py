@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+import app as app_module
+from features import FeatureCache, cached_pis, sequence_checksum
+
+SEQUENCE = "MKVLAAGIVGLLLAQPAMA"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = FeatureCache(str(tmp_path / "features.sqlite"))
+    cache._conn.execute("PRAGMA busy_timeout=0;")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def locked(cache):
+    """Zweite Verbindung, die die Datei fuer Schreiber sperrt."""
+    other = sqlite3.connect(cache.path, isolation_level=None, timeout=0)
+    other.execute("BEGIN EXCLUSIVE;")
+    yield other
+    other.execute("ROLLBACK;")
+    other.close()
+
+
+def test_locked_cache_is_skipped(cache, locked):
+    pis = cached_pis([SEQUENCE], cache, compute=lambda seqs: [6.5] * len(seqs))
+    assert pis == [6.5]
+    assert cache.errors >= 1
+    assert cache.misses == 1
+
+
+def test_cache_works_again_after_lock(cache):
+    cache.put_many({sequence_checksum(SEQUENCE): {"pI": 6.5}})
+    assert cache.get_many([sequence_checksum(SEQUENCE)])[sequence_checksum(SEQUENCE)]["pI"] == 6.5
+    assert cache.errors == 0
+
+
+@pytest.mark.parametrize("body", [[SEQUENCE], SEQUENCE, 5])
+def test_analyze_rejects_non_object_body(client, body):
+    resp = client.post("/api/analyze", json=body)
+    assert resp.status_code == 400
+    assert "JSON-Objekt" in resp.get_json()["error"]
+
+
+def test_analyze_with_locked_cache(client, monkeypatch, cache, locked):
+    monkeypatch.setattr(app_module, "get_feature_cache", lambda: cache)
+    resp = client.post("/api/analyze", json={"sequences": [SEQUENCE]})
+    assert resp.status_code == 200
+    assert resp.get_json()["count"] == 1
@@ -0,0 +1,21 @@
+import pytest
+
+import app as app_module
+
+
+@pytest.mark.parametrize("raw", ["nan", "NaN", "inf", "-inf", "Infinity", "1e400"])
+def test_non_finite_bounds_are_rejected(raw):
+    with pytest.raises(app_module.InvalidFilter):
+        app_module.parse_filters({"pi_min": raw})
+
+
+def test_finite_bounds_are_parsed():
+    filters = app_module.parse_filters({"pi_min": " 5.5 ", "mw_max": "120", "organism": ""})
+    assert filters == {"pi_min": 5.5, "mw_max": 120.0}
+
+
+def test_api_returns_400_for_nan_filter(client, fake_db):
+    resp = client.get("/api/proteins?pi_max=nan")
+    assert resp.status_code == 400
+    assert "endliche Zahl" in resp.get_json()["error"]
+    assert not any("FROM protein" in sql for sql, _ in fake_db.queries)
@@ -0,0 +1,50 @@
+import import_data
+
+
+class NullCursor:
+    rowcount = 0
+
+    def execute(self, sql, params=None):
+        pass
+
+    def executemany(self, sql, params):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullConnection:
+    def cursor(self, *args, **kwargs):
+        return NullCursor()
+
+    def commit(self):
+        pass
+
+
+def protein(n):
+    return {"Entry": f"P{n:05d}", "Protein names": f"Protein {n}", "Sequence": "MKVLAAGIVGLLLA"}
+
+
+def test_rejected_numpy_solver_stays_rejected_for_all_batches(monkeypatch):
+    solvers = []
+    checks = []
+
+    def fake_validate(sequences):
+        checks.append(len(sequences))
+        return 0.5, 1
+
+    def fake_compute_pis(sequences, solver="numpy", **kwargs):
+        solvers.append(solver)
+        return [7.0] * len(sequences)
+
+    monkeypatch.setattr(import_data, "validate_pi_solver", fake_validate)
+    monkeypatch.setattr(import_data, "compute_pis", fake_compute_pis)
+    monkeypatch.setattr(import_data, "open_feature_cache", lambda: None)
+    monkeypatch.setattr(import_data, "make_executor", lambda workers=None: None)
+
+    import_data.insert_proteins(NullConnection(), (protein(n) for n in range(10)), batch_size=3,
+                                write_mode="multirow", incremental=False)
+
+    assert len(checks) == 1
+    assert solvers == ["biopython"] * 4
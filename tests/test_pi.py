@@ -0,0 +1,72 @@
+import pytest
+
+import features
+from features import compute_pi_batch, compute_pis
+
+ProtParam = pytest.importorskip("Bio.SeqUtils.ProtParam")
+
+SEQUENCES = [
+    "MKVLAAGIVGLLLAQPAMA",
+    "mkvlaagivgllla",                  # Kleinbuchstaben
+    "MKV LAA\nGIV GLL",                # Leerzeichen und Zeilenumbrueche
+    "  mkvl a",                        # nach dem Bereinigen genau 5 Reste
+    "MKVXBZUOJAAGIV",                  # nicht-standard Buchstaben
+    "XXXXXXXXXX",
+    "ACDEFGHIKLMNPQRSTVWY" * 3,
+    "DDDDEEEECC",
+    "KKKKRRRRHHH",
+    "",                                # leer
+    "MKV",                             # zu kurz
+]
+
+
+def reference_pi(sequence):
+    seq = sequence.replace(" ", "").replace("\n", "")
+    if len(seq) < features.MIN_SEQUENCE_LENGTH:
+        return None
+    return ProtParam.ProteinAnalysis(seq).isoelectric_point()
+
+
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_batch_matches_biopython(sequence):
+    expected = reference_pi(sequence)
+    (actual,) = compute_pi_batch([sequence])
+    if expected is None:
+        assert actual is None
+    else:
+        assert actual == pytest.approx(expected, abs=1e-3)
+
+
+def test_batch_matches_biopython_mixed():
+    expected = [reference_pi(s) for s in SEQUENCES]
+    actual = compute_pi_batch(SEQUENCES)
+    assert [a is None for a in actual] == [e is None for e in expected]
+    for a, e in zip(actual, expected):
+        if e is not None:
+            assert a == pytest.approx(e, abs=1e-3)
+
+
+class RecordingExecutor:
+    """Fuehrt map im aktuellen Prozess aus und merkt sich die Chunk-Groessen."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def map(self, fn, items):
+        items = list(items)
+        self.chunks = [len(chunk) for _, chunk in items]
+        return [fn(item) for item in items]
+
+
+def test_batch_is_split_across_all_workers():
+    executor = RecordingExecutor()
+    pis = compute_pis(["MKVLAAGIV"] * 1000, workers=8, chunk_size=500, executor=executor)
+    assert len(pis) == 1000
+    assert executor.chunks == [125] * 8
+
+
+def test_small_batch_runs_without_pool():
+    executor = RecordingExecutor()
+    pis = compute_pis(["MKVLAAGIV"] * 20, workers=8, chunk_size=500, executor=executor)
+    assert len(pis) == 20
+    assert executor.chunks == []
@@ -0,0 +1,82 @@
+import mysql.connector
+import pytest
+from mysql.connector import errorcode
+
+import migrations
+
+SAMPLE = {
+    "id": 7, "uniprot_id": "P00533", "gene_name": "EGFR ERBB1", "organism": "Homo sapiens",
+    "name_key": "epidermal growth factor receptor", "pI": 6.26, "mw_kda": 134.2,
+}
+
+
+class PlanCursor:
+    """Cursor fuer check_query_plans: liefert pro EXPLAIN einen festen Plan."""
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.sql = ""
+        self.explained = []
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+        if sql.startswith("EXPLAIN "):
+            self.explained.append(params)
+
+    def fetchone(self):
+        if "COUNT(*) AS n" in self.sql:
+            return {"n": 5000}
+        return dict(SAMPLE)
+
+    def fetchall(self):
+        return [dict(row) for row in self.plan]
+
+    def close(self):
+        pass
+
+
+class PlanConnection:
+    def __init__(self, plan):
+        self.cur = PlanCursor(plan)
+
+    def cursor(self, dictionary=False):
+        return self.cur
+
+
+def test_derived_tables_may_be_scanned():
+    conn = PlanConnection([
+        {"table": "<derived2>", "type": "ALL"},
+        {"table": "p", "type": "eq_ref"},
+    ])
+    assert migrations.check_query_plans(conn) == []
+    assert ("P00533", "EGFR ERBB1", "P00533", "+EGFR*", "+EGFR*") in conn.cur.explained
+
+
+def test_full_scan_on_base_table_fails():
+    conn = PlanConnection([{"table": "protein", "type": "ALL"}])
+    with pytest.raises(migrations.QueryPlanError, match="Full Table Scan auf protein"):
+        migrations.check_query_plans(conn)
+
+
+def test_checks_cover_fulltext_and_facets():
+    names = {name for name, _, _ in migrations.EXPLAIN_CHECKS}
+    assert {"fulltext_page", "search_facets", "keyset_page_filtered"} <= names
+
+
+class NoViewCursor(PlanCursor):
+    """Erster Import: protein hat Zeilen, die View gibt es noch nicht."""
+
+    def execute(self, sql, params=()):
+        if sql.startswith("EXPLAIN ") and "protein_with_recommendation" in sql:
+            raise mysql.connector.ProgrammingError(
+                msg="Table 'protein_with_recommendation' doesn't exist",
+                errno=errorcode.ER_NO_SUCH_TABLE,
+            )
+        super().execute(sql, params)
+
+
+def test_missing_view_is_skipped():
+    conn = PlanConnection([{"table": "protein", "type": "ref"}])
+    conn.cur = NoViewCursor(conn.cur.plan)
+    assert migrations.check_query_plans(conn) == []
+    assert conn.cur.explained
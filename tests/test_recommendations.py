@@ -0,0 +1,38 @@
+import pytest
+
+
+def post(client, body, raw=False):
+    if raw:
+        return client.post("/api/recommendations", data=body, content_type="application/json")
+    return client.post("/api/recommendations", json=body)
+
+
+@pytest.mark.parametrize("body", [
+    [1, 2],
+    "items",
+    {"items": [], "tag": 5},
+    {"items": [{"tag": 5}]},
+    {"items": [{"id": True}]},
+    {"items": [{"id": "1"}]},
+    {"items": [{"pI": True}]},
+    {"items": [{"pI": "inf"}]},
+])
+def test_wrong_types_are_rejected(client, fake_db, body):
+    resp = post(client, body)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+    assert not fake_db.queries
+
+
+def test_non_finite_pi_is_rejected(client):
+    resp = post(client, '{"items": [{"pI": 1e400}]}', raw=True)
+    assert resp.status_code == 400
+
+
+def test_valid_items(client):
+    resp = post(client, {"items": [{"pI": 5.0, "mw_kda": 40}, {"id": 1}, {"pI": "abc"}], "tag": "His"})
+    assert resp.status_code == 200
+    items = resp.get_json()["items"]
+    assert items[0]["recommended_column"]
+    assert items[1]["uniprot_id"] == "P00533"
+    assert items[2]["error"] == "invalid pI/mw_kda"
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+from db import ConnectionPool, PoolTimeout, ReplicaRouter
+
+
+class FakePool:
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+
+    def connect(self, timeout=None):
+        self.timeout = timeout
+        if self.error is not None:
+            raise self.error
+        return self.name
+
+    def stats(self):
+        return {}
+
+    def dispose(self):
+        pass
+
+
+@pytest.fixture
+def router():
+    router = ReplicaRouter(FakePool("primary"), [("r1", FakePool("r1")), ("r2", FakePool("r2"))],
+                           check_interval=3600)
+    router._checked_at = float("inf")  # keine Hintergrund-Checks im Test
+    for backend in router.replicas:
+        backend.healthy, backend.error = True, None
+    return router
+
+
+def test_pool_timeout_falls_through_and_keeps_replica_healthy(router):
+    r1, r2 = router.replicas
+    r1.pool.error = PoolTimeout(msg="Pool erschoepft")
+    conn = router.connect()
+    assert conn.backend_name == "r2"
+    assert r1.healthy and r1.outstanding == 0
+    assert router.stats()["replica_busy"] == 1
+    assert router.stats()["replica_errors"] == 0
+
+
+def test_all_replicas_busy_falls_back_to_primary(router):
+    for backend in router.replicas:
+        backend.pool.error = PoolTimeout(msg="Pool erschoepft")
+    conn = router.connect()
+    assert conn.backend_name == "primary"
+    assert all(b.healthy for b in router.replicas)
+
+
+def test_connect_error_marks_replica_unhealthy(router):
+    r1, r2 = router.replicas
+    r1.pool.error = ConnectionRefusedError("refused")
+    conn = router.connect()
+    assert conn.backend_name == "r2"
+    assert not r1.healthy and r1.error == "refused"
+
+
+def test_health_check_keeps_state_on_pool_timeout(router):
+    r1 = router.replicas[0]
+    r1.pool.error = PoolTimeout(msg="Pool erschoepft")
+    assert router.check(r1) is True
+    assert r1.healthy
+
+
+class NullConnection:
+    in_transaction = False
+
+    def close(self):
+        pass
+
+
+def test_saturated_replicas_fall_back_without_waiting_the_pool_timeout():
+    def pool():
+        return ConnectionPool(NullConnection, pool_size=1, max_overflow=0, pre_ping=False, timeout=10.0)
+
+    router = ReplicaRouter(pool(), [("r1", pool()), ("r2", pool())], replica_timeout=0.01)
+    router._checked_at = float("inf")
+    for backend in router.replicas:
+        backend.healthy = True
+        backend.pool.connect()  # Pool voll
+
+    started = time.perf_counter()
+    conn = router.connect()
+    assert time.perf_counter() - started < 1.0
+    assert conn.backend_name == "primary"
+    assert router.stats()["replica_busy"] == 2
+    assert all(b.healthy for b in router.replicas)
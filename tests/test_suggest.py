@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+import app as app_module
+from suggest import PrefixIndex
+
+ROWS = [
+    {"id": i, "uniprot_id": f"P{i:05d}", "name": f"Kinase {i}", "gene_name": f"KIN{i}"}
+    for i in range(1, 40)
+]
+
+
+@pytest.fixture
+def suggest_client(monkeypatch):
+    index = PrefixIndex(ROWS, top_k=app_module.SUGGEST_TOP_K)
+    monkeypatch.setattr(app_module, "get_suggest_index", lambda: index)
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("limit, expected", [
+    ("3", 3),
+    ("0", 1),
+    ("-5", 1),
+    ("100000", app_module.SUGGEST_TOP_K),
+    ("abc", app_module.SUGGEST_TOP_K),
+])
+def test_limit_is_clamped(suggest_client, limit, expected):
+    resp = suggest_client.get("/api/suggest", query_string={"q": "kin", "limit": limit})
+    assert resp.status_code == 200
+    assert len(resp.get_json()["suggestions"]) == expected
+
+
+class SlowCatalog:
+    """Zaehlt, wie oft der ganze Katalog fuer den Index geladen wird."""
+
+    def __init__(self):
+        self.loads = 0
+
+    def connect(self):
+        return self
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=None):
+        self.sql = sql
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        self.loads += 1
+        time.sleep(0.05)
+        return ROWS
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def empty_index(monkeypatch):
+    catalog = SlowCatalog()
+    monkeypatch.setattr(app_module, "get_db_connection", catalog.connect)
+    monkeypatch.setattr(app_module, "fetch_data_version", lambda cur: 1)
+    monkeypatch.setitem(app_module._suggest_state, "index", None)
+    monkeypatch.setitem(app_module._suggest_state, "version", None)
+    return catalog
+
+
+def test_concurrent_first_requests_build_once(empty_index):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(app_module.get_suggest_index()))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert empty_index.loads == 1
+    assert len({id(index) for index in results}) == 1
+
+
+def test_preload_builds_index(empty_index):
+    app_module.preload_suggest_index().join()
+    assert empty_index.loads == 1
+    assert app_module._suggest_state["index"] is not None
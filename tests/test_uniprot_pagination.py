@@ -0,0 +1,88 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+import import_data
+
+HEADER = "Entry\tEntry Name\tProtein names\tGene Names\tOrganism\tLength\tMass\tSequence"
+
+
+def entry(n):
+    return f"P{n:05d}\tTEST{n}_HUMAN\tProtein {n}\tGENE{n}\tHomo sapiens\t10\t1100\tMKVLAAGIVG"
+
+
+# Drei Seiten mit 3, 3 und 2 Eintraegen; jede Seite beginnt mit dem TSV-Kopf
+PAGES = [[entry(n) for n in range(1, 4)], [entry(n) for n in range(4, 7)], [entry(7), entry(8)]]
+
+
+class UniProtStandIn(BaseHTTPRequestHandler):
+    """Liefert PAGES wie die UniProt-REST-API: Cursor in der next-URL."""
+
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.requests_seen.append(query)
+        page = int(query.get("cursor", ["0"])[0])
+        body = "\n".join([HEADER] + PAGES[page]) + "\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        if page + 1 < len(PAGES):
+            host, port = self.server.server_address[:2]
+            next_url = f"http://{host}:{port}/uniprotkb/search?format=tsv&cursor={page + 1}&size=3"
+            self.send_header("Link", f'<{next_url}>; rel="next"')
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def uniprot_url():
+    UniProtStandIn.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UniProtStandIn)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01},
+                              daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}/uniprotkb/search"
+    server.shutdown()
+    server.server_close()
+
+
+def test_follows_next_links_across_pages(uniprot_url):
+    entries = list(import_data.iter_uniprot_proteins("reviewed:true", page_size=3,
+                                                     base_url=uniprot_url))
+    assert [e["Entry"] for e in entries] == [f"P{n:05d}" for n in range(1, 9)]
+    assert len(UniProtStandIn.requests_seen) == 3
+    # Erste Anfrage mit Query-Parametern, danach nur noch die next-URL
+    assert UniProtStandIn.requests_seen[0]["query"] == ["reviewed:true"]
+    assert UniProtStandIn.requests_seen[0]["size"] == ["3"]
+    assert "query" not in UniProtStandIn.requests_seen[1]
+
+
+def test_repeated_header_is_not_an_entry(uniprot_url):
+    entries = list(import_data.iter_uniprot_proteins("x", page_size=3, base_url=uniprot_url))
+    assert all(e["Entry"] != "Entry" for e in entries)
+    assert entries[3] == {
+        "Entry": "P00004", "Entry Name": "TEST4_HUMAN", "Protein names": "Protein 4",
+        "Gene Names": "GENE4", "Organism": "Homo sapiens", "Length": "10", "Mass": "1100",
+        "Sequence": "MKVLAAGIVG",
+    }
+
+
+def test_max_results_stops_mid_page(uniprot_url):
+    entries = list(import_data.iter_uniprot_proteins("x", max_results=5, page_size=3,
+                                                     base_url=uniprot_url))
+    assert [e["Entry"] for e in entries] == [f"P{n:05d}" for n in range(1, 6)]
+    assert len(UniProtStandIn.requests_seen) == 2
+
+
+def test_max_results_limits_page_size(uniprot_url):
+    list(import_data.iter_uniprot_proteins("x", max_results=2, page_size=500, base_url=uniprot_url))
+    assert UniProtStandIn.requests_seen[0]["size"] == ["2"]
+    assert len(UniProtStandIn.requests_seen) == 1